@@ -1,6 +1,15 @@
+import bisect
 import datetime as dt
+import json
+import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, Optional, Tuple
 
+import numpy as np
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -8,104 +17,525 @@ from rest_framework.response import Response
 from api.models import WatchlistTicker
 from trading.broker import IST
 from trading.broker_cache import format_broker_error, get_angel_client
+from trading.chart_cache import entry_key, get_chart_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # stdlib json is several times slower on the candle arrays
+    orjson = None
+    logger.warning(
+        'orjson is not installed; chart responses fall back to the json module'
+    )
 
 _CHARTS_CACHE_TTL_SECONDS = 60
 # Trading days of intraday history to include in chart candles (0 = today only).
 _CHART_LOOKBACK_DAYS = 30
 _MAX_CHART_LOOKBACK_DAYS = 90
-_charts_cache: dict = {}
-_orb_cache: dict = {}
+_IST_OFFSET_SECONDS = 19800
+_EPOCH = dt.datetime(1970, 1, 1)
+_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+# ?max_points: smallest accepted budget, and the coarser bucket widths tried
+# (seconds, aligned to the 09:15 open) for history outside the full-resolution
+# tail.
+_MIN_MAX_POINTS = 200
+_SESSION_OPEN_SECONDS = 9 * 3600 + 15 * 60
+_DOWNSAMPLE_WIDTHS = (600, 900, 1800, 3600, 2 * 3600, 86400)
+
+
+def _df_to_columns(df) -> dict:
+    """
+    Parallel epoch-second / OHLCV arrays, straight from the frame's NumPy data.
+    """
+    if df is None or df.empty:
+        return {name: [] for name in _COLUMNS}
+    # The candle index is naive IST wall time.
+    times = (
+        df.index.values.astype('datetime64[s]').astype('int64')
+        - _IST_OFFSET_SECONDS
+    )
+    return {
+        'time': times.tolist(),
+        'open': df['open'].to_numpy(dtype='float64').tolist(),
+        'high': df['high'].to_numpy(dtype='float64').tolist(),
+        'low': df['low'].to_numpy(dtype='float64').tolist(),
+        'close': df['close'].to_numpy(dtype='float64').tolist(),
+        'volume': df['volume'].to_numpy(dtype='int64').tolist(),
+    }
 
 
-def _df_to_candles(df) -> list:
-    if df is None or df.empty:
-        return []
-    candles = []
-    for ts, row in df.iterrows():
-        candles.append({
-            'time': ts.isoformat() if hasattr(ts, 'isoformat') else str(ts),
-            'open': float(row['open']),
-            'high': float(row['high']),
-            'low': float(row['low']),
-            'close': float(row['close']),
-            'volume': int(row['volume']),
-        })
-    return candles
+def _columns_from(columns: dict, start: int) -> dict:
+    """The bars at or after epoch second start."""
+    first = bisect.bisect_left(columns['time'], start)
+    return {name: values[first:] for name, values in columns.items()}
 
 
-def _cache_key(symbols: list) -> str:
-    today = dt.datetime.now(IST).date().isoformat()
-    return f"{today}:{','.join(sorted(symbols))}"
+def _lookback_start(days_back: int) -> int:
+    """
+    Epoch second of the first bar get_chart_data fetches for days_back (09:15
+    IST).
+    """
+    day = dt.datetime.now(IST).date() - dt.timedelta(days=days_back)
+    opened = dt.datetime.combine(day, dt.time(9, 15))
+    return int((opened - _EPOCH).total_seconds()) - _IST_OFFSET_SECONDS
 
 
-def _fetch_symbol_market_rows(
+def _ist_iso(epoch: int) -> str:
+    return (
+        _EPOCH + dt.timedelta(seconds=epoch + _IST_OFFSET_SECONDS)
+    ).isoformat()
+
+
+def _columns_to_candles(columns: dict) -> list:
+    """
+    One dict per bar with naive IST isoformat times (the default response
+    format).
+    """
+    return [
+        {
+            'time': _ist_iso(t),
+            'open': o,
+            'high': h,
+            'low': l,
+            'close': c,
+            'volume': v,
+        }
+        for t, o, h, l, c, v in zip(*(columns[name] for name in _COLUMNS))
+    ]
+
+
+def _downsample(columns: dict, max_points: int) -> Tuple[dict, Optional[int]]:
+    """
+    At most max_points bars: the newest half of the budget stays at full
+    resolution, older bars are merged into the finest _DOWNSAMPLE_WIDTHS
+    buckets that fit the rest. Returns the columns and the time of the first
+    full-resolution bar (None when nothing was merged).
+    """
+    times = np.asarray(columns['time'], dtype='int64')
+    if len(times) <= max_points:
+        return columns, None
+    keep = max_points // 2
+    split = len(times) - keep
+    budget = max_points - keep
+    old = times[:split] + (_IST_OFFSET_SECONDS - _SESSION_OPEN_SECONDS)
+    for width in _DOWNSAMPLE_WIDTHS:
+        buckets = old // width
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        if len(starts) <= budget:
+            break
+    # Still too many daily buckets: drop the oldest days.
+    starts = starts[-budget:]
+    first = starts[0]
+    ends = np.r_[starts[1:], split] - 1
+
+    def merged(name: str, reduce) -> list:
+        values = np.asarray(columns[name][first:split])
+        head = (
+            reduce(values, starts - first)
+            if reduce is not None
+            else values[starts - first]
+        )
+        return head.tolist() + columns[name][split:]
+
+    return {
+        'time': merged('time', None),
+        'open': merged('open', None),
+        'high': merged('high', np.maximum.reduceat),
+        'low': merged('low', np.minimum.reduceat),
+        'close': np.asarray(columns['close'])[ends].tolist()
+        + columns['close'][split:],
+        'volume': merged('volume', np.add.reduceat),
+    }, int(times[split])
+
+
+def _shape_row(
+    row: dict,
+    columnar: bool,
+    cursor: Optional[int] = None,
+    max_points: int = 0,
+) -> dict:
+    """
+    Cached row -> response row: bars from cursor on, downsampled to
+    max_points (0 = all), as columns or candle dicts.
+    """
+    columns = row.get('columns') or _df_to_columns(None)
+    shaped = {k: v for k, v in row.items() if k != 'columns'}
+    if cursor is not None:
+        columns = _columns_from(columns, cursor)
+        shaped['since'] = cursor if columnar else _ist_iso(cursor)
+    if max_points:
+        bars = len(columns['time'])
+        columns, full_from = _downsample(columns, max_points)
+        if full_from is not None:
+            shaped['downsampled'] = {
+                'bars': bars,
+                'full_resolution_from': full_from
+                if columnar
+                else _ist_iso(full_from),
+            }
+    if columnar:
+        shaped['columns'] = columns
+    else:
+        shaped['candles'] = _columns_to_candles(columns)
+    return shaped
+
+
+def _dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+class _RequestPacer:
+    """
+    Spaces Angel candle requests at least 1/rate apart across this process's
+    threads.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self._interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def _fetch_concurrency() -> int:
+    """Parallel candle fetches per request (CHART_FETCH_CONCURRENCY)."""
+    try:
+        return max(1, int(os.environ.get('CHART_FETCH_CONCURRENCY', '4')))
+    except ValueError:
+        return 4
+
+
+def _fetch_rate() -> float:
+    """
+    Candle requests per second per process (CHART_FETCH_RATE, 0 = unpaced).
+    """
+    try:
+        return max(0.0, float(os.environ.get('CHART_FETCH_RATE', '3')))
+    except ValueError:
+        return 3.0
+
+
+_pacer = _RequestPacer(_fetch_rate())
+
+
+def _fetch_symbol_row(
+    client,
+    instrument_list: list,
+    symbol: str,
+    include_candles: bool,
+    days_back: int,
+) -> dict:
+    entry = {
+        'symbol': symbol,
+        'orb_high': None,
+        'orb_low': None,
+        'last_close': None,
+        'error': None,
+    }
+    if include_candles:
+        entry['columns'] = _df_to_columns(None)
+    try:
+        _pacer.wait()
+        chart = client.get_chart_data(
+            symbol, instrument_list, days_back=days_back
+        )
+        if chart is None:
+            entry['error'] = 'No intraday candle data'
+        else:
+            intraday, orb_high, orb_low = chart
+            if orb_high is not None and orb_low is not None:
+                entry['orb_high'] = orb_high
+                entry['orb_low'] = orb_low
+            else:
+                entry[
+                    'error'
+                ] = 'Could not compute ORB levels (no pre-9:20 data)'
+            if intraday is not None and not intraday.empty:
+                entry['last_close'] = float(intraday['close'].iloc[-1])
+                if include_candles:
+                    entry['columns'] = _df_to_columns(intraday)
+            elif not entry['error']:
+                entry['error'] = 'No intraday candle data'
+    except Exception as e:
+        entry['error'] = str(e)
+    return entry
+
+
+def _iter_symbol_market_rows(
     symbols: list, include_candles: bool = False, days_back: int = 0
-) -> list:
+) -> Iterator[dict]:
+    """
+    Fetch symbols on a bounded thread pool and yield each row as it completes
+    (not in input order). Requests are paced process-wide by CHART_FETCH_RATE.
+    """
+    if not symbols:
+        return
     client = get_angel_client()
     client._load_instrument_list()
     instrument_list = client.instrument_list
 
-    results = []
-    for symbol in symbols:
-        entry = {
-            'symbol': symbol,
-            'orb_high': None,
-            'orb_low': None,
-            'last_close': None,
-            'error': None,
-        }
-        if include_candles:
-            entry['candles'] = []
-        try:
-            chart = client.get_chart_data(
-                symbol, instrument_list, days_back=days_back
+    pool = ThreadPoolExecutor(
+        max_workers=min(_fetch_concurrency(), len(symbols)),
+        thread_name_prefix='chart-fetch',
+    )
+    try:
+        futures = [
+            pool.submit(
+                _fetch_symbol_row,
+                client,
+                instrument_list,
+                s,
+                include_candles,
+                days_back,
             )
-            if chart is None:
-                entry['error'] = 'No intraday candle data'
-            else:
-                intraday, orb_high, orb_low = chart
-                if orb_high is not None and orb_low is not None:
-                    entry['orb_high'] = orb_high
-                    entry['orb_low'] = orb_low
-                else:
-                    entry['error'] = (
-                        'Could not compute ORB levels (no pre-9:20 data)'
-                    )
-                if intraday is not None and not intraday.empty:
-                    entry['last_close'] = float(intraday['close'].iloc[-1])
-                    if include_candles:
-                        entry['candles'] = _df_to_candles(intraday)
-                elif not entry['error']:
-                    entry['error'] = 'No intraday candle data'
-        except Exception as e:
-            entry['error'] = str(e)
-
-        results.append(entry)
-
-    return results
-
-
-def _fetch_watchlist_charts(symbols: list, days_back: int = 0) -> dict:
-    return {
-        'updated_at': dt.datetime.now(IST).isoformat(),
-        'symbols': _fetch_symbol_market_rows(
-            symbols, include_candles=True, days_back=days_back
-        ),
+            for s in symbols
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # A closed stream (client went away) drops the symbols not yet started.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _fetch_symbol_market_rows(
+    symbols: list, include_candles: bool = False, days_back: int = 0
+) -> list:
+    rows = {
+        row['symbol']: row
+        for row in _iter_symbol_market_rows(
+            symbols, include_candles, days_back
+        )
     }
+    return [rows[s] for s in symbols]
 
 
-def _fetch_orb_snapshot(symbols: list) -> dict:
+def _iter_cached_rows(
+    symbols: list,
+    include_candles: bool,
+    days_back: int = 0,
+    force_refresh: bool = False,
+) -> Iterator[Tuple[dict, float]]:
+    """
+    (row, stored_at) for symbols from the shared per-symbol cache first, then
+    from Angel for symbols missing or older than the TTL, each stored as it
+    arrives. A candles fetch also stores the ORB row, so the ORB endpoint
+    reuses it.
+
+    Bars are cached once per symbol and day with the lookback they cover; a
+    fresh entry covering at least days_back is sliced down to it, and a
+    shorter fetch keeps the older days of a wider entry.
+    """
+    cache = get_chart_cache()
+    today = dt.datetime.now(IST).date().isoformat()
+    kind = 'bars' if include_candles else 'orb'
+    keys = {s: entry_key(kind, today, s) for s in symbols}
+    start = _lookback_start(days_back)
+    now = time.time()
+    cached = {} if force_refresh else cache.get_many(keys.values())
+
+    missing = []
+    for symbol, key in keys.items():
+        entry = cached.get(key)
+        if not entry or now - entry['stored_at'] >= _CHARTS_CACHE_TTL_SECONDS:
+            missing.append(symbol)
+        elif not include_candles:
+            yield entry['row'], entry['stored_at']
+        elif entry.get('days_back', 0) >= days_back:
+            row = entry['row']
+            yield {
+                **row,
+                'columns': _columns_from(row['columns'], start),
+            }, entry['stored_at']
+        else:
+            missing.append(symbol)
+
+    for row in _iter_symbol_market_rows(
+        missing, include_candles=include_candles, days_back=days_back
+    ):
+        stored_at = time.time()
+        key = keys[row['symbol']]
+        fresh = {key: {'stored_at': stored_at, 'row': row}}
+        if include_candles:
+            fresh[key]['days_back'] = days_back
+            wider = cached.get(key)
+            if (
+                wider
+                and wider.get('days_back', 0) > days_back
+                and not row['error']
+            ):
+                # Earlier days do not change; splice them in front of the new
+                # fetch.
+                older = wider['row']['columns']
+                first = bisect.bisect_left(older['time'], start)
+                fresh[key]['days_back'] = wider['days_back']
+                fresh[key]['row'] = {
+                    **row,
+                    'columns': {
+                        name: older[name][:first] + values
+                        for name, values in row['columns'].items()
+                    },
+                }
+            orb_row = {k: v for k, v in row.items() if k != 'columns'}
+            fresh[entry_key('orb', today, row['symbol'])] = {
+                'stored_at': stored_at,
+                'row': orb_row,
+            }
+        cache.set_many(fresh)
+        yield row, stored_at
+
+
+def _cached_market_rows(
+    symbols: list,
+    include_candles: bool,
+    days_back: int = 0,
+    force_refresh: bool = False,
+) -> dict:
+    return _collect_rows(
+        symbols,
+        _iter_cached_rows(symbols, include_candles, days_back, force_refresh),
+    )
+
+
+def _collect_rows(symbols: list, rows: Iterator[Tuple[dict, float]]) -> dict:
+    by_symbol = {}
+    stored_at = []
+    for row, at in rows:
+        by_symbol[row['symbol']] = row
+        stored_at.append(at)
     return {
-        'updated_at': dt.datetime.now(IST).isoformat(),
-        'symbols': _fetch_symbol_market_rows(symbols, include_candles=False),
+        'updated_at': dt.datetime.fromtimestamp(
+            min(stored_at), IST
+        ).isoformat(),
+        'symbols': [by_symbol[s] for s in symbols],
     }
 
 
+def _parse_since(raw) -> dict:
+    """
+    ?since=INFY:2026-01-05T10:15:00,TCS:1767587700 -> {symbol: epoch seconds}.
+    A cursor is a candle time in either response format; bad pairs are ignored.
+    """
+    cursors = {}
+    for pair in (raw or '').split(','):
+        symbol, _, cursor = pair.partition(':')
+        symbol = symbol.strip().upper()
+        cursor = cursor.strip()
+        if not symbol or not cursor:
+            continue
+        if cursor.isdigit():
+            cursors[symbol] = int(cursor)
+            continue
+        try:
+            wall = dt.datetime.fromisoformat(cursor).replace(tzinfo=None)
+        except ValueError:
+            continue
+        cursors[symbol] = (
+            int((wall - _EPOCH).total_seconds()) - _IST_OFFSET_SECONDS
+        )
+    return cursors
+
+
+def _delta_days_back(cursor: int, days_back: int) -> int:
+    """
+    Lookback that still covers the cursor's bar (calendar days, like
+    get_chart_data).
+    """
+    today = dt.datetime.now(IST).date()
+    behind = (today - dt.datetime.fromtimestamp(cursor, IST).date()).days
+    return max(0, min(behind, days_back))
+
+
+def _iter_chart_rows(
+    symbols: list,
+    cursors: dict,
+    days_back: int,
+    force_refresh: bool,
+    columnar: bool = False,
+    max_points: int = 0,
+) -> Iterator[Tuple[dict, float]]:
+    """
+    Candle rows for the charts endpoint. A symbol with a cursor is fetched
+    only as far back as the cursor and gets just the bars from the cursor's
+    bar on (that bar may have grown since the client saw it).
+    """
+    groups: dict = {}
+    for symbol in symbols:
+        cursor = cursors.get(symbol.upper())
+        lookback = _delta_days_back(cursor, days_back) if cursor else days_back
+        groups.setdefault(lookback, []).append(symbol)
+
+    for lookback, group in groups.items():
+        for row, stored_at in _iter_cached_rows(
+            group,
+            include_candles=True,
+            days_back=lookback,
+            force_refresh=force_refresh,
+        ):
+            cursor = cursors.get(row['symbol'].upper())
+            yield _shape_row(row, columnar, cursor, max_points), stored_at
+
+
+def _stream_chart_rows(
+    symbols: list, rows: Iterator[Tuple[dict, float]]
+) -> Iterator[bytes]:
+    """
+    NDJSON: a meta line, one 'symbol' line per row as it is ready, then 'done'.
+    """
+    yield _dumps({'type': 'meta', 'symbols': symbols}) + b'\n'
+    oldest = None
+    try:
+        for row, stored_at in rows:
+            oldest = stored_at if oldest is None else min(oldest, stored_at)
+            yield _dumps(
+                {
+                    'type': 'symbol',
+                    'updated_at': dt.datetime.fromtimestamp(
+                        stored_at, IST
+                    ).isoformat(),
+                    'row': row,
+                }
+            ) + b'\n'
+    except Exception as e:
+        yield _dumps(
+            {'type': 'error', 'error': format_broker_error(e)}
+        ) + b'\n'
+        return
+    updated_at = dt.datetime.fromtimestamp(
+        oldest or time.time(), IST
+    ).isoformat()
+    yield _dumps({'type': 'done', 'updated_at': updated_at}) + b'\n'
+
+
 @api_view(['GET'])
 def charts_watchlist(request):
     """
-    Intraday candles + ORB for watchlist. One Angel call per symbol.
-    Cached 60s unless ?refresh=1. Live ticks via WebSocket /ws/charts/.
+    Intraday candles + ORB for watchlist. One Angel call per uncached symbol.
+    Per-symbol entries are cached 60s across workers unless ?refresh=1.
+
+    ?since=SYMBOL:<candle time>,... returns only the bars from that candle on
+    for those symbols (row carries 'since'); the client merges them into the
+    series it already has.
+
+    ?columnar=1 gives each row 'columns': parallel arrays of epoch
+    seconds and OHLCV instead of one 'candles' dict per bar (smaller, and
+    serialized with orjson when installed).
+
+    ?max_points=N caps bars per symbol: the newest N/2 stay 5-minute, older
+    history is merged into coarser OHLC buckets (row carries 'downsampled').
+
+    ?stream=1 answers with NDJSON instead: cached symbols first, then each
+    fetched symbol as soon as it arrives, so charts render progressively.
+    Live ticks via WebSocket /ws/charts/.
     """
     symbols_qs = (
         WatchlistTicker.objects.filter(is_active=True).order_by('symbol')
@@ -126,23 +556,38 @@ def charts_watchlist(request):
         days_back = _CHART_LOOKBACK_DAYS
     days_back = max(0, min(days_back, _MAX_CHART_LOOKBACK_DAYS))
 
-    key = f"{_cache_key(symbols)}:d{days_back}"
-    now = time.time()
-
-    if not force_refresh:
-        cached = _charts_cache.get(key)
-        if cached and now - cached['stored_at'] < _CHARTS_CACHE_TTL_SECONDS:
-            return Response(cached['payload'])
+    cursors = _parse_since(request.query_params.get('since'))
+    stream = request.query_params.get('stream') in ('1', 'true', 'yes')
+    columnar = request.query_params.get('columnar') in ('1', 'true', 'yes')
+    try:
+        max_points = int(request.query_params.get('max_points') or 0)
+    except (TypeError, ValueError):
+        max_points = 0
+    if max_points:
+        max_points = max(max_points, _MIN_MAX_POINTS)
+    rows = _iter_chart_rows(
+        symbols, cursors, days_back, force_refresh, columnar, max_points
+    )
 
     try:
-        payload = _fetch_watchlist_charts(symbols, days_back=days_back)
+        if stream:
+            # Log in before the 200 goes out so a broker outage is still a 503.
+            get_angel_client()._load_instrument_list()
+            response = StreamingHttpResponse(
+                _stream_chart_rows(symbols, rows),
+                content_type='application/x-ndjson',
+            )
+            response['Cache-Control'] = 'no-cache'
+            return response
+        payload = _collect_rows(symbols, rows)
     except Exception as e:
         return Response(
             {'error': format_broker_error(e)},
             status=status.HTTP_503_SERVICE_UNAVAILABLE,
         )
 
-    _charts_cache[key] = {'stored_at': now, 'payload': payload}
+    if columnar:
+        return HttpResponse(_dumps(payload), content_type='application/json')
     return Response(payload)
 
 
@@ -150,7 +595,7 @@ def charts_watchlist(request):
 def orb_watchlist(request):
     """
     ORB high/low + latest price for watchlist (no candle arrays).
-    Cached 60s unless ?refresh=1.
+    Per-symbol entries are cached 60s across workers unless ?refresh=1.
     """
     symbols_qs = (
         WatchlistTicker.objects.filter(is_active=True).order_by('symbol')
@@ -164,21 +609,34 @@ def orb_watchlist(request):
         })
 
     force_refresh = request.query_params.get('refresh') in ('1', 'true', 'yes')
-    key = f"orb:{_cache_key(symbols)}"
-    now = time.time()
-
-    if not force_refresh:
-        cached = _orb_cache.get(key)
-        if cached and now - cached['stored_at'] < _CHARTS_CACHE_TTL_SECONDS:
-            return Response(cached['payload'])
-
     try:
-        payload = _fetch_orb_snapshot(symbols)
+        payload = _cached_market_rows(
+            symbols, include_candles=False, force_refresh=force_refresh
+        )
     except Exception as e:
         return Response(
             {'error': format_broker_error(e)},
             status=status.HTTP_503_SERVICE_UNAVAILABLE,
         )
 
-    _orb_cache[key] = {'stored_at': now, 'payload': payload}
     return Response(payload)
+
+
+@api_view(['GET'])
+def feed_metrics(request):
+    """
+    Live feed health: this process's feed plus feed processes that reported
+    recently.
+    """
+    from trading.feed_metrics import read_snapshots
+    from trading.market_stream import MarketStreamManager
+
+    manager = MarketStreamManager._instance
+    return Response(
+        {
+            'local': manager.feed_health() if manager is not None else None,
+            'processes': [
+                p for p in read_snapshots() if p.get('pid') != os.getpid()
+            ],
+        }
+    )
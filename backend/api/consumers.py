@@ -1,13 +1,33 @@
 import asyncio
+from urllib.parse import parse_qs
 
 from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 
 from api.models import WatchlistTicker
-from trading.market_stream import CHANNEL_GROUP, start_live_stream, stop_live_stream
+from trading.market_stream import (
+    ALL_SYMBOLS_GROUP,
+    BAR_INTERVAL_SECONDS,
+    CHANNEL_GROUP,
+    CONTROL_GROUP,
+    LIVE_INTERVALS,
+    MarketStreamManager,
+    start_live_stream,
+    stop_live_stream,
+    symbol_group,
+)
 
+# Cap on explicit per-symbol subscriptions from one socket.
+MAX_CLIENT_SYMBOLS = 50
 
-def _active_watchlist_symbols() -> list:
+
+def _external_feed() -> bool:
+    """A separate run_market_feed process owns the Angel connection."""
+    return settings.LIVE_FEED_PROCESS == 'external'
+
+
+def active_watchlist_symbols() -> list:
     return list(
         WatchlistTicker.objects.filter(is_active=True)
         .order_by('symbol')
@@ -16,29 +36,223 @@ def _active_watchlist_symbols() -> list:
 
 
 class ChartLiveConsumer(AsyncJsonWebsocketConsumer):
-    """Relay Angel One WebSocket v2 ticks to the Charts page."""
+    """
+    Relay Angel One WebSocket v2 ticks to the Charts page.
+
+    Only logged-in users (session cookie) are accepted. Clients get the whole
+    watchlist by default. Sending {"action": "subscribe", "symbols": [...]}
+    switches the socket to just those symbols (per-symbol groups; symbols not
+    on the active watchlist are ignored); {"action": "unsubscribe", ...}
+    removes them, and unsubscribing everything falls back to the whole
+    watchlist.
+
+    Tick frames are JSON unless the socket asks for binary, either with
+    ?format=binary or {"action": "format", "format": "binary"}.
+
+    {"action": "snapshot", "interval": 60} returns the forming 1m / 5m / 15m /
+    daily (86400) bars the feed builds from ticks, without a candle API call.
+    """
 
     async def connect(self):
+        self.symbols = set()
+        self.watchlist = []
+        user = self.scope.get('user')
+        self.authenticated = bool(user and user.is_authenticated)
+        if not self.authenticated:
+            await self.close()
+            return
+        query = parse_qs(
+            (self.scope.get('query_string') or b'').decode('latin-1')
+        )
+        self.binary = (query.get('format') or [''])[0] == 'binary'
         await self.channel_layer.group_add(CHANNEL_GROUP, self.channel_name)
+        await self.channel_layer.group_add(
+            ALL_SYMBOLS_GROUP, self.channel_name
+        )
         await self.accept()
 
-        symbols = await sync_to_async(_active_watchlist_symbols)()
-        if symbols:
-            await self.send_json({'type': 'status', 'message': 'connecting', 'symbols': symbols})
-            await self._start_stream(symbols)
+        self.watchlist = await sync_to_async(active_watchlist_symbols)()
+        if self.watchlist:
+            await self.send_json(
+                {
+                    'type': 'status',
+                    'message': 'connecting',
+                    'symbols': self.watchlist,
+                }
+            )
+            await self._start_stream(self.watchlist)
+            await self._send_snapshot(None)
         else:
             await self.send_json({'type': 'status', 'message': 'no_symbols'})
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(CHANNEL_GROUP, self.channel_name)
+        if not self.authenticated:
+            return
+        await self.channel_layer.group_discard(
+            CHANNEL_GROUP, self.channel_name
+        )
+        await self.channel_layer.group_discard(
+            ALL_SYMBOLS_GROUP, self.channel_name
+        )
+        for symbol in self.symbols:
+            await self.channel_layer.group_discard(
+                symbol_group(symbol), self.channel_name
+            )
+        if _external_feed():
+            if self.symbols:
+                await self._send_interest(None, explicit=False)
+            return
         # Do not block Daphne shutdown on Angel WS teardown (tab switch / refresh).
-        asyncio.create_task(sync_to_async(stop_live_stream)())
+        asyncio.create_task(sync_to_async(stop_live_stream)(self.channel_name))
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get('action') if isinstance(content, dict) else None
+        if action == 'snapshot':
+            try:
+                interval = int(content.get('interval') or BAR_INTERVAL_SECONDS)
+            except (TypeError, ValueError):
+                return
+            if interval in LIVE_INTERVALS:
+                await self._send_snapshot(
+                    sorted(self.symbols) or None, interval
+                )
+            return
+        if action == 'format':
+            self.binary = content.get('format') == 'binary'
+            await self.send_json(
+                {
+                    'type': 'format',
+                    'format': 'binary' if self.binary else 'json',
+                }
+            )
+            return
+        if action not in ('subscribe', 'unsubscribe'):
+            return
+        requested = {
+            str(s).strip().upper()
+            for s in (content.get('symbols') or [])
+            if str(s).strip()
+        }
+        if action == 'subscribe':
+            # Only the active watchlist is streamed; anything else would open
+            # Angel subscriptions.
+            requested &= {s.upper() for s in self.watchlist}
+        had_symbols = bool(self.symbols)
+        if action == 'subscribe':
+            room = max(0, MAX_CLIENT_SYMBOLS - len(self.symbols))
+            added = sorted(requested - self.symbols)[:room]
+            for symbol in added:
+                await self.channel_layer.group_add(
+                    symbol_group(symbol), self.channel_name
+                )
+            self.symbols.update(added)
+            if added:
+                await self._send_snapshot(added)
+        else:
+            removed = requested & self.symbols
+            for symbol in removed:
+                await self.channel_layer.group_discard(
+                    symbol_group(symbol), self.channel_name
+                )
+            self.symbols -= removed
+
+        if self.symbols and not had_symbols:
+            await self.channel_layer.group_discard(
+                ALL_SYMBOLS_GROUP, self.channel_name
+            )
+        elif had_symbols and not self.symbols:
+            await self.channel_layer.group_add(
+                ALL_SYMBOLS_GROUP, self.channel_name
+            )
+
+        if self.symbols:
+            await self._send_interest(sorted(self.symbols), explicit=True)
+        else:
+            await self._send_interest(self.watchlist, explicit=False)
+        await self.send_json(
+            {'type': 'subscribed', 'symbols': sorted(self.symbols)}
+        )
+
+    async def watchlist_changed(self, event):
+        self.watchlist = list(event.get('symbols') or [])
+        dropped = self.symbols - {s.upper() for s in self.watchlist}
+        if dropped:
+            for symbol in dropped:
+                await self.channel_layer.group_discard(
+                    symbol_group(symbol), self.channel_name
+                )
+            self.symbols -= dropped
+            if not self.symbols:
+                await self.channel_layer.group_add(
+                    ALL_SYMBOLS_GROUP, self.channel_name
+                )
+            await self._send_interest(
+                sorted(self.symbols) or self.watchlist, bool(self.symbols)
+            )
+            await self.send_json(
+                {'type': 'subscribed', 'symbols': sorted(self.symbols)}
+            )
+        elif not self.symbols and not _external_feed():
+            await self._send_interest(self.watchlist, explicit=False)
+        await self.send_json({'type': 'watchlist', 'symbols': self.watchlist})
 
     async def chart_message(self, event):
+        if self.binary and event.get('binary'):
+            await self.send(bytes_data=event['binary'])
+            return
         await self.send_json(event['payload'])
 
+    async def _send_interest(self, symbols, explicit: bool):
+        if _external_feed():
+            if symbols is not None and not explicit:
+                # The feed process already carries the whole watchlist.
+                symbols = None
+            await self.channel_layer.group_send(
+                CONTROL_GROUP,
+                {
+                    'type': 'feed.interest',
+                    'client': self.channel_name,
+                    'symbols': symbols,
+                    'explicit': explicit,
+                },
+            )
+            return
+        await sync_to_async(MarketStreamManager.instance().set_interest)(
+            self.channel_name,
+            symbols or [],
+            explicit,
+        )
+
+    async def _send_snapshot(
+        self, symbols, interval: int = BAR_INTERVAL_SECONDS
+    ):
+        """
+        Current live bars so the first paint does not wait for the next tick.
+        """
+        if _external_feed():
+            await self.channel_layer.group_send(
+                CONTROL_GROUP,
+                {
+                    'type': 'feed.snapshot',
+                    'reply_to': self.channel_name,
+                    'symbols': symbols,
+                    'interval': interval,
+                },
+            )
+            return
+        event = await sync_to_async(
+            MarketStreamManager.instance().snapshot_event
+        )(
+            symbols,
+            interval,
+        )
+        if event:
+            await self.chart_message(event)
+
     async def _start_stream(self, symbols):
-        await sync_to_async(start_live_stream)(symbols)
+        if _external_feed():
+            return
+        await sync_to_async(start_live_stream)(symbols, self.channel_name)
 
     async def _stop_stream(self):
-        await sync_to_async(stop_live_stream)()
+        await sync_to_async(stop_live_stream)(self.channel_name)
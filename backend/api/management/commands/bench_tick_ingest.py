@@ -0,0 +1,125 @@
+"""
+Microbenchmark: ticks/s through the live bar aggregator, old dict path vs
+slots.
+"""
+import datetime as dt
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from trading.broker import IST
+from trading.market_stream import MarketStreamManager
+
+
+def _legacy_bar_open_time_utc(now_ist) -> int:
+    minute = (now_ist.minute // 5) * 5
+    bar = now_ist.replace(minute=minute, second=0, microsecond=0)
+    return int(bar.timestamp())
+
+
+class _LegacyAggregator:
+    """The pre-slot _on_data: a new bar dict and an IST datetime per tick."""
+
+    def __init__(self, token_to_symbol: dict) -> None:
+        self._token_to_symbol = token_to_symbol
+        self._live_bars = {}
+
+    def _broadcast(self, message: dict) -> None:
+        pass
+
+    def on_data(self, data: dict) -> None:
+        raw_token = str(data.get('token', '')).strip()
+        symbol = self._token_to_symbol.get(raw_token)
+        if not symbol and raw_token.isdigit():
+            symbol = self._token_to_symbol.get(str(int(raw_token)))
+        if not symbol:
+            return
+        raw_ltp = data.get('last_traded_price')
+        if raw_ltp is None:
+            return
+        received_at = time.time()
+        ltp = float(int(raw_ltp)) / 100.0
+        now_ist = dt.datetime.fromtimestamp(received_at, IST)
+        bar_time = _legacy_bar_open_time_utc(now_ist)
+        bar = self._live_bars.get(symbol)
+        if not bar or bar.get('time') != bar_time:
+            bar = {
+                'time': bar_time,
+                'open': ltp,
+                'high': ltp,
+                'low': ltp,
+                'close': ltp,
+            }
+        else:
+            bar = {
+                **bar,
+                'high': max(bar['high'], ltp),
+                'low': min(bar['low'], ltp),
+                'close': ltp,
+            }
+        self._live_bars[symbol] = bar
+        self._broadcast(
+            {'type': 'tick', 'symbol': symbol, 'ltp': ltp, 'bar': bar}
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure live bar aggregation throughput (ticks/s) before and '
+        'after the slot rewrite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', type=int, default=50)
+        parser.add_argument('--ticks', type=int, default=200_000)
+        parser.add_argument(
+            '--repeat', type=int, default=3, help='Best of N runs'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        tokens = [str(1000 + i) for i in range(options['symbols'])]
+        token_to_symbol = {t: f'SYM{t}' for t in tokens}
+        ticks = [
+            {
+                'token': rng.choice(tokens),
+                'last_traded_price': rng.randint(99_000, 101_000),
+            }
+            for _ in range(options['ticks'])
+        ]
+
+        legacy = _LegacyAggregator(token_to_symbol)
+
+        manager = MarketStreamManager()
+        manager._recorder = None
+        manager._checkpoint_every = 0
+        manager._rest_check = False
+        manager._broadcast = lambda *_args: None
+        for token, symbol in token_to_symbol.items():
+            manager.bind_token(token, symbol)
+
+        def best(fn):
+            runs = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                for data in ticks:
+                    fn(data)
+                runs.append(time.perf_counter() - started)
+            return len(ticks) / min(runs)
+
+        before = best(legacy.on_data)
+        after = best(lambda data: manager._on_data(None, data))
+        self.stdout.write(
+            json.dumps(
+                {
+                    'symbols': options['symbols'],
+                    'ticks': options['ticks'],
+                    'legacy_ticks_per_second': round(before),
+                    'slot_ticks_per_second': round(after),
+                    'speedup': round(after / before, 2),
+                },
+                indent=2,
+            )
+        )
@@ -0,0 +1,156 @@
+"""
+Load test: channel-layer messages/s for per-tick frames vs coalesced batches.
+"""
+import json
+import random
+import time
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+from trading.market_stream import MarketStreamManager, encode_wire_frame
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive synthetic ticks through MarketStreamManager and count '
+        'channel-layer group_send calls with one frame per tick vs the '
+        'LIVE_FLUSH_HZ publisher.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', type=int, default=50)
+        parser.add_argument(
+            '--rate', type=float, default=5.0, help='Ticks/s per symbol'
+        )
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--flush-hz', type=float, default=4.0)
+
+    def handle(self, *args, **options):
+        layer = get_channel_layer()
+        if layer is None:
+            self.stderr.write('No channel layer configured.')
+            return
+        sent = {'messages': 0, 'symbols': 0}
+        group_send = layer.group_send
+
+        async def counting_group_send(group, message):
+            payload = message.get('payload') or {}
+            sent['messages'] += 1
+            sent['symbols'] += len(payload.get('items') or [1])
+            await group_send(group, message)
+
+        layer.group_send = counting_group_send
+        try:
+            results = {
+                'per_tick': self._run(options, flush_hz=0.0, sent=sent),
+                'coalesced': self._run(
+                    options, flush_hz=options['flush_hz'], sent=sent
+                ),
+            }
+        finally:
+            layer.group_send = group_send
+        results['reduction'] = round(
+            results['per_tick']['messages_per_second']
+            / max(results['coalesced']['messages_per_second'], 1e-9),
+            1,
+        )
+        results['encoding'] = self._encoding(options['symbols'])
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def _run(self, options, flush_hz: float, sent: dict) -> dict:
+        rng = random.Random(11)
+        manager = MarketStreamManager()
+        manager._recorder = None
+        manager._checkpoint_every = 0
+        manager._rest_check = False
+        manager._flush_hz = flush_hz
+        tokens = [str(5000 + i) for i in range(options['symbols'])]
+        for token in tokens:
+            manager.bind_token(token, f'SYM{token}')
+        manager._ensure_publisher()
+
+        sent['messages'] = sent['symbols'] = 0
+        total_rate = options['symbols'] * options['rate']
+        ticks = 0
+        started = time.monotonic()
+        deadline = started + options['seconds']
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            due = int((now - started) * total_rate)
+            while ticks < due:
+                manager._on_data(
+                    None,
+                    {
+                        'token': rng.choice(tokens),
+                        'last_traded_price': rng.randint(99_000, 101_000),
+                        'exchange_timestamp': int(time.time() * 1000),
+                    },
+                )
+                ticks += 1
+            time.sleep(0.005)
+        manager.flush()
+        drain_deadline = time.monotonic() + 2.0
+        while manager._outbox and time.monotonic() < drain_deadline:
+            time.sleep(0.01)
+        manager._stop_publisher()
+        elapsed = time.monotonic() - started
+        return {
+            'flush_hz': flush_hz,
+            'ticks_per_second': round(ticks / elapsed, 1),
+            'messages_per_second': round(sent['messages'] / elapsed, 1),
+            'symbol_updates_per_second': round(sent['symbols'] / elapsed, 1),
+            'latency': manager.latency_stats(),
+        }
+
+    def _encoding(self, symbols: int, rounds: int = 2000) -> dict:
+        """
+        Bytes on the wire and serialization time per item, JSON vs binary
+        frames.
+        """
+        manager = MarketStreamManager()
+        manager._recorder = None
+        manager._checkpoint_every = 0
+        manager._rest_check = False
+        manager._broadcast = lambda *_args: None
+        for i in range(symbols):
+            token = str(7000 + i)
+            manager.bind_token(token, f'SYM{i}')
+            manager._on_data(
+                None, {'token': token, 'last_traded_price': 123_455 + i}
+            )
+        bars = manager._slots
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            text = json.dumps(
+                {
+                    'type': 'ticks',
+                    'items': [
+                        {
+                            'symbol': b.symbol,
+                            'ltp': b.close,
+                            'bar': b.as_dict(),
+                        }
+                        for b in bars
+                    ],
+                }
+            )
+        json_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            frame = encode_wire_frame([b.encode() for b in bars])
+        binary_seconds = time.perf_counter() - started
+
+        items = rounds * len(bars)
+        return {
+            'json_bytes_per_item': round(
+                len(text.encode('utf-8')) / len(bars), 1
+            ),
+            'binary_bytes_per_item': round(len(frame) / len(bars), 1),
+            'json_us_per_item': round(json_seconds / items * 1e6, 3),
+            'binary_us_per_item': round(binary_seconds / items * 1e6, 3),
+        }
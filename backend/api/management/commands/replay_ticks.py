@@ -0,0 +1,71 @@
+"""
+Replay a recorded tick file through MarketStreamManager and report latency.
+"""
+import datetime as dt
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from trading.market_recorder import MarketReplay, recording_path
+from trading.market_stream import MarketStreamManager
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a tick recording (MARKET_RECORD_TICKS) into the live bar '
+        'aggregator and an optional strategy callback, then print latency '
+        'stats.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'recording',
+            help=(
+                'Recording file path, or a trading date (YYYY-MM-DD) '
+                'under MARKET_DATA_DIR'
+            ),
+        )
+        parser.add_argument(
+            '--speed',
+            type=float,
+            default=1.0,
+            help=(
+                '1 = real time, 10 = ten times faster, '
+                '0 = as fast as possible'
+            ),
+        )
+        parser.add_argument(
+            '--strategy',
+            default='',
+            help=(
+                'Dotted path to a callable(symbol, bar) invoked on every '
+                'closed 5m bar'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['recording'])
+        if not path.exists():
+            try:
+                path = recording_path(
+                    dt.date.fromisoformat(options['recording'])
+                )
+            except ValueError:
+                raise CommandError(f'No recording at {path}')
+        if not path.exists():
+            raise CommandError(f'No recording at {path}')
+
+        on_bar = None
+        if options['strategy']:
+            try:
+                on_bar = import_string(options['strategy'])
+            except ImportError as exc:
+                raise CommandError(str(exc))
+
+        manager = MarketStreamManager()
+        manager._broadcast = lambda *_args: None
+        replay = MarketReplay(manager, speed=options['speed'], on_bar=on_bar)
+        stats = replay.run(path)
+        self.stdout.write(json.dumps(stats, indent=2))
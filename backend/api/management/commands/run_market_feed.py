@@ -0,0 +1,87 @@
+"""
+Run the single upstream Angel One market feed for LIVE_FEED_PROCESS=external.
+"""
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.consumers import active_watchlist_symbols
+from trading.market_stream import (
+    WATCHLIST_CLIENT_ID,
+    MarketStreamManager,
+    serve_feed_control,
+)
+from trading.tick_bus import start_tick_publisher
+
+
+class Command(BaseCommand):
+    help = (
+        'Hold the one Angel One WebSocket for the active watchlist and '
+        'publish ticks over the channel layer to every Daphne worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh-seconds',
+            type=float,
+            default=60.0,
+            help=(
+                'Fallback re-read of the watchlist; edits normally arrive '
+                'instantly via the control group'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        backend = settings.CHANNEL_LAYERS['default']['BACKEND']
+        if backend.endswith('InMemoryChannelLayer'):
+            self.stderr.write(
+                'Warning: in-memory channel layer; only this process will see '
+                'ticks. '
+                'Set LIVE_FEED_PROCESS=external or CHANNELS_REDIS_URL.'
+            )
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+
+        manager = MarketStreamManager.instance()
+        # Latest prices for the bot process over Redis pub/sub (TICK_BUS).
+        tick_publisher = start_tick_publisher()
+        if tick_publisher:
+            manager.add_tick_listener(tick_publisher.on_tick)
+            # Closed 5m bars for the bot's trailing engine.
+            manager.add_bar_listener(tick_publisher.on_bar)
+        symbols = active_watchlist_symbols()
+        self.stdout.write(f'Market feed starting for {len(symbols)} symbols')
+        # The feed process is a permanent client, so the stream never idles
+        # out.
+        manager.register_client(symbols, WATCHLIST_CLIENT_ID)
+        # Per-symbol subscriptions from Daphne workers arrive on the control
+        # group.
+        control = threading.Thread(
+            target=serve_feed_control,
+            args=(manager, stop),
+            name='feed-control',
+            daemon=True,
+        )
+        control.start()
+        try:
+            while not stop.wait(options['refresh_seconds']):
+                # No-op unless a change was missed; the manager only sends the
+                # diff.
+                manager.set_interest(
+                    WATCHLIST_CLIENT_ID,
+                    active_watchlist_symbols(),
+                    explicit=False,
+                )
+        finally:
+            if tick_publisher:
+                manager.remove_listener(tick_publisher.on_tick)
+                manager.remove_listener(tick_publisher.on_bar)
+                tick_publisher.stop()
+            manager.unregister_client(WATCHLIST_CLIENT_ID)
+            with manager._lock:
+                manager._stop_stream_locked()
+            self.stdout.write('Market feed stopped')
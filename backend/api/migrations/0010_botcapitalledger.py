@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_chartink_webhook_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotCapitalLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('capital', models.FloatField(default=0)),
+                ('reserved', models.FloatField(default=0)),
+                ('shard_task_ids', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='capital_ledger',
+                    to='api.botsession',
+                )),
+            ],
+        ),
+    ]
@@ -126,6 +126,27 @@ class ManagedPosition(models.Model):
         ordering = ['-opened_at']
 
 
+class BotCapitalLedger(models.Model):
+    """
+    Shared capital for a sharded bot session; shards reserve before placing
+    entries.
+    """
+
+    session = models.OneToOneField(
+        BotSession, on_delete=models.CASCADE, related_name='capital_ledger'
+    )
+    capital = models.FloatField(default=0)
+    reserved = models.FloatField(default=0)
+    shard_task_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return (
+            f'Ledger session {self.session_id}: '
+            f'{self.reserved:.0f}/{self.capital:.0f}'
+        )
+
+
 class ChartinkWebhookEvent(models.Model):
     STATUS_OK = 'ok'
     STATUS_ERROR = 'error'
@@ -45,10 +45,20 @@ def execute_trade_bot(task_id: str = '', session_id: int | None = None) -> None:
             WatchlistTicker.objects.filter(is_active=True).values_list('symbol', flat=True)
         )
         bot = TradeMaster()
-        bot.make_some_money(
-            tickers=db_tickers if db_tickers else None,
-            session_id=session.id,
-        )
+        shards = []
+        if task_id and task_id != 'local-thread':
+            from trading.bot_shards import plan_shards
+
+            shards = plan_shards(db_tickers)
+        if len(shards) > 1:
+            from trading.bot_shards import run_shard_coordinator
+
+            run_shard_coordinator(bot, session.id, shards)
+        else:
+            bot.make_some_money(
+                tickers=db_tickers if db_tickers else None,
+                session_id=session.id,
+            )
 
         from trading.pnl_service import sync_pnl_records
         sync_pnl_records(bot, replace_today=True)
@@ -71,6 +81,45 @@ def run_trade_task(self, session_id=None):
     execute_trade_bot(task_id=self.request.id or '', session_id=session_id)
 
 
+def execute_trade_shard(
+    session_id: int,
+    tickers: list,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> None:
+    """
+    Run the ORB loop for one slice of the watchlist (coordinator owns
+    housekeeping).
+    """
+    from api.models import BotSession
+    from trading.trading_bot import TradeMaster
+
+    status = (
+        BotSession.objects.filter(pk=session_id)
+        .values_list('status', flat=True)
+        .first()
+    )
+    if status != 'running':
+        print(
+            f'Shard {shard_index + 1}/{shard_count}: '
+            f'session {session_id} not running.'
+        )
+        return
+
+    print(f'Shard {shard_index + 1}/{shard_count}: {len(tickers)} symbols')
+    bot = TradeMaster()
+    bot.run_housekeeping = False
+    bot.capital_ledger_session_id = session_id
+    bot.make_some_money(tickers=tickers, session_id=session_id)
+
+
+@shared_task(bind=True)
+def run_trade_shard_task(
+    self, session_id, tickers, shard_index=0, shard_count=1
+):
+    execute_trade_shard(session_id, tickers, shard_index, shard_count)
+
+
 @shared_task
 def cleanup_orphan_orders_periodic() -> None:
     """Cancel pending exit orders for flat symbols (runs even if bot UI is idle)."""
@@ -97,6 +146,31 @@ def cleanup_orphan_orders_periodic() -> None:
         print(f'Periodic orphan cleanup failed: {exc}')
 
 
+@shared_task
+def warm_up_bot_task() -> None:
+    """
+    Pre-market login, registry load and candle/capital prefetch for the
+    watchlist.
+    """
+    import pytz
+
+    from api.models import WatchlistTicker
+    from trading.bot_warmup import run_premarket_warmup
+
+    now = dt.datetime.now(pytz.timezone('Asia/Calcutta'))
+    if now.weekday() >= 5:
+        return
+    tickers = list(
+        WatchlistTicker.objects.filter(is_active=True).values_list(
+            'symbol', flat=True
+        )
+    )
+    if not tickers:
+        print('Pre-market warm-up skipped: watchlist is empty.')
+        return
+    run_premarket_warmup(tickers)
+
+
 def run_trade_bot_in_thread(session_id: int) -> None:
     """Background thread entrypoint for local dev without Redis."""
     execute_trade_bot(task_id='local-thread', session_id=session_id)
@@ -37,6 +37,7 @@ urlpatterns = [
     # Charts + dashboard ORB snapshot (watchlist intraday / ORB levels)
     path('charts/watchlist/', chart_views.charts_watchlist, name='charts-watchlist'),
     path('orb/watchlist/', chart_views.orb_watchlist, name='orb-watchlist'),
+    path('feed/metrics/', chart_views.feed_metrics, name='feed-metrics'),
 
     # Live market data (broker_live = one login for positions + orders)
     path('broker/live/', broker_views.broker_live, name='broker-live'),
@@ -25,6 +25,9 @@ def watchlist(request):
     serializer = WatchlistTickerSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save()
+        from trading.market_stream import notify_watchlist_changed
+
+        notify_watchlist_changed()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -36,6 +39,9 @@ def watchlist_detail(request, pk):
     except WatchlistTicker.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
     ticker.delete()
+    from trading.market_stream import notify_watchlist_changed
+
+    notify_watchlist_changed()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
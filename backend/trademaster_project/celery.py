@@ -19,6 +19,12 @@ beat_schedule = {
     },
 }
 
+if _env_bool('BOT_PREMARKET_WARMUP', True):
+    beat_schedule['warm-up-orb-bot-weekdays-0912'] = {
+        'task': 'api.tasks.warm_up_bot_task',
+        'schedule': crontab(hour=9, minute=12, day_of_week='mon-fri'),
+    }
+
 if _env_bool('BOT_AUTO_START_0920', False):
     beat_schedule['run-orb-bot-weekdays-0920'] = {
         'task': 'api.tasks.run_trade_task',
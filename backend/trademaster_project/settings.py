@@ -61,11 +61,27 @@ TEMPLATES = [
 WSGI_APPLICATION = 'trademaster_project.wsgi.application'
 ASGI_APPLICATION = 'trademaster_project.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
-}
+# Live chart feed: 'inline' opens the Angel WebSocket inside the web process on
+# demand; 'external' expects one `manage.py run_market_feed` process that
+# publishes over the Redis channel layer to any number of Daphne workers.
+LIVE_FEED_PROCESS = os.environ.get('LIVE_FEED_PROCESS', 'inline').strip().lower()
+CHANNELS_REDIS_URL = os.environ.get('CHANNELS_REDIS_URL', '')
+
+if CHANNELS_REDIS_URL or LIVE_FEED_PROCESS == 'external':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNELS_REDIS_URL or os.environ.get('REDIS_URL', 'redis://localhost:6379/0')],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
 
 # Database — set DATABASE_URL for PostgreSQL in production, else SQLite
 if os.environ.get('DATABASE_URL'):
@@ -106,6 +122,9 @@ STORAGES = {
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Local runtime data for the live market feed (tick recordings, caches)
+MARKET_DATA_DIR = Path(os.environ.get('MARKET_DATA_DIR', BASE_DIR / 'var' / 'market'))
+
 # CORS — comma-separated origins in env, plus dev defaults when DEBUG
 _cors_env = os.environ.get('CORS_ALLOWED_ORIGINS', '')
 CORS_ALLOWED_ORIGINS = [
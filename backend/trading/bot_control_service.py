@@ -35,6 +35,9 @@ def stop_running_bot():
             celery_app.control.revoke(running.task_id, terminate=True)
         except Exception:
             pass
+        from trading.bot_shards import revoke_shard_tasks
+
+        revoke_shard_tasks(running.id)
     else:
         from api.tasks import request_bot_stop
 
@@ -0,0 +1,300 @@
+"""
+Sharded bot execution: split a large watchlist across Celery workers.
+
+The session's run_trade_task becomes the coordinator. It owns the shared
+capital ledger, orphan-order cleanup and trailing stops. Each shard task runs
+the ORB loop for its own slice of symbols and reserves capital from the
+ledger before placing an entry.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import math
+import os
+import time
+from typing import List
+
+import pandas as pd
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from trading.broker import IST
+
+logger = logging.getLogger(__name__)
+
+# Coordinator passes run mid-bar so ledger refreshes never race shard entries.
+COORDINATOR_OFFSET_SECONDS = 150
+
+
+def shard_size() -> int:
+    """Max symbols per shard (BOT_SHARD_SIZE); 0 disables sharding."""
+    try:
+        return max(0, int(os.environ.get('BOT_SHARD_SIZE', '20')))
+    except ValueError:
+        return 20
+
+
+def partition_watchlist(symbols: List[str], size: int) -> List[List[str]]:
+    """Round-robin symbols into ceil(n / size) shards of near-equal length."""
+    if size <= 0 or len(symbols) <= size:
+        return [list(symbols)] if symbols else []
+    count = math.ceil(len(symbols) / size)
+    return [list(symbols[i::count]) for i in range(count)]
+
+
+def _worker_slots() -> int:
+    """Total Celery pool processes across connected workers (0 if unknown)."""
+    try:
+        from trademaster_project.celery import app as celery_app
+
+        inspect = celery_app.control.inspect(timeout=2)
+        stats = (inspect.stats() if inspect else None) or {}
+        return sum(
+            int((worker.get('pool') or {}).get('max-concurrency') or 1)
+            for worker in stats.values()
+        )
+    except Exception:
+        return 0
+
+
+def shared_feed_ready() -> bool:
+    """
+    Shards can read ticks from one run_market_feed over the Redis tick bus.
+    """
+    from django.conf import settings
+
+    from trading.tick_bus import tick_bus_mode
+
+    external = settings.LIVE_FEED_PROCESS == 'external'
+    return external and tick_bus_mode() == 'redis'
+
+
+def plan_shards(symbols: List[str]) -> List[List[str]]:
+    """
+    Shards for this watchlist, capped so every shard plus the coordinator
+    gets its own worker process (a solo worker would queue shards forever).
+    Sharding needs the external feed: an inline one would open an Angel
+    socket pool in every shard process.
+    """
+    size = shard_size()
+    shards = partition_watchlist(symbols, size)
+    if len(shards) <= 1:
+        return shards
+    if not shared_feed_ready():
+        logger.warning(
+            'Sharding needs LIVE_FEED_PROCESS=external and TICK_BUS=redis; '
+            'running unsharded.'
+        )
+        return [list(symbols)]
+    free_slots = _worker_slots() - 1
+    if free_slots < 2:
+        logger.warning(
+            'Not enough Celery worker processes to shard; running unsharded.'
+        )
+        return [list(symbols)]
+    if len(shards) > free_slots:
+        shards = partition_watchlist(
+            symbols, math.ceil(len(symbols) / free_slots)
+        )
+    return shards
+
+
+def open_capital_ledger(session_id: int, capital: float):
+    from api.models import BotCapitalLedger
+
+    ledger, _ = BotCapitalLedger.objects.update_or_create(
+        session_id=session_id,
+        defaults={'capital': float(capital), 'reserved': 0.0},
+    )
+    return ledger
+
+
+def refresh_capital_ledger(session_id: int, capital: float) -> None:
+    """Broker cash already reflects placed entries, so reservations reset."""
+    from api.models import BotCapitalLedger
+
+    BotCapitalLedger.objects.filter(session_id=session_id).update(
+        capital=float(capital),
+        reserved=0.0,
+    )
+
+
+def ledger_available_capital(session_id: int) -> float:
+    from api.models import BotCapitalLedger
+
+    row = (
+        BotCapitalLedger.objects.filter(session_id=session_id)
+        .values_list('capital', 'reserved')
+        .first()
+    )
+    if not row:
+        return 0.0
+    capital, reserved = row
+    return max(0.0, capital - reserved)
+
+
+def reserve_capital(session_id: int, amount: float) -> bool:
+    """Atomically reserve amount; False when the ledger cannot cover it."""
+    from api.models import BotCapitalLedger
+
+    if amount <= 0:
+        return True
+    updated = BotCapitalLedger.objects.filter(
+        session_id=session_id,
+        capital__gte=F('reserved') + amount,
+    ).update(reserved=F('reserved') + amount)
+    return updated == 1
+
+
+def release_capital(session_id: int, amount: float) -> None:
+    """
+    Give back a reservation whose order was not placed (never below zero).
+    """
+    from api.models import BotCapitalLedger
+
+    if amount <= 0:
+        return
+    BotCapitalLedger.objects.filter(session_id=session_id).update(
+        reserved=Greatest(F('reserved') - amount, Value(0.0)),
+    )
+
+
+def dispatch_shards(session_id: int, shards: List[List[str]]) -> List[str]:
+    from api.models import BotCapitalLedger
+    from api.tasks import run_trade_shard_task
+
+    task_ids = []
+    for index, tickers in enumerate(shards):
+        result = run_trade_shard_task.delay(
+            session_id=session_id,
+            tickers=tickers,
+            shard_index=index,
+            shard_count=len(shards),
+        )
+        task_ids.append(result.id or '')
+    BotCapitalLedger.objects.filter(session_id=session_id).update(
+        shard_task_ids=task_ids
+    )
+    return task_ids
+
+
+def revoke_shard_tasks(session_id: int) -> None:
+    from api.models import BotCapitalLedger
+
+    task_ids = (
+        BotCapitalLedger.objects.filter(session_id=session_id)
+        .values_list('shard_task_ids', flat=True)
+        .first()
+    ) or []
+    task_ids = [t for t in task_ids if t]
+    if not task_ids:
+        return
+    try:
+        from trademaster_project.celery import app as celery_app
+
+        celery_app.control.revoke(task_ids, terminate=True)
+    except Exception:
+        pass
+
+
+def _shards_finished(task_ids: List[str]) -> bool:
+    from celery.result import AsyncResult
+
+    try:
+        return all(AsyncResult(t).ready() for t in task_ids if t)
+    except Exception:
+        return False
+
+
+def run_shard_coordinator(
+    bot, session_id: int, shards: List[List[str]]
+) -> None:
+    """
+    Dispatch shard tasks and run shared capital + risk housekeeping until
+    close.
+    """
+    from trading.bot_heartbeat import touch_bot_heartbeat
+    from trading.tick_bus import open_tick_bus
+    from trading.trading_bot import _should_stop_bot
+    from trading.trailing_engine import start_tick_trailing, stop_tick_trailing
+    from trading.trailing_stop import update_trailing_stops
+
+    bot._load_instrument_list()
+    bot._initialize_smart_api()
+    # With an external feed the trailing engine listens on the Redis tick bus.
+    tick_bus = open_tick_bus()
+    engine = None
+    try:
+        symbols = [t for shard in shards for t in shard]
+        engine = start_tick_trailing(bot, symbols, tick_bus)
+        open_capital_ledger(session_id, bot.get_trade_capital())
+        task_ids = dispatch_shards(session_id, shards)
+        logger.info(
+            'Coordinator dispatched %s shards (%s symbols)',
+            len(shards),
+            ', '.join(str(len(s)) for s in shards),
+        )
+
+        now = dt.datetime.now(IST)
+        market_end_time = dt.datetime(
+            now.year,
+            now.month,
+            now.day,
+            hour=15,
+            minute=30,
+            tzinfo=IST,
+        )
+
+        while dt.datetime.now(IST) < market_end_time:
+            touch_bot_heartbeat(session_id)
+            if _should_stop_bot(session_id):
+                logger.info('Bot stop requested — revoking shards.')
+                revoke_shard_tasks(session_id)
+                break
+            if _shards_finished(task_ids):
+                logger.info('All shards finished.')
+                break
+
+            now = dt.datetime.now(IST)
+            seconds_into_bar = (
+                (now.minute % 5) * 60
+                + now.second
+                + now.microsecond / 1_000_000
+            )
+            wait = (COORDINATOR_OFFSET_SECONDS - seconds_into_bar) % 300
+            time.sleep(wait)
+
+            try:
+                capital = bot.get_trade_capital()
+                refresh_capital_ledger(session_id, capital)
+                logger.info('Coordinator capital refresh: %s Rs', capital)
+            except Exception as exc:
+                logger.warning('Coordinator capital refresh failed: %s', exc)
+
+            try:
+                positions_data = bot.get_positions()
+                positions = (
+                    pd.DataFrame(positions_data)
+                    if positions_data
+                    else pd.DataFrame()
+                )
+                if engine:
+                    engine.set_open_symbols(
+                        bot._open_position_bases(positions)
+                    )
+                bot.cancel_orphan_exit_orders(positions)
+                update_trailing_stops(
+                    bot,
+                    positions,
+                    bot.instrument_list,
+                    skip_symbols=engine.covered_symbols() if engine else None,
+                )
+            except Exception as exc:
+                logger.warning('Coordinator housekeeping failed: %s', exc)
+            # Never run twice inside the same bar.
+            time.sleep(1)
+    finally:
+        stop_tick_trailing(engine)
+        if tick_bus is not None:
+            tick_bus.stop()
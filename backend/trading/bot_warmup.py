@@ -0,0 +1,226 @@
+"""
+Pre-market warm-up: log in, load the instrument registry, resolve tokens and
+prefetch candle history + capital before 09:20, so the bot's first pass is
+not waiting on slow broker calls.
+
+The registry lands in the day's instrument cache; candles and capital are
+persisted per trading day under MARKET_DATA_DIR so the bot process (and
+every shard) can pick them up. The login tokens are not: they go to Redis
+(CELERY_BROKER_URL) and expire at today's session close.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from trading.broker import IST, AngelOneClient
+from trading.utils import token_lookup
+
+logger = logging.getLogger(__name__)
+
+WARMUP_HISTORY_DAYS = 4
+SESSION_KEY = 'trademaster.warmup-session:'
+SESSION_CLOSE = dt.time(15, 30)
+
+
+def _data_dir(name: str) -> Path:
+    from django.conf import settings
+
+    return Path(settings.MARKET_DATA_DIR) / name
+
+
+def _atomic_write(path: Path, data: bytes, private: bool = False) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'wb') as fh:
+        fh.write(data)
+    if private:
+        os.chmod(tmp, 0o600)
+    os.replace(tmp, path)
+
+
+def read_instrument_cache(day: Optional[dt.date] = None) -> Optional[list]:
+    """Today's scrip master from the local cache, or None."""
+    day = day or dt.datetime.now(IST).date()
+    path = _data_dir('instruments') / f'{day.isoformat()}.json'
+    try:
+        with open(path, 'rb') as fh:
+            return json.loads(fh.read())
+    except (OSError, ValueError):
+        return None
+
+
+def write_instrument_cache(raw: bytes, day: Optional[dt.date] = None) -> None:
+    """Store the downloaded scrip master for today and drop older copies."""
+    day = day or dt.datetime.now(IST).date()
+    folder = _data_dir('instruments')
+    try:
+        _atomic_write(folder / f'{day.isoformat()}.json', raw)
+        for old in folder.glob('*.json'):
+            if old.stem < day.isoformat():
+                old.unlink(missing_ok=True)
+    except OSError as exc:
+        logger.warning('Instrument cache write failed: %s', exc)
+
+
+def warmup_path(day: dt.date) -> Path:
+    return _data_dir('warmup') / f'{day.isoformat()}.json'
+
+
+def _session_client():
+    import redis
+    from django.conf import settings
+
+    return redis.Redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def store_session(creds: Dict[str, Optional[str]], day: dt.date) -> bool:
+    """
+    Keep the warm-up login in Redis until the session closes; False if it was
+    not stored.
+    """
+    close = IST.localize(dt.datetime.combine(day, SESSION_CLOSE))
+    ttl = int((close - dt.datetime.now(IST)).total_seconds())
+    if ttl <= 0:
+        return False
+    try:
+        _session_client().set(
+            SESSION_KEY + day.isoformat(), json.dumps(creds), ex=ttl
+        )
+    except Exception as exc:
+        logger.warning(
+            'Warm-up session not stored, the bot will log in itself: %s', exc
+        )
+        return False
+    return True
+
+
+def load_session(day: Optional[dt.date] = None) -> Optional[dict]:
+    """Today's warm-up login from Redis, or None."""
+    day = day or dt.datetime.now(IST).date()
+    try:
+        raw = _session_client().get(SESSION_KEY + day.isoformat())
+        return json.loads(raw) if raw else None
+    except Exception as exc:
+        logger.warning('Warm-up session read failed: %s', exc)
+        return None
+
+
+def load_warmup(day: Optional[dt.date] = None) -> Optional[dict]:
+    """Today's warm-up results, or None if the warm-up did not run."""
+    day = day or dt.datetime.now(IST).date()
+    try:
+        with open(warmup_path(day), 'rb') as fh:
+            payload = json.loads(fh.read())
+    except (OSError, ValueError):
+        return None
+    if payload.get('date') != day.isoformat():
+        return None
+    payload['session'] = load_session(day)
+    return payload
+
+
+def _fetch_history_rows(
+    client: AngelOneClient,
+    token: str,
+    today: dt.date,
+    exchange: str = 'NSE',
+    retries: int = 3,
+    delay: float = 2.0,
+) -> List[list]:
+    params = {
+        'exchange': exchange,
+        'symboltoken': token,
+        'interval': 'FIVE_MINUTE',
+        'fromdate': (today - dt.timedelta(WARMUP_HISTORY_DAYS)).strftime(
+            '%Y-%m-%d %H:%M'
+        ),
+        'todate': (today - dt.timedelta(1)).strftime('%Y-%m-%d') + ' 15:30',
+    }
+    for attempt in range(1, retries + 1):
+        try:
+            time.sleep(0.4)
+            hist_data = client.smart_api.getCandleData(params)
+            if hist_data and hist_data.get('status') and hist_data.get('data'):
+                return hist_data['data']
+        except Exception as e:
+            logger.warning(
+                'Warm-up history fetch failed for %s (attempt %s/%s): %s',
+                token,
+                attempt,
+                retries,
+                e,
+            )
+        time.sleep(delay * attempt)
+    return []
+
+
+def run_premarket_warmup(tickers: List[str]) -> dict:
+    """
+    Log in, resolve tokens, prefetch candles + capital and persist them for
+    today.
+    """
+    started = time.time()
+    today = dt.datetime.now(IST).date()
+
+    client = AngelOneClient()
+    client._load_instrument_list()
+    client._initialize_smart_api()
+
+    tokens: Dict[str, str] = {}
+    for ticker in tickers:
+        token = token_lookup(ticker, client.instrument_list)
+        if token is not None:
+            tokens[ticker] = str(token)
+    unresolved = [t for t in tickers if t not in tokens]
+    if unresolved:
+        logger.warning(
+            'Warm-up: no NSE EQ token for %s', ', '.join(unresolved)
+        )
+
+    capital = client.get_trade_capital()
+    candles = {
+        ticker: _fetch_history_rows(client, token, today)
+        for ticker, token in tokens.items()
+    }
+
+    smart_api = client.smart_api
+    payload = {
+        'date': today.isoformat(),
+        'created_at': dt.datetime.now(IST).isoformat(),
+        'capital': capital,
+        'candles': candles,
+    }
+    _atomic_write(
+        warmup_path(today), json.dumps(payload).encode('utf-8'), private=True
+    )
+    for old in warmup_path(today).parent.glob('*.json'):
+        if old.stem < today.isoformat():
+            # Older files may still hold login tokens from before they moved to
+            # Redis.
+            old.unlink(missing_ok=True)
+    session_stored = store_session(
+        {
+            'api_key': client.api_key,
+            'access_token': smart_api.access_token,
+            'refresh_token': getattr(smart_api, 'refresh_token', None),
+            'feed_token': smart_api.feed_token,
+            'user_id': getattr(smart_api, 'userId', None) or client.client_id,
+        },
+        today,
+    )
+
+    summary = {
+        'symbols': len(tokens),
+        'unresolved': unresolved,
+        'capital': capital,
+        'session_stored': session_stored,
+        'seconds': round(time.time() - started, 1),
+    }
+    logger.info('Pre-market warm-up complete: %s', summary)
+    return summary
@@ -33,6 +33,10 @@ def orb_levels_from_intraday_df(df: Optional[pd.DataFrame]) -> Optional[Tuple[fl
 
 
 class AngelOneClient:
+    # Bot processes attach a trading.tick_bus.TickBus; get_ltp reads it before
+    # REST.
+    _tick_bus = None
+
     def __init__(self) -> None:
         self.api_key: str = self._env('API_KEY')
         self.client_id: str = self._env('CLIENT_ID')
@@ -72,11 +76,54 @@ class AngelOneClient:
         if not self.smart_api.access_token:
             raise RuntimeError('Angel One login did not return an access token.')
 
+    def adopt_session(self, creds: Optional[Dict[str, str]]) -> bool:
+        """
+        Reuse a persisted login (pre-market warm-up) instead of a fresh TOTP
+        login.
+        """
+        if self.smart_api is not None:
+            return True
+        if (
+            not creds
+            or not creds.get('access_token')
+            or creds.get('api_key') != self.api_key
+        ):
+            return False
+        smart_api = SmartConnect(
+            self.api_key,
+            access_token=creds['access_token'],
+            refresh_token=creds.get('refresh_token'),
+            feed_token=creds.get('feed_token'),
+            userId=creds.get('user_id'),
+        )
+        try:
+            profile = smart_api.getProfile(creds.get('refresh_token'))
+        except Exception as e:
+            print(f'Warm-up session rejected: {e}')
+            return False
+        if not isinstance(profile, dict) or profile.get('status') is not True:
+            return False
+        self.smart_api = smart_api
+        return True
+
     def _load_instrument_list(self) -> None:
         if self.instrument_list is None:
+            from trading.bot_warmup import (
+                read_instrument_cache,
+                write_instrument_cache,
+            )
+
+            cached = read_instrument_cache()
+            if cached:
+                self.instrument_list = cached
+                return
             instrument_url = 'https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json'
             response = urllib.request.urlopen(instrument_url)
-            self.instrument_list: List[Dict[str, Union[str, int]]] = json.loads(response.read())
+            raw = response.read()
+            self.instrument_list: List[
+                Dict[str, Union[str, int]]
+            ] = json.loads(raw)
+            write_instrument_cache(raw)
 
     def get_ltp(
         self,
@@ -84,6 +131,10 @@ class AngelOneClient:
         ticker: str,
         exchange: str = 'NSE',
     ) -> Optional[float]:
+        if self._tick_bus is not None:
+            ltp = self._tick_bus.latest(ticker)
+            if ltp is not None:
+                return ltp
         params: Dict[str, Union[str, int]] = {
             'tradingsymbol': '{}-EQ'.format(ticker),
             'symboltoken': token_lookup(ticker, instrument_list),
@@ -368,6 +419,7 @@ class AngelOneClient:
         delay: float = 10.0,
         rate_limit_pause: bool = True,
         days_back: int = 0,
+        since: Optional[dt.datetime] = None,
     ) -> Optional[pd.DataFrame]:
         token = token_lookup(ticker, instrument_list)
         if not token:
@@ -377,6 +429,8 @@ class AngelOneClient:
         market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
         if days_back > 0:
             market_open = market_open - dt.timedelta(days=days_back)
+        if since is not None:
+            market_open = since
         params = {
             'exchange': exchange,
             'symboltoken': token,
@@ -414,7 +468,12 @@ class AngelOneClient:
         exchange: str = 'NSE',
         retries: int = 3,
         delay: float = 10.0,
+        since: Optional[dt.datetime] = None,
     ) -> Optional[pd.DataFrame]:
+        """
+        Today's candles from 09:15, or from since (IST) when only recent bars
+        are needed.
+        """
         return self._fetch_intraday_candle_df(
             ticker,
             instrument_list,
@@ -423,6 +482,7 @@ class AngelOneClient:
             retries=retries,
             delay=delay,
             rate_limit_pause=True,
+            since=since,
         )
 
     def get_chart_data(
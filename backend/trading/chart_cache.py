@@ -0,0 +1,295 @@
+"""
+Per-symbol cache for the chart REST endpoints, shared by every web worker.
+
+Entries are keyed by kind (bars / orb), IST day and symbol, so watchlists
+that overlap reuse the same blocks; callers slice a lookback out of the
+widest block stored. Total size is capped at CHART_CACHE_MAX_MB; the least
+recently read entries go first. Backends:
+
+    redis  one key per entry plus an LRU sorted set and a size hash with a
+           running total field
+    file   one JSON file per entry under MARKET_DATA_DIR/chart_cache/
+           (mtime = last read); the total is tracked per process and
+           rescanned once a minute
+
+Neither backend scans its entries unless the total is over the cap.
+
+Cache failures are logged and treated as misses; the views then hit Angel.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = 'trademaster.chart:'
+REDIS_LRU_KEY = 'trademaster.chart-lru'
+REDIS_SIZE_KEY = 'trademaster.chart-size'
+REDIS_TOTAL_FIELD = '__total__'
+# LRU entries examined per eviction round trip.
+EVICT_BATCH = 32
+# The file cache re-reads the directory this often to see other processes'
+# writes.
+FILE_RESCAN_SECONDS = 60.0
+# Entries are re-fetched long before this; it only bounds orphans in Redis.
+MAX_ENTRY_AGE_SECONDS = 86400
+
+_cache: Optional['ChartCache'] = None
+
+
+def chart_cache_mode() -> str:
+    """
+    CHART_CACHE: auto (redis when the channel layer is on Redis, else file),
+    redis, file or off.
+    """
+    mode = os.environ.get('CHART_CACHE', 'auto').strip().lower()
+    if mode == 'auto':
+        from django.conf import settings
+
+        external = (
+            settings.CHANNELS_REDIS_URL
+            or settings.LIVE_FEED_PROCESS == 'external'
+        )
+        return 'redis' if external else 'file'
+    return mode if mode in ('redis', 'file', 'off') else 'file'
+
+
+def chart_cache_max_bytes() -> int:
+    """Size cap over all entries (CHART_CACHE_MAX_MB)."""
+    try:
+        return int(
+            max(1.0, float(os.environ.get('CHART_CACHE_MAX_MB', '64')))
+            * 1024
+            * 1024
+        )
+    except ValueError:
+        return 64 * 1024 * 1024
+
+
+def entry_key(kind: str, day: str, symbol: str) -> str:
+    return f'{kind}:{day}:{symbol.upper()}'
+
+
+class ChartCache:
+    """No-op cache (CHART_CACHE=off); backends override get_many / set_many."""
+
+    mode = 'off'
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        keys = list(keys)
+        self.misses += len(keys)
+        return {}
+
+    def set_many(self, entries: Dict[str, dict]) -> None:
+        pass
+
+    def _count(self, wanted: int, found: int) -> None:
+        self.hits += found
+        self.misses += wanted - found
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class RedisChartCache(ChartCache):
+    mode = 'redis'
+
+    def __init__(self, url: str, max_bytes: int) -> None:
+        super().__init__(max_bytes)
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        found: Dict[str, dict] = {}
+        try:
+            values = self._client.mget([REDIS_PREFIX + k for k in keys])
+            for key, raw in zip(keys, values):
+                if raw is not None:
+                    found[key] = json.loads(raw)
+            if found:
+                now = time.time()
+                self._client.zadd(
+                    REDIS_LRU_KEY, {REDIS_PREFIX + k: now for k in found}
+                )
+        except Exception as exc:
+            logger.warning('Chart cache read failed: %s', exc)
+        self._count(len(keys), len(found))
+        return found
+
+    def set_many(self, entries: Dict[str, dict]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        try:
+            data = {
+                REDIS_PREFIX + key: json.dumps(value)
+                for key, value in entries.items()
+            }
+            replaced = self._client.hmget(REDIS_SIZE_KEY, list(data))
+            delta = sum(len(raw) for raw in data.values()) - sum(
+                int(n) for n in replaced if n
+            )
+            pipe = self._client.pipeline()
+            for key, raw in data.items():
+                pipe.set(key, raw, ex=MAX_ENTRY_AGE_SECONDS)
+                pipe.zadd(REDIS_LRU_KEY, {key: now})
+                pipe.hset(REDIS_SIZE_KEY, key, len(raw))
+            pipe.hincrby(REDIS_SIZE_KEY, REDIS_TOTAL_FIELD, delta)
+            total = pipe.execute()[-1]
+            if total > self.max_bytes:
+                self._evict(total)
+        except Exception as exc:
+            logger.warning('Chart cache write failed: %s', exc)
+
+    def _evict(self, total: int) -> None:
+        """
+        Drop the least recently read entries, a batch at a time, until total
+        fits.
+        """
+        while total > self.max_bytes:
+            keys = self._client.zrange(REDIS_LRU_KEY, 0, EVICT_BATCH - 1)
+            if not keys:
+                # Nothing left to evict; the total only counted vanished
+                # entries.
+                self._client.delete(REDIS_SIZE_KEY)
+                return
+            sizes = self._client.hmget(REDIS_SIZE_KEY, keys)
+            freed = 0
+            pipe = self._client.pipeline()
+            for key, size in zip(keys, sizes):
+                if total - freed <= self.max_bytes:
+                    break
+                freed += int(size or 0)
+                pipe.delete(key)
+                pipe.zrem(REDIS_LRU_KEY, key)
+                pipe.hdel(REDIS_SIZE_KEY, key)
+                self.evictions += 1
+            pipe.hincrby(REDIS_SIZE_KEY, REDIS_TOTAL_FIELD, -freed)
+            total = pipe.execute()[-1]
+
+
+class FileChartCache(ChartCache):
+    mode = 'file'
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        super().__init__(max_bytes)
+        self._dir = directory
+        # Bytes on disk as of the last scan plus this process's writes since.
+        self._total: Optional[int] = None
+        self._scanned_at = 0.0
+
+    def _path(self, key: str) -> Path:
+        return self._dir / (
+            hashlib.sha1(key.encode('utf-8')).hexdigest()[:24] + '.json'
+        )
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        keys = list(keys)
+        found: Dict[str, dict] = {}
+        for key in keys:
+            path = self._path(key)
+            try:
+                value = json.loads(path.read_text())
+                os.utime(path)
+            except (OSError, ValueError):
+                continue
+            if value.get('key') == key:
+                found[key] = value
+        self._count(len(keys), len(found))
+        return found
+
+    def set_many(self, entries: Dict[str, dict]) -> None:
+        if not entries:
+            return
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            written = 0
+            for key, value in entries.items():
+                path = self._path(key)
+                try:
+                    written -= path.stat().st_size
+                except OSError:
+                    pass
+                tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+                tmp.write_text(json.dumps({**value, 'key': key}))
+                written += tmp.stat().st_size
+                os.replace(tmp, path)
+            if self._total is not None:
+                self._total += written
+            if (
+                self._total is None
+                or self._total > self.max_bytes
+                or time.monotonic() - self._scanned_at >= FILE_RESCAN_SECONDS
+            ):
+                self._evict()
+        except OSError as exc:
+            logger.warning('Chart cache write failed: %s', exc)
+
+    def _evict(self) -> None:
+        """
+        Rescan the directory, drop the least recently read files over the cap
+        and reset the total.
+        """
+        self._scanned_at = time.monotonic()
+        files = []
+        for path in self._dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total = total
+
+
+def get_chart_cache() -> ChartCache:
+    """Process-wide cache for CHART_CACHE, created on first use."""
+    global _cache
+    if _cache is None:
+        from django.conf import settings
+
+        mode = chart_cache_mode()
+        max_bytes = chart_cache_max_bytes()
+        if mode == 'redis':
+            _cache = RedisChartCache(
+                settings.CHANNELS_REDIS_URL or settings.CELERY_BROKER_URL,
+                max_bytes,
+            )
+        elif mode == 'file':
+            _cache = FileChartCache(
+                Path(settings.MARKET_DATA_DIR) / 'chart_cache', max_bytes
+            )
+        else:
+            _cache = ChartCache(max_bytes)
+    return _cache
@@ -89,6 +89,9 @@ def replace_watchlist(symbols: List[str]) -> Tuple[List[str], List[dict]]:
         WatchlistTicker.objects.bulk_create(
             [WatchlistTicker(symbol=s, is_active=True) for s in accepted]
         )
+    from trading.market_stream import notify_watchlist_changed
+
+    notify_watchlist_changed(sorted(accepted))
     return accepted, skipped
 
 
@@ -0,0 +1,448 @@
+"""
+Live feed health for MarketStreamManager.
+
+Counters, a per-second tick rate, per-symbol staleness and latency histograms
+for each hop of the tick path:
+
+    ingest                 exchange timestamp -> tick received
+    aggregate              feed-thread time per tick (bars, listeners,
+                           queueing)
+    broadcast              frame queued -> handed to the channel layer
+    exchange_to_broadcast  oldest exchange timestamp in a frame -> published
+
+Each histogram is kept twice: cumulative since the feed started (reported as
+latency_ms) and per minute for the last FEED_HEALTH_WINDOW_MINUTES (reported
+as recent_latency_ms). The degraded check only looks at the recent window, so
+a lag spike in the morning does not keep the feed flagged all day.
+
+Updates are plain integer adds on the feed / publisher threads (no locks; a
+lost increment under contention is acceptable for monitoring). Each feed
+process writes its snapshot under MARKET_DATA_DIR/feed/ so the API can report
+on a feed running in another process.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Upper bounds (seconds) of the latency buckets; one more bucket is open-ended.
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Ignore exchange timestamps further off than this (bad clock / replayed data).
+MAX_EXCHANGE_LAG_SECONDS = 3600.0
+# Per-minute histograms kept for the sliding health window.
+MAX_WINDOW_MINUTES = 30
+
+
+def stale_after_seconds() -> float:
+    """
+    A wanted symbol without a tick for this long is stale (FEED_STALE_SECONDS).
+    """
+    try:
+        return max(1.0, float(os.environ.get('FEED_STALE_SECONDS', '60')))
+    except ValueError:
+        return 60.0
+
+
+def lag_alert_seconds() -> float:
+    """
+    p90 exchange -> broadcast lag that marks the feed degraded
+    (FEED_LAG_ALERT_SECONDS).
+    """
+    try:
+        return max(0.1, float(os.environ.get('FEED_LAG_ALERT_SECONDS', '2')))
+    except ValueError:
+        return 2.0
+
+
+def health_window_minutes() -> int:
+    """
+    Minutes of latency the health check looks at (FEED_HEALTH_WINDOW_MINUTES).
+    """
+    try:
+        return min(
+            MAX_WINDOW_MINUTES,
+            max(1, int(os.environ.get('FEED_HEALTH_WINDOW_MINUTES', '5'))),
+        )
+    except ValueError:
+        return 5
+
+
+def metrics_interval_seconds() -> float:
+    """
+    How often the feed publishes its health (FEED_METRICS_INTERVAL_SECONDS).
+    """
+    try:
+        return max(
+            1.0, float(os.environ.get('FEED_METRICS_INTERVAL_SECONDS', '10'))
+        )
+    except ValueError:
+        return 10.0
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram; quantiles are reported as bucket upper bounds.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return (
+                    min(LATENCY_BUCKETS[i], self.max)
+                    if i < len(LATENCY_BUCKETS)
+                    else self.max
+                )
+        return self.max
+
+    def snapshot(self) -> dict:
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000.0, 3)
+
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.total / self.count) if self.count else 0.0,
+            'p50_ms': ms(self.quantile(0.5)),
+            'p90_ms': ms(self.quantile(0.9)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'max_ms': ms(self.max),
+            'buckets': {
+                (f'{ms(bound)}' if i < len(LATENCY_BUCKETS) else '+Inf'): n
+                for i, (bound, n) in enumerate(
+                    zip(LATENCY_BUCKETS + (0.0,), self.counts)
+                )
+                if n
+            },
+        }
+
+
+class WindowedHistogram:
+    """
+    A cumulative LatencyHistogram plus a ring of per-minute ones for the
+    sliding window.
+    """
+
+    __slots__ = ('lifetime', '_minutes', '_recent')
+
+    def __init__(self, span: int = MAX_WINDOW_MINUTES) -> None:
+        self.lifetime = LatencyHistogram()
+        self._minutes = [-1] * span
+        self._recent = [LatencyHistogram() for _ in range(span)]
+
+    def observe(self, seconds: float, now: float) -> None:
+        self.lifetime.observe(seconds)
+        minute = int(now // 60)
+        i = minute % len(self._minutes)
+        if self._minutes[i] != minute:
+            self._minutes[i] = minute
+            self._recent[i] = LatencyHistogram()
+        self._recent[i].observe(seconds)
+
+    def window(self, now: float, minutes: int) -> LatencyHistogram:
+        """
+        Observations from the current minute and the minutes - 1 before it.
+        """
+        current = int(now // 60)
+        merged = LatencyHistogram()
+        for minute, histogram in zip(self._minutes, self._recent):
+            if current - minutes < minute <= current:
+                merged.merge(histogram)
+        return merged
+
+
+class _RateWindow:
+    """
+    Events per second over the last few whole seconds (ring of per-second
+    counts).
+    """
+
+    __slots__ = ('_seconds', '_counts')
+
+    def __init__(self, span: int = 60) -> None:
+        self._seconds = [0] * span
+        self._counts = [0] * span
+
+    def add(self, now: float) -> None:
+        second = int(now)
+        i = second % len(self._seconds)
+        if self._seconds[i] != second:
+            self._seconds[i] = second
+            self._counts[i] = 0
+        self._counts[i] += 1
+
+    def rate(self, now: float, window: int = 10) -> float:
+        current = int(now)
+        total = sum(
+            n
+            for second, n in zip(self._seconds, self._counts)
+            if current - window <= second < current
+        )
+        return total / window
+
+
+class FeedMetrics:
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.counters: Dict[str, int] = {
+            'ticks': 0,
+            'unknown_tokens': 0,
+            'bars_closed': 0,
+            'frames_published': 0,
+            'publish_errors': 0,
+            'disconnects': 0,
+            'reconnects': 0,
+            'failovers': 0,
+        }
+        self.ingest = WindowedHistogram()
+        self.aggregate = WindowedHistogram()
+        self.broadcast = WindowedHistogram()
+        self.exchange_to_broadcast = WindowedHistogram()
+        self._tick_rate = _RateWindow()
+        # Per live-bar slot: monotonic time of the last tick and its exchange
+        # time (ms).
+        self.last_tick: List[float] = []
+        self.last_exchange_ms: List[int] = []
+
+    def add_slot(self) -> None:
+        self.last_tick.append(0.0)
+        self.last_exchange_ms.append(0)
+
+    def on_tick(
+        self,
+        slot: int,
+        mono: float,
+        wall: float,
+        exchange_ms: int,
+        aggregate: float,
+    ) -> None:
+        self.counters['ticks'] += 1
+        self._tick_rate.add(mono)
+        self.last_tick[slot] = mono
+        if exchange_ms:
+            self.last_exchange_ms[slot] = exchange_ms
+            lag = wall - exchange_ms / 1000.0
+            if lag < MAX_EXCHANGE_LAG_SECONDS:
+                self.ingest.observe(max(0.0, lag), mono)
+        self.aggregate.observe(aggregate, mono)
+
+    def on_published(
+        self, queued_for: float, exchange_ms: int, ok: bool
+    ) -> None:
+        self.counters['frames_published' if ok else 'publish_errors'] += 1
+        mono = time.monotonic()
+        self.broadcast.observe(queued_for, mono)
+        if exchange_ms:
+            lag = time.time() - exchange_ms / 1000.0
+            if lag < MAX_EXCHANGE_LAG_SECONDS:
+                self.exchange_to_broadcast.observe(max(0.0, lag), mono)
+
+    def snapshot(
+        self,
+        symbols: List[str],
+        wanted: Iterable[str],
+        connections: List[dict],
+        queue_depth: int,
+        queue_size: int,
+        dropped: int,
+    ) -> dict:
+        """
+        symbols[slot] names each slot; only wanted symbols count toward
+        staleness.
+        """
+        now = time.monotonic()
+        uptime = now - self.started_at
+        threshold = stale_after_seconds()
+        wanted = {s.upper() for s in wanted}
+        ages = {}
+        for slot, symbol in enumerate(symbols):
+            if symbol.upper() not in wanted or slot >= len(self.last_tick):
+                continue
+            last = self.last_tick[slot]
+            ages[symbol] = round(now - last, 1) if last else None
+        stale = sorted(
+            s
+            for s, age in ages.items()
+            if (age is None and uptime >= threshold)
+            or (age is not None and age >= threshold)
+        )
+        hops = {
+            'ingest': self.ingest,
+            'aggregate': self.aggregate,
+            'broadcast': self.broadcast,
+            'exchange_to_broadcast': self.exchange_to_broadcast,
+        }
+        window = health_window_minutes()
+        recent = {name: hop.window(now, window) for name, hop in hops.items()}
+        latency = {name: hop.lifetime.snapshot() for name, hop in hops.items()}
+
+        reasons = []
+        if (
+            wanted
+            and connections
+            and not any(c['active'] for c in connections)
+        ):
+            reasons.append('feed_down')
+        elif any(c['tokens'] and not c['active'] for c in connections):
+            reasons.append('connection_down')
+        if stale:
+            reasons.append('stale_symbols')
+        if (
+            recent['exchange_to_broadcast'].quantile(0.9)
+            >= lag_alert_seconds()
+        ):
+            reasons.append('exchange_lag')
+        if queue_size and queue_depth >= 0.8 * queue_size:
+            reasons.append('publish_backlog')
+
+        known_ages = [age for age in ages.values() if age is not None]
+        return {
+            'at': round(time.time(), 3),
+            'pid': os.getpid(),
+            'process': process_label(),
+            'uptime_s': round(uptime, 1),
+            'degraded': bool(reasons),
+            'reasons': reasons,
+            'ticks_per_second': round(self._tick_rate.rate(now), 1),
+            'counters': dict(self.counters),
+            'latency_ms': latency,
+            'recent_latency_ms': {
+                'window_minutes': window,
+                **{
+                    name: histogram.snapshot()
+                    for name, histogram in recent.items()
+                },
+            },
+            'staleness': {
+                'threshold_s': threshold,
+                'max_age_s': max(known_ages) if known_ages else None,
+                'stale': stale,
+                'ages_s': ages,
+            },
+            'connections': connections,
+            'publish_queue': {
+                'depth': queue_depth,
+                'size': queue_size,
+                'dropped': dropped,
+            },
+        }
+
+
+def health_summary(snapshot: dict) -> dict:
+    """
+    The compact part of a snapshot that rides on status frames and bot logs.
+    """
+    return {
+        'degraded': snapshot['degraded'],
+        'reasons': snapshot['reasons'],
+        'ticks_per_second': snapshot['ticks_per_second'],
+        'stale': len(snapshot['staleness']['stale']),
+        'lag_p90_ms': snapshot['recent_latency_ms']['exchange_to_broadcast'][
+            'p90_ms'
+        ],
+        'reconnects': snapshot['counters']['reconnects'],
+    }
+
+
+def process_label() -> str:
+    argv = [os.path.basename(a) for a in sys.argv[:2]]
+    return ' '.join(argv) or 'python'
+
+
+def _snapshot_dir() -> Path:
+    from django.conf import settings
+
+    return Path(settings.MARKET_DATA_DIR) / 'feed'
+
+
+def write_snapshot(snapshot: dict) -> None:
+    path = _snapshot_dir() / f'metrics-{os.getpid()}.json'
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def remove_snapshot() -> None:
+    try:
+        (_snapshot_dir() / f'metrics-{os.getpid()}.json').unlink()
+    except OSError:
+        pass
+
+
+def read_snapshots(max_age_seconds: Optional[float] = None) -> List[dict]:
+    """
+    Snapshots written by feed processes within max_age_seconds (default 3
+    intervals).
+    """
+    max_age = (
+        max_age_seconds
+        if max_age_seconds is not None
+        else 3 * metrics_interval_seconds()
+    )
+    now = time.time()
+    found = []
+    for path in sorted(_snapshot_dir().glob('metrics-*.json')):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        age = now - float(data.get('at') or 0)
+        if age <= max_age:
+            data['age_s'] = round(age, 1)
+            found.append(data)
+    return found
@@ -0,0 +1,162 @@
+"""
+Checkpoints of the forming live bars, so a restarted feed process resumes the
+current bar instead of opening a fresh partial one on its next tick.
+
+Each feed process writes its bars every LIVE_BAR_CHECKPOINT_SECONDS to
+MARKET_DATA_DIR/live_bars/YYYY-MM-DD-<pid>.json (atomic replace). On startup a
+slot takes the freshest checkpointed bar of each timeframe whose bucket is
+still current; anything older is left to the REST candles. Files from earlier
+days are removed when the checkpoints are loaded.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from trading.broker import IST
+
+# Bars are saved with these fields; partial is restored as True regardless.
+BAR_FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+# Angel candle interval for each bar length (s) the REST check can use.
+REST_INTERVALS = {
+    60: 'ONE_MINUTE',
+    180: 'THREE_MINUTE',
+    300: 'FIVE_MINUTE',
+    600: 'TEN_MINUTE',
+    900: 'FIFTEEN_MINUTE',
+    1800: 'THIRTY_MINUTE',
+    3600: 'ONE_HOUR',
+}
+
+
+def checkpoint_seconds() -> float:
+    """
+    How often live bars are checkpointed (LIVE_BAR_CHECKPOINT_SECONDS, 0 =
+    off).
+    """
+    try:
+        return max(
+            0.0, float(os.environ.get('LIVE_BAR_CHECKPOINT_SECONDS', '5'))
+        )
+    except ValueError:
+        return 5.0
+
+
+def rest_check_enabled() -> bool:
+    """
+    Reconcile restored / partial primary bars with REST (LIVE_BAR_REST_CHECK).
+    """
+    return os.environ.get('LIVE_BAR_REST_CHECK', 'True').lower() in (
+        '1',
+        'true',
+        'yes',
+    )
+
+
+def _store_dir() -> Path:
+    from django.conf import settings
+
+    return Path(settings.MARKET_DATA_DIR) / 'live_bars'
+
+
+def _day(wall: float) -> str:
+    return dt.datetime.fromtimestamp(wall, IST).date().isoformat()
+
+
+def write_checkpoint(
+    bars: Dict[str, dict], day_volumes: Dict[str, int], wall: float
+) -> None:
+    """
+    bars maps token -> {'symbol', 'frames': {interval: bar}}; day_volumes is
+    the volume baseline.
+    """
+    path = _store_dir() / f'{_day(wall)}-{os.getpid()}.json'
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.json.tmp')
+        tmp.write_text(
+            json.dumps({'at': wall, 'bars': bars, 'day_volume': day_volumes})
+        )
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def load_checkpoints(
+    wall: Optional[float] = None,
+) -> Tuple[Dict[Tuple[str, int], dict], Dict[str, Tuple[int, float]]]:
+    """
+    Today's checkpoints merged: (token, interval) -> freshest bar, and
+    token -> (day volume baseline, checkpoint time).
+    """
+    wall = time.time() if wall is None else wall
+    today = _day(wall)
+    bars: Dict[Tuple[str, int], dict] = {}
+    volumes: Dict[str, Tuple[int, float]] = {}
+    saved_at: Dict[Tuple[str, int], float] = {}
+    try:
+        paths = sorted(_store_dir().glob('*.json'))
+    except OSError:
+        return bars, volumes
+    for path in paths:
+        if not path.name.startswith(today):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            continue
+        try:
+            data = json.loads(path.read_text())
+            at = float(data['at'])
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        for token, entry in (data.get('bars') or {}).items():
+            for interval, bar in (entry.get('frames') or {}).items():
+                key = (token, int(interval))
+                if at > saved_at.get(key, 0.0):
+                    saved_at[key] = at
+                    bars[key] = {field: bar[field] for field in BAR_FIELDS}
+        for token, volume in (data.get('day_volume') or {}).items():
+            if volume and at > volumes.get(token, (0, 0.0))[1]:
+                volumes[token] = (int(volume), at)
+    return bars, volumes
+
+
+def rest_bar(
+    symbol: str, bar_time: int, interval: str = 'FIVE_MINUTE'
+) -> Optional[dict]:
+    """
+    The REST candle opening at bar_time (epoch s), or None if Angel has none
+    yet.
+    """
+    from trading.broker_cache import get_angel_client
+
+    client = get_angel_client()
+    client._load_instrument_list()
+    opened_ist = dt.datetime.fromtimestamp(bar_time, IST)
+    # Only the bar itself (and any after it), not the whole session.
+    df = client.get_intraday_candles(
+        symbol,
+        client.instrument_list,
+        interval,
+        retries=1,
+        delay=1.0,
+        since=opened_ist,
+    )
+    if df is None or df.empty:
+        return None
+    opened = opened_ist.replace(tzinfo=None)
+    if opened not in df.index:
+        return None
+    row = df.loc[opened]
+    return {
+        'time': bar_time,
+        'open': float(row['open']),
+        'high': float(row['high']),
+        'low': float(row['low']),
+        'volume': int(row['volume']),
+    }
@@ -0,0 +1,346 @@
+"""
+Append-only binary recorder for raw ticks and completed bars, plus a replay
+driver that feeds recordings back through MarketStreamManager._on_data.
+
+One file per IST trading day under MARKET_DATA_DIR/recordings/YYYY-MM-DD.bin.
+Records are fixed-size little-endian structs prefixed by a one-byte kind:
+
+    S  symbol map   token, symbol (written once per token per file)
+    T  raw tick     receive time, token, exchange ts (ms), LTP (paise),
+                    day volume (-1 when the tick carried none, e.g. LTP mode)
+    B  closed bar   token, interval (s), bar open (epoch s), OHLC (rupees),
+                    volume
+"""
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+from trading.broker import IST
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = b'TMREC1\n'
+KIND_SYMBOL = b'S'
+KIND_TICK = b'T'
+KIND_BAR = b'B'
+
+_SYMBOL = struct.Struct('<cI20s')
+_TICK = struct.Struct('<cdIqqq')
+_BAR = struct.Struct('<cIIIddddq')
+_RECORD_SIZE = {
+    KIND_SYMBOL: _SYMBOL.size,
+    KIND_TICK: _TICK.size,
+    KIND_BAR: _BAR.size,
+}
+
+FLUSH_INTERVAL_SECONDS = 1.0
+# Day volume of a tick without one; replayed ticks then leave it out too.
+NO_VOLUME = -1
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    raw = os.environ.get(name, str(default)).strip().lower()
+    return raw in ('1', 'true', 'yes', 'on')
+
+
+def recordings_dir() -> Path:
+    from django.conf import settings
+
+    return Path(settings.MARKET_DATA_DIR) / 'recordings'
+
+
+def recording_path(day: dt.date, base_dir: Optional[Path] = None) -> Path:
+    return (base_dir or recordings_dir()) / f'{day.isoformat()}.bin'
+
+
+class TickRecord(NamedTuple):
+    received_at: float
+    token: str
+    exchange_timestamp: int
+    last_traded_price: int
+    volume: Optional[int]
+
+
+class BarRecord(NamedTuple):
+    token: str
+    interval: int
+    time: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+
+
+class SymbolRecord(NamedTuple):
+    token: str
+    symbol: str
+
+
+class MarketRecorder:
+    """
+    Thread-safe, daily-rotated append-only writer (called from the feed
+    thread).
+    """
+
+    def __init__(self, base_dir: Path) -> None:
+        self._base_dir = Path(base_dir)
+        self._lock = threading.Lock()
+        self._fh = None
+        self._day: Optional[dt.date] = None
+        self._known_tokens: set[str] = set()
+        self._last_flush = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional['MarketRecorder']:
+        """Recorder when MARKET_RECORD_TICKS is enabled, else None."""
+        if not _env_bool('MARKET_RECORD_TICKS', False):
+            return None
+        return cls(recordings_dir())
+
+    def record_tick(
+        self,
+        token: str,
+        symbol: str,
+        received_at: float,
+        data: dict,
+    ) -> None:
+        volume = data.get('volume_trade_for_the_day')
+        record = _TICK.pack(
+            KIND_TICK,
+            received_at,
+            int(token),
+            int(data.get('exchange_timestamp') or 0),
+            int(data.get('last_traded_price') or 0),
+            NO_VOLUME if volume is None else int(volume),
+        )
+        self._write(token, symbol, received_at, record)
+
+    def record_bar(
+        self,
+        token: str,
+        symbol: str,
+        interval: int,
+        bar: dict,
+        received_at: float,
+    ) -> None:
+        record = _BAR.pack(
+            KIND_BAR,
+            int(token),
+            int(interval),
+            int(bar['time']),
+            float(bar['open']),
+            float(bar['high']),
+            float(bar['low']),
+            float(bar['close']),
+            int(bar.get('volume') or 0),
+        )
+        self._write(token, symbol, received_at, record)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+    def _write(
+        self, token: str, symbol: str, received_at: float, record: bytes
+    ) -> None:
+        try:
+            with self._lock:
+                self._rotate_locked(received_at)
+                if token not in self._known_tokens:
+                    self._fh.write(
+                        _SYMBOL.pack(
+                            KIND_SYMBOL,
+                            int(token),
+                            symbol.encode('utf-8')[:20],
+                        )
+                    )
+                    self._known_tokens.add(token)
+                self._fh.write(record)
+                if received_at - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+                    self._fh.flush()
+                    self._last_flush = received_at
+        except (OSError, ValueError) as exc:
+            logger.warning('Market recorder write failed: %s', exc)
+
+    def _rotate_locked(self, received_at: float) -> None:
+        day = dt.datetime.fromtimestamp(received_at, IST).date()
+        if self._fh is not None and day == self._day:
+            return
+        self._close_locked()
+        self._base_dir.mkdir(parents=True, exist_ok=True)
+        path = recording_path(day, self._base_dir)
+        is_new = not path.exists() or path.stat().st_size == 0
+        self._fh = open(path, 'ab', buffering=64 * 1024)
+        if is_new:
+            self._fh.write(FILE_MAGIC)
+        self._day = day
+        self._known_tokens = set()
+
+    def _close_locked(self) -> None:
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except OSError:
+                pass
+        self._fh = None
+        self._day = None
+
+
+def iter_recording(path: Path) -> Iterator[NamedTuple]:
+    """Yield SymbolRecord / TickRecord / BarRecord in file order."""
+    with open(path, 'rb') as fh:
+        if fh.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f'{path} is not a market recording')
+        while True:
+            kind = fh.read(1)
+            if not kind:
+                return
+            size = _RECORD_SIZE.get(kind)
+            if size is None:
+                raise ValueError(
+                    f'Corrupt recording {path} at offset {fh.tell() - 1}'
+                )
+            body = fh.read(size - 1)
+            if len(body) < size - 1:
+                # Truncated tail from a crash mid-write; everything before it
+                # is valid.
+                return
+            raw = kind + body
+            if kind == KIND_TICK:
+                _, received_at, token, exch_ts, ltp, volume = _TICK.unpack(raw)
+                if volume == NO_VOLUME:
+                    volume = None
+                yield TickRecord(received_at, str(token), exch_ts, ltp, volume)
+            elif kind == KIND_BAR:
+                (
+                    _,
+                    token,
+                    interval,
+                    bar_time,
+                    o,
+                    h,
+                    lo,
+                    c,
+                    volume,
+                ) = _BAR.unpack(raw)
+                yield BarRecord(
+                    str(token), interval, bar_time, o, h, lo, c, volume
+                )
+            else:
+                _, token, symbol = _SYMBOL.unpack(raw)
+                yield SymbolRecord(
+                    str(token), symbol.rstrip(b'\0').decode('utf-8')
+                )
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(
+        len(sorted_values) - 1,
+        int(round(pct / 100.0 * (len(sorted_values) - 1))),
+    )
+    return sorted_values[idx]
+
+
+def latency_summary(samples: List[float]) -> dict:
+    """p50/p90/p99/max in microseconds for a list of durations in seconds."""
+    values = sorted(samples)
+    return {
+        'count': len(values),
+        'p50_us': round(_percentile(values, 50) * 1e6, 1),
+        'p90_us': round(_percentile(values, 90) * 1e6, 1),
+        'p99_us': round(_percentile(values, 99) * 1e6, 1),
+        'max_us': round((values[-1] if values else 0.0) * 1e6, 1),
+    }
+
+
+class MarketReplay:
+    """
+    Feed a recording into a MarketStreamManager at 1x or accelerated speed.
+
+    speed=1.0 reproduces original inter-tick gaps; speed=10 is ten times
+    faster; speed<=0 replays as fast as possible. The manager's clock is
+    pinned to the recorded receive time so bar bucketing is identical to the
+    live session.
+    """
+
+    def __init__(
+        self,
+        manager,
+        speed: float = 1.0,
+        on_bar: Optional[Callable[[str, dict], None]] = None,
+    ) -> None:
+        self.manager = manager
+        self.speed = speed
+        self.on_bar = on_bar
+        self._now = 0.0
+        self.tick_latencies: List[float] = []
+        self.bar_latencies: List[float] = []
+        self.bars_closed = 0
+
+        manager._recorder = None
+        manager._checkpoint_every = 0
+        manager._rest_check = False
+        manager._clock = lambda: self._now
+        manager._monotonic = lambda: self._now
+        if on_bar is not None:
+            manager.add_bar_listener(self._timed_on_bar)
+
+    def _timed_on_bar(self, symbol: str, bar: dict) -> None:
+        started = time.perf_counter()
+        try:
+            self.on_bar(symbol, bar)
+        finally:
+            self.bar_latencies.append(time.perf_counter() - started)
+            self.bars_closed += 1
+
+    def run(self, path: Path) -> dict:
+        first_recorded = None
+        first_wall = None
+        for record in iter_recording(path):
+            if isinstance(record, SymbolRecord):
+                self.manager.bind_token(record.token, record.symbol)
+                continue
+            if not isinstance(record, TickRecord):
+                continue
+
+            if self.speed > 0:
+                if first_recorded is None:
+                    first_recorded = record.received_at
+                    first_wall = time.monotonic()
+                due = (
+                    first_wall
+                    + (record.received_at - first_recorded) / self.speed
+                )
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            self._now = record.received_at
+            data = {
+                'token': record.token,
+                'exchange_timestamp': record.exchange_timestamp,
+                'last_traded_price': record.last_traded_price,
+            }
+            if record.volume is not None:
+                # A missing volume must not look like a baseline reset.
+                data['volume_trade_for_the_day'] = record.volume
+            started = time.perf_counter()
+            self.manager._on_data(None, data)
+            self.tick_latencies.append(time.perf_counter() - started)
+
+        return {
+            'ticks': len(self.tick_latencies),
+            'bars_closed': self.bars_closed,
+            'tick_path': latency_summary(self.tick_latencies),
+            'strategy': latency_summary(self.bar_latencies),
+        }
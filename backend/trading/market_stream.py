@@ -1,68 +1,331 @@
 """
 Angel One SmartAPI WebSocket v2 (market data) -> Django Channels broadcast.
 
-One Angel WebSocket per process; library auto-retry disabled to avoid duplicate
-connections that trigger rate limits.
+Tokens are sharded over a small pool of Angel WebSockets per process
+(ANGEL_MAX_WS_CONNECTIONS); each connection reconnects on its own and all of
+them feed the same live bars. With ANGEL_WS_STANDBY one slot of the pool is
+held open with no tokens and takes over a dropped shard immediately. Library
+auto-retry is disabled to avoid duplicate connections that trigger rate
+limits. Forming bars are checkpointed
+(trading.live_bar_store) so a restart resumes them, and a bar the stream did
+not see from its open is reconciled with the REST candle for its bucket.
 
 See: https://smartapi.angelbroking.com/docs/WebSocket2
 """
 from __future__ import annotations
 
-import datetime as dt
+import asyncio
 import logging
+import os
+import struct
 import threading
 import time
-from typing import Dict, List, Optional
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
 
 import pytz
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from SmartApi.smartWebSocketV2 import SmartWebSocketV2
 
-from trading.broker import IST
 from trading.broker_cache import format_broker_error, get_angel_client, invalidate_angel_client
+from trading.feed_metrics import (
+    FeedMetrics,
+    health_summary,
+    metrics_interval_seconds,
+    remove_snapshot,
+    write_snapshot,
+)
+from trading.live_bar_store import (
+    REST_INTERVALS,
+    checkpoint_seconds,
+    load_checkpoints,
+    rest_bar,
+    rest_check_enabled,
+    write_checkpoint,
+)
+from trading.market_recorder import MarketRecorder
 from trading.utils import token_lookup
 
 logger = logging.getLogger(__name__)
 
+# Status frames go to every client; ticks go to the all-symbols group plus a
+# per-symbol group for symbols that clients subscribed to explicitly.
 CHANNEL_GROUP = 'charts_live'
+ALL_SYMBOLS_GROUP = 'charts_live.all'
+# run_market_feed listens here for interest changes from Daphne workers.
+CONTROL_GROUP = 'charts_live.control'
+# Interest id for the watchlist the external feed process always streams.
+WATCHLIST_CLIENT_ID = 'feed-watchlist'
 NSE_CM = SmartWebSocketV2.NSE_CM
 LTP_MODE = SmartWebSocketV2.LTP_MODE
+# QUOTE and SNAP_QUOTE ticks also carry the cumulative day volume.
+SUBSCRIPTION_MODES = {
+    'ltp': LTP_MODE,
+    'quote': SmartWebSocketV2.QUOTE,
+    'snap_quote': SmartWebSocketV2.SNAP_QUOTE,
+}
 SUBSCRIBE_CORRELATION_ID = 'tmcharts01'
 STOP_GRACE_SECONDS = 45.0
 MIN_RECONNECT_SECONDS = 15.0
 MAX_RECONNECT_BACKOFF_SECONDS = 120.0
+BAR_INTERVAL_SECONDS = 300
+DAILY_INTERVAL_SECONDS = 86400
+IST_OFFSET_SECONDS = 19800
+# Timeframes built from the same tick pass. BAR_INTERVAL_SECONDS is the
+# primary one (chart frames, default bar listeners).
+LIVE_INTERVALS = (60, BAR_INTERVAL_SECONDS, 900, DAILY_INTERVAL_SECONDS)
+# Closed bars kept per symbol and timeframe for in-process strategies.
+CLOSED_BAR_HISTORY = 120
 
 
-def _bar_open_time_utc(now_ist) -> int:
-    minute = (now_ist.minute // 5) * 5
-    bar = now_ist.replace(minute=minute, second=0, microsecond=0)
-    return int(bar.timestamp())
+def bucket_start(wall: float, interval: int) -> int:
+    """
+    Open time (epoch s) of the bar containing wall; daily bars start at IST
+    midnight.
+    """
+    if interval == DAILY_INTERVAL_SECONDS:
+        day = (wall + IST_OFFSET_SECONDS) // DAILY_INTERVAL_SECONDS
+        return int(day * DAILY_INTERVAL_SECONDS - IST_OFFSET_SECONDS)
+    # IST is a whole number of intraday bars from UTC, so flooring is exact.
+    return int(wall // interval) * interval
 
 
-def _ltp_to_rupees(raw: int) -> float:
-    return float(raw) / 100.0
+def symbol_group(symbol: str) -> str:
+    """Channel group for one symbol (group names allow only [A-Za-z0-9._-])."""
+    safe = ''.join(
+        c if (c.isascii() and c.isalnum()) or c in '-.' else f'_{ord(c):02x}'
+        for c in symbol.upper()
+    )
+    return f'{CHANNEL_GROUP}.sym.{safe}'[:99]
+
+
+def subscription_mode() -> int:
+    """
+    Upstream tick mode (LIVE_FEED_SUBSCRIPTION_MODE: ltp, quote or snap_quote).
+    """
+    raw = (
+        os.environ.get('LIVE_FEED_SUBSCRIPTION_MODE', 'quote').strip().lower()
+    )
+    return SUBSCRIPTION_MODES.get(raw, SUBSCRIPTION_MODES['quote'])
+
+
+def max_ws_connections() -> int:
+    """Angel WebSockets this process may hold (ANGEL_MAX_WS_CONNECTIONS)."""
+    try:
+        return max(1, int(os.environ.get('ANGEL_MAX_WS_CONNECTIONS', '1')))
+    except ValueError:
+        return 1
+
+
+def tokens_per_connection() -> int:
+    """Token cap per Angel WebSocket (ANGEL_WS_TOKENS_PER_CONNECTION)."""
+    try:
+        return max(
+            1, int(os.environ.get('ANGEL_WS_TOKENS_PER_CONNECTION', '1000'))
+        )
+    except ValueError:
+        return 1000
+
+
+def ws_standby_enabled() -> bool:
+    """
+    Keep one pooled connection logged in and idle for failover
+    (ANGEL_WS_STANDBY).
+    """
+    return os.environ.get('ANGEL_WS_STANDBY', 'false').strip().lower() in (
+        '1',
+        'true',
+        'yes',
+        'on',
+    )
+
+
+def publish_queue_size() -> int:
+    """
+    Max channel-layer events waiting for the publisher (LIVE_PUBLISH_QUEUE);
+    oldest drop first.
+    """
+    try:
+        return max(16, int(os.environ.get('LIVE_PUBLISH_QUEUE', '2048')))
+    except ValueError:
+        return 2048
+
+
+def live_flush_hz() -> float:
+    """
+    Batched tick frames per second (LIVE_FLUSH_HZ); 0 sends one frame per tick.
+    """
+    try:
+        return max(0.0, float(os.environ.get('LIVE_FLUSH_HZ', '4')))
+    except ValueError:
+        return 4.0
+
+
+# Binary chart frames (negotiated per socket, JSON stays the default):
+#   header  <BBH  version, kind, item count
+#   item    <B name length, ASCII symbol, <IiiiiI bar time, OHLC in paise,
+#           volume
+# The latest price is the bar close. Symbols travel inline so frames decode
+# without an id table that would have to be kept in sync across processes.
+WIRE_VERSION = 1
+WIRE_KIND_TICKS = 1
+WIRE_KIND_SNAPSHOT = 2
+_WIRE_HEADER = struct.Struct('<BBH')
+_WIRE_ITEM = struct.Struct('<IiiiiI')
+
+
+def encode_wire_frame(
+    items: List[bytes], kind: int = WIRE_KIND_TICKS
+) -> bytes:
+    return _WIRE_HEADER.pack(WIRE_VERSION, kind, len(items)) + b''.join(items)
+
+
+class _LiveBar:
+    """
+    Current bar for one token slot, updated in place on every tick. partial
+    marks a bar the stream did not see from its open (first bar after
+    subscribing or reconnecting), so its OHLCV is incomplete.
+    """
+
+    __slots__ = (
+        'token',
+        'symbol',
+        'wire_name',
+        'time',
+        'open',
+        'high',
+        'low',
+        'close',
+        'volume',
+        'partial',
+    )
+
+    def __init__(self, token: str, symbol: str) -> None:
+        self.token = token
+        self.time = 0
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0
+        self.partial = True
+        self.rename(symbol)
+
+    def rename(self, symbol: str) -> None:
+        self.symbol = symbol
+        name = symbol.encode('ascii', 'replace')[:255]
+        self.wire_name = bytes((len(name),)) + name
+
+    def encode(self) -> bytes:
+        return self.wire_name + _WIRE_ITEM.pack(
+            self.time,
+            round(self.open * 100),
+            round(self.high * 100),
+            round(self.low * 100),
+            round(self.close * 100),
+            min(self.volume, 0xFFFFFFFF),
+        )
+
+    def start(
+        self, bar_time: int, ltp: float, volume: int, partial: bool
+    ) -> None:
+        self.partial = partial
+        self.time = bar_time
+        self.open = self.high = self.low = self.close = ltp
+        self.volume = volume
+
+    def as_dict(self) -> dict:
+        return {
+            'time': self.time,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+        }
 
 
 class _ChartWebSocket(SmartWebSocketV2):
     """Disable SmartAPI internal reconnect loop (we manage reconnect in the manager)."""
 
-    def __init__(self, manager: 'MarketStreamManager', **kwargs):
+    def __init__(
+        self,
+        manager: 'MarketStreamManager',
+        connection: '_FeedConnection',
+        **kwargs,
+    ):
         kwargs['max_retry_attempt'] = 0
         kwargs['retry_strategy'] = 0
         kwargs['retry_delay'] = 0
         super().__init__(**kwargs)
         self._manager = manager
+        self._connection = connection
 
     def _on_error(self, wsapp, error=None, *args, **kwargs):
-        logger.warning('Angel chart WebSocket error: %s', error)
-        self._manager._on_angel_connection_lost(str(error or 'error'))
+        logger.warning(
+            'Angel chart WebSocket %s error: %s', self._connection.index, error
+        )
+        self._manager._on_angel_connection_lost(
+            self._connection, str(error or 'error'), self
+        )
 
     def _on_close(self, wsapp, *args, **kwargs):
         close_code = args[0] if len(args) > 0 else ''
         close_msg = args[1] if len(args) > 1 else ''
-        logger.info('Angel chart WebSocket closed (%s %s)', close_code, close_msg)
-        self._manager._on_angel_connection_lost('closed')
+        logger.info(
+            'Angel chart WebSocket %s closed (%s %s)',
+            self._connection.index,
+            close_code,
+            close_msg,
+        )
+        self._manager._on_angel_connection_lost(
+            self._connection, 'closed', self
+        )
+
+
+class _FeedConnection:
+    """
+    One upstream Angel WebSocket and the token shard it carries. A standby
+    connection carries no tokens; it is opened ahead of time so a failover
+    only needs a subscribe frame.
+    """
+
+    def __init__(self, index: int, standby: bool = False) -> None:
+        self.index = index
+        self.standby = standby
+        self.opened = False
+        self.ws: Optional[_ChartWebSocket] = None
+        self.thread: Optional[threading.Thread] = None
+        # Tokens assigned to this shard; subscribed is what the socket carries
+        # now.
+        self.tokens: set[str] = set()
+        self.subscribed: set[str] = set()
+        self.reconnect_timer: Optional[threading.Timer] = None
+        self.reconnect_attempts = 0
+        self.starting = False
+        self.last_start_at = 0.0
+
+    def is_active(self) -> bool:
+        if not self.ws or not self.thread or not self.thread.is_alive():
+            return False
+        if getattr(self.ws, 'DISCONNECT_FLAG', True):
+            return False
+        return bool(self.subscribed)
+
+    def cancel_reconnect(self) -> None:
+        if self.reconnect_timer:
+            self.reconnect_timer.cancel()
+            self.reconnect_timer = None
+
+    def stats(self) -> dict:
+        return {
+            'index': self.index,
+            'standby': self.standby,
+            'open': self.opened,
+            'active': self.is_active(),
+            'tokens': len(self.tokens),
+            'subscribed': len(self.subscribed),
+            'reconnect_attempts': self.reconnect_attempts,
+        }
 
 
 class MarketStreamManager:
@@ -71,16 +334,94 @@ class MarketStreamManager:
 
     def __init__(self) -> None:
         self._client_count = 0
-        self._ws: Optional[_ChartWebSocket] = None
-        self._thread: Optional[threading.Thread] = None
+        # Upstream pool; a token stays on its connection while it is wanted.
+        pool_size = max_ws_connections()
+        standby = ws_standby_enabled()
+        if standby and pool_size < 2:
+            logger.warning(
+                'ANGEL_WS_STANDBY needs ANGEL_MAX_WS_CONNECTIONS >= 2; '
+                'no standby'
+            )
+            standby = False
+        # The standby takes the last slot, so the pool stays within Angel's
+        # limit.
+        self._connections: List[_FeedConnection] = [
+            _FeedConnection(i, standby=standby and i == pool_size - 1)
+            for i in range(pool_size)
+        ]
+        self._shard_capacity = tokens_per_connection()
+        self._unplaced_tokens = 0
         self._token_to_symbol: Dict[str, str] = {}
-        self._live_bars: Dict[str, dict] = {}
-        self._subscribed_tokens: set[str] = set()
+        self._symbol_tokens: Dict[str, str] = {}
+        # client id -> (symbols, explicit); the upstream feed carries the
+        # union.
+        self._interests: Dict[str, Tuple[frozenset, bool]] = {}
+        # Symbols with explicit subscribers get their own group fan-out.
+        self._symbol_groups: frozenset = frozenset()
+        # Raw feed token -> slot; each timeframe keeps its in-place live bars
+        # in a list indexed by slot, _slots being the primary (5m) one.
+        self._token_slots: Dict[str, int] = {}
+        self._intervals: Tuple[int, ...] = LIVE_INTERVALS
+        self._frame_bars: List[List[_LiveBar]] = [[] for _ in self._intervals]
+        self._closed_bars: List[List[deque]] = [[] for _ in self._intervals]
+        self._primary_frame = self._intervals.index(BAR_INTERVAL_SECONDS)
+        self._slots: List[_LiveBar] = self._frame_bars[self._primary_frame]
+        self._daily_frame = self._intervals.index(DAILY_INTERVAL_SECONDS)
+        # Last cumulative day volume per slot; bar volume is the delta (0 = no
+        # baseline).
+        self._mode = subscription_mode()
+        self._day_volume: List[int] = []
+        # Slot's first tick since subscribing / reconnecting (bars it opens are
+        # partial).
+        self._resync: List[bool] = []
+        # Checkpointed bars from an earlier run of this feed, loaded on first
+        # bind.
+        self._checkpoint_every = checkpoint_seconds()
+        self._restored: Optional[Tuple[dict, dict]] = None
+        # Restored / partial primary bars waiting for their REST candle (slot
+        # -> bar time, newest wins); the REST thread leaves patches that the
+        # feed thread applies on the slot's next tick. The candle interval
+        # follows the primary frame; without an Angel equivalent, no check.
+        primary_interval = self._intervals[self._primary_frame]
+        self._rest_interval = REST_INTERVALS.get(primary_interval)
+        self._rest_check = (
+            rest_check_enabled() and self._rest_interval is not None
+        )
+        self._rest_pending: Dict[int, int] = {}
+        self._rest_lock = threading.Lock()
+        self._rest_worker: Optional[threading.Thread] = None
+        self._rest_patches: Dict[int, dict] = {}
         self._stop_timer: Optional[threading.Timer] = None
-        self._reconnect_timer: Optional[threading.Timer] = None
-        self._reconnect_attempts = 0
-        self._starting = False
-        self._last_start_at = 0.0
+        self._clock: Callable[[], float] = time.time
+        self._monotonic: Callable[[], float] = time.monotonic
+        # Current bar open (epoch s) per timeframe, and the monotonic instant
+        # the earliest of them ends.
+        # Replaced as a whole under _clock_lock, never mutated in place, so
+        # pooled feed threads read one consistent set without locking.
+        self._bar_times: List[int] = [0] * len(self._intervals)
+        self._bar_edge = 0.0
+        self._wall_offset = 0.0
+        self._clock_lock = threading.Lock()
+        # Coalescing publisher: slots changed since the last flush.
+        self._flush_hz = live_flush_hz()
+        self._pending: set[int] = set()
+        self._pending_lock = threading.Lock()
+        self._publisher: Optional[threading.Thread] = None
+        self._publisher_stop = threading.Event()
+        # Pooled feed threads can all see no publisher at once; one starts it.
+        self._publisher_lock = threading.Lock()
+        # Feed thread -> asyncio publisher handoff. deque append/popleft are
+        # atomic, and maxlen drops the oldest event when the layer falls
+        # behind.
+        self._outbox: deque = deque(maxlen=publish_queue_size())
+        self._outbox_dropped = 0
+        self._bridge_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._bridge_wake: Optional[asyncio.Event] = None
+        self._bridge_idle = False
+        self.metrics = FeedMetrics()
+        self._recorder: Optional[MarketRecorder] = MarketRecorder.from_env()
+        self._bar_listeners: Dict[int, List[Callable[[str, dict], None]]] = {}
+        self._tick_listeners: List[Callable[[str, float, _LiveBar], None]] = []
 
     @classmethod
     def instance(cls) -> 'MarketStreamManager':
@@ -89,32 +430,218 @@ class MarketStreamManager:
                 cls._instance = MarketStreamManager()
             return cls._instance
 
-    def register_client(self, symbols: List[str]) -> None:
+    def add_bar_listener(
+        self,
+        listener: Callable[[str, dict], None],
+        interval: int = BAR_INTERVAL_SECONDS,
+    ) -> None:
+        """
+        Call listener(symbol, bar) on the feed thread whenever a bar of
+        interval closes. bar['partial'] is True when the stream missed the
+        bar's open.
+        """
+        self._bar_listeners.setdefault(interval, []).append(listener)
+
+    def add_tick_listener(
+        self, listener: Callable[[str, float, _LiveBar], None]
+    ) -> None:
+        """
+        Call listener(symbol, ltp, bar) on the feed thread for every tick.
+        bar is the live slot object; copy it (bar.as_dict()) to keep it.
+        """
+        self._tick_listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        for listeners in (self._tick_listeners, *self._bar_listeners.values()):
+            if listener in listeners:
+                listeners.remove(listener)
+
+    def register_client(
+        self, symbols: List[str], client_id: Optional[str] = None
+    ) -> str:
+        """Add a feed consumer interested in symbols; returns its client id."""
+        client_id = client_id or uuid.uuid4().hex
         with self._lock:
             if self._stop_timer:
                 self._stop_timer.cancel()
                 self._stop_timer = None
-            self._client_count += 1
+            self._interests[client_id] = (
+                frozenset(s.upper() for s in symbols),
+                False,
+            )
+            self._client_count = len(self._interests)
+            self._refresh_symbol_groups()
             self._ensure_symbol_map(symbols)
-            if not self._token_to_symbol:
+            if not self._desired_tokens():
                 self._broadcast({
                     'type': 'status',
                     'message': 'no_tokens',
                     'detail': 'Could not resolve symbol tokens for WebSocket',
                 })
-                return
+                return client_id
+            self._sync_upstream_locked()
             if self._stream_is_active():
                 self._notify_live()
-            elif not self._starting:
-                self._start_stream_locked(refresh_credentials=False)
+        return client_id
+
+    def set_interest(
+        self, client_id: str, symbols: List[str], explicit: bool = True
+    ) -> None:
+        """
+        Replace a client's symbols. explicit=True means the client subscribed
+        to these symbols and gets them via per-symbol groups; otherwise it
+        reads the all-symbols group.
+        """
+        with self._lock:
+            if self._stop_timer:
+                self._stop_timer.cancel()
+                self._stop_timer = None
+            self._interests[client_id] = (
+                frozenset(s.upper() for s in symbols),
+                explicit,
+            )
+            self._client_count = len(self._interests)
+            self._refresh_symbol_groups()
+            self._ensure_symbol_map(symbols)
+            self._sync_upstream_locked()
 
-    def unregister_client(self) -> None:
+    def unregister_client(self, client_id: str) -> None:
         with self._lock:
-            self._client_count = max(0, self._client_count - 1)
+            self._interests.pop(client_id, None)
+            self._client_count = len(self._interests)
+            self._refresh_symbol_groups()
             if self._client_count == 0:
-                self._cancel_reconnect_timer()
+                self._cancel_reconnect_timers()
                 self._schedule_stop()
 
+    def _refresh_symbol_groups(self) -> None:
+        self._symbol_groups = frozenset(
+            symbol
+            for symbols, explicit in self._interests.values()
+            if explicit
+            for symbol in symbols
+        )
+
+    def _wanted_symbols(self) -> set:
+        wanted = set()
+        # Copy: the publisher thread and API views read this without the lock.
+        for symbols, _explicit in list(self._interests.values()):
+            wanted |= symbols
+        return wanted
+
+    def _desired_tokens(self) -> set:
+        """
+        Upstream subscription: tokens for the union of every client's interest.
+        """
+        return {
+            self._symbol_tokens[s]
+            for s in self._wanted_symbols()
+            if s in self._symbol_tokens
+        }
+
+    def _assign_shards_locked(self) -> None:
+        """
+        Drop unwanted tokens from their shards and place new ones on the least
+        loaded.
+        """
+        desired = self._desired_tokens()
+        shards = [c for c in self._connections if not c.standby]
+        placed = set()
+        for conn in shards:
+            conn.tokens &= desired
+            placed |= conn.tokens
+        unplaced = 0
+        for token in sorted(desired - placed):
+            open_shards = [
+                c for c in shards if len(c.tokens) < self._shard_capacity
+            ]
+            if not open_shards:
+                unplaced += 1
+                continue
+            min(open_shards, key=lambda c: len(c.tokens)).tokens.add(token)
+        if unplaced and unplaced != self._unplaced_tokens:
+            logger.warning(
+                'Angel WS pool full: %s tokens not streamed '
+                '(%s connections x %s tokens)',
+                unplaced,
+                len(shards),
+                self._shard_capacity,
+            )
+        self._unplaced_tokens = unplaced
+
+    def _sync_upstream_locked(self) -> None:
+        """
+        Shard the desired tokens and bring each connection to its shard
+        incrementally.
+        """
+        self._assign_shards_locked()
+        changed = False
+        for conn in self._connections:
+            if conn.standby:
+                if (
+                    self._client_count > 0
+                    and conn.ws is None
+                    and not conn.starting
+                    and not conn.reconnect_timer
+                ):
+                    self._start_connection_locked(
+                        conn, refresh_credentials=False
+                    )
+                continue
+            if not conn.tokens:
+                if conn.ws is not None:
+                    # Free the Angel connection slot once its shard is empty.
+                    self._stop_connection_locked(conn, join_thread=False)
+                    changed = True
+                continue
+            if not conn.is_active():
+                if (
+                    self._client_count > 0
+                    and not conn.starting
+                    and not conn.reconnect_timer
+                ):
+                    self._start_connection_locked(
+                        conn, refresh_credentials=False
+                    )
+                continue
+            changed |= self._resubscribe_locked(conn)
+        if changed:
+            self._notify_live()
+
+    def _resubscribe_locked(self, conn: _FeedConnection) -> bool:
+        added = sorted(conn.tokens - conn.subscribed)
+        removed = sorted(conn.subscribed - conn.tokens)
+        if not added and not removed:
+            return False
+        try:
+            if added:
+                conn.ws.subscribe(
+                    SUBSCRIBE_CORRELATION_ID,
+                    self._mode,
+                    [{'exchangeType': NSE_CM, 'tokens': added}],
+                )
+                conn.subscribed.update(added)
+            if removed:
+                conn.ws.unsubscribe(
+                    SUBSCRIBE_CORRELATION_ID,
+                    self._mode,
+                    [{'exchangeType': NSE_CM, 'tokens': removed}],
+                )
+                conn.subscribed.difference_update(removed)
+        except Exception as exc:
+            logger.warning(
+                'Angel WS %s incremental subscribe failed: %s', conn.index, exc
+            )
+            self._schedule_reconnect_locked(conn, refresh_credentials=False)
+            return False
+        logger.info(
+            'Angel WS %s subscription +%s -%s tokens',
+            conn.index,
+            len(added),
+            len(removed),
+        )
+        return True
+
     def _schedule_stop(self) -> None:
         if self._stop_timer:
             self._stop_timer.cancel()
@@ -129,26 +656,140 @@ class MarketStreamManager:
         self._stop_timer.start()
 
     def _ensure_symbol_map(self, symbols: List[str]) -> None:
+        missing = [s for s in symbols if s.upper() not in self._symbol_tokens]
+        if not missing:
+            return
         client = get_angel_client()
         client._load_instrument_list()
-        for symbol in symbols:
+        for symbol in missing:
             token = token_lookup(symbol, client.instrument_list)
             if token is not None:
-                self._token_to_symbol[str(token).strip()] = symbol
+                self.bind_token(str(token).strip(), symbol)
+
+    def bind_token(self, token: str, symbol: str) -> None:
+        """Map a feed token to a symbol and give it a live bar slot."""
+        self._token_to_symbol[token] = symbol
+        self._symbol_tokens[symbol.upper()] = token
+        if token in self._token_slots:
+            for bars in self._frame_bars:
+                bars[self._token_slots[token]].rename(symbol)
+            return
+        slot = len(self._slots)
+        for bars, closed in zip(self._frame_bars, self._closed_bars):
+            bars.append(_LiveBar(token, symbol))
+            closed.append(deque(maxlen=CLOSED_BAR_HISTORY))
+        self._day_volume.append(0)
+        self._resync.append(True)
+        self.metrics.add_slot()
+        self._token_slots[token] = slot
+        if token.isdigit() and str(int(token)) != token:
+            self._token_slots[str(int(token))] = slot
+        if self._checkpoint_every > 0:
+            self._restore_slot(slot, token)
+
+    def _restore_slot(self, slot: int, token: str) -> None:
+        """
+        Resume this slot's bars from today's checkpoint where the bucket is
+        still current.
+        """
+        wall = self._clock()
+        if self._restored is None:
+            self._restored = load_checkpoints(wall)
+        saved_bars, saved_volumes = self._restored
+        for frame, interval in enumerate(self._intervals):
+            saved = saved_bars.get((token, interval))
+            if saved is None or saved['time'] != bucket_start(wall, interval):
+                continue
+            bar = self._frame_bars[frame][slot]
+            bar.time = saved['time']
+            bar.open, bar.high, bar.low, bar.close = (
+                saved['open'],
+                saved['high'],
+                saved['low'],
+                saved['close'],
+            )
+            bar.volume = saved['volume']
+            # Ticks were missed while the process was down.
+            bar.partial = True
+        primary = self._slots[slot]
+        if not primary.time:
+            return
+        volume, saved_at = saved_volumes.get(token, (0, 0.0))
+        if (
+            volume
+            and bucket_start(saved_at, BAR_INTERVAL_SECONDS) == primary.time
+        ):
+            # Volume traded while down then lands in the resumed bar.
+            self._day_volume[slot] = volume
+        self._queue_rest_check(slot, primary.time)
+
+    def _advance_bar_clock(self, mono: float) -> None:
+        with self._clock_lock:
+            if mono < self._bar_edge:
+                # Another feed thread crossed the edge first.
+                return
+            wall = self._clock()
+            times = []
+            edge = None
+            for interval in self._intervals:
+                start = bucket_start(wall, interval)
+                times.append(start)
+                end = mono + (start + interval - wall)
+                edge = end if edge is None else min(edge, end)
+            self._wall_offset = wall - mono
+            self._bar_times = times
+            self._bar_edge = edge
+
+    def _slot_for(self, symbol: str) -> Optional[int]:
+        token = self._symbol_tokens.get(symbol.upper())
+        return self._token_slots.get(token) if token is not None else None
+
+    def live_bar(
+        self, symbol: str, interval: int = BAR_INTERVAL_SECONDS
+    ) -> Optional[dict]:
+        """
+        The forming bar of interval for symbol (None before its first tick).
+        """
+        slot = self._slot_for(symbol)
+        if slot is None or interval not in self._intervals:
+            return None
+        bar = self._frame_bars[self._intervals.index(interval)][slot]
+        return bar.as_dict() if bar.time else None
+
+    @property
+    def streams_volume(self) -> bool:
+        """Whether bars carry traded volume (any mode above LTP)."""
+        return self._mode != LTP_MODE
+
+    def closed_bars(
+        self, symbol: str, interval: int = BAR_INTERVAL_SECONDS
+    ) -> List[dict]:
+        """
+        Complete bars of interval closed by the stream this session, oldest
+        first. Partial bars are left out, so a gap means the feed missed time.
+        """
+        slot = self._slot_for(symbol)
+        if slot is None or interval not in self._intervals:
+            return []
+        return list(self._closed_bars[self._intervals.index(interval)][slot])
 
     def _stream_is_active(self) -> bool:
-        if not self._ws or not self._thread or not self._thread.is_alive():
-            return False
-        if getattr(self._ws, 'DISCONNECT_FLAG', True):
-            return False
-        return bool(self._subscribed_tokens)
+        return any(conn.is_active() for conn in self._connections)
 
-    def _notify_live(self) -> None:
-        self._broadcast({
+    def connection_stats(self) -> List[dict]:
+        """Per-connection state of the upstream pool."""
+        return [conn.stats() for conn in self._connections]
+
+    def _notify_live(self, detail: str = '') -> None:
+        message = {
             'type': 'status',
             'message': 'live',
-            'symbols': list(self._token_to_symbol.values()),
-        })
+            'symbols': sorted(self._wanted_symbols()),
+            'health': health_summary(self.feed_health()),
+        }
+        if detail:
+            message['detail'] = detail
+        self._broadcast(message)
 
     def _get_credentials(self, refresh: bool) -> dict:
         if refresh:
@@ -157,24 +798,29 @@ class MarketStreamManager:
         client.ensure_feed_token()
         return client.get_websocket_credentials()
 
-    def _start_stream_locked(self, refresh_credentials: bool = False) -> None:
+    def _start_connection_locked(
+        self, conn: _FeedConnection, refresh_credentials: bool = False
+    ) -> None:
         now = time.time()
-        if now - self._last_start_at < MIN_RECONNECT_SECONDS and not refresh_credentials:
-            logger.info('Skipping Angel WS start (cooldown)')
+        if (
+            now - conn.last_start_at < MIN_RECONNECT_SECONDS
+            and not refresh_credentials
+        ):
+            logger.info('Skipping Angel WS %s start (cooldown)', conn.index)
             return
 
-        if self._stream_is_active():
+        if conn.is_active():
             self._notify_live()
             return
 
-        self._starting = True
-        self._last_start_at = now
-        self._stop_stream_locked(join_thread=False)
+        conn.last_start_at = now
+        self._stop_connection_locked(conn, join_thread=False)
+        conn.starting = True
 
         try:
             creds = self._get_credentials(refresh=refresh_credentials)
         except Exception as exc:
-            self._starting = False
+            conn.starting = False
             msg = format_broker_error(exc)
             logger.error('Angel WS credentials failed: %s', msg)
             self._broadcast({
@@ -182,190 +828,843 @@ class MarketStreamManager:
                 'message': 'error',
                 'detail': msg,
             })
-            self._schedule_reconnect()
+            self._schedule_reconnect_locked(conn)
             return
 
-        self._ws = _ChartWebSocket(
+        ws = _ChartWebSocket(
             manager=self,
+            connection=conn,
             auth_token=creds['auth_token'],
             api_key=creds['api_key'],
             client_code=creds['client_code'],
             feed_token=creds['feed_token'],
         )
-        self._ws.on_open = self._on_open
-        self._ws.on_data = self._on_data
-        self._ws.on_message = lambda _w, _m: None
+        ws.on_open = lambda _wsapp: self._on_open(conn, ws)
+        ws.on_data = self._on_data
+        ws.on_message = lambda _w, _m: None
+        conn.ws = ws
 
-        self._thread = threading.Thread(
+        conn.thread = threading.Thread(
             target=self._run_connect,
-            name='angel-ws-v2',
+            args=(conn, ws),
+            name=f'angel-ws-v2-{conn.index}',
             daemon=True,
         )
-        self._thread.start()
+        conn.thread.start()
+        self._ensure_publisher()
 
-    def _run_connect(self) -> None:
+    def _run_connect(self, conn: _FeedConnection, ws: _ChartWebSocket) -> None:
         try:
-            if self._ws:
-                self._ws.connect()
+            ws.connect()
         except Exception as exc:
-            logger.exception('Angel WS connect failed: %s', exc)
-            self._on_angel_connection_lost(str(exc))
+            logger.exception('Angel WS %s connect failed: %s', conn.index, exc)
+            self._on_angel_connection_lost(conn, str(exc), ws)
         finally:
             with self._lock:
-                self._starting = False
+                if conn.ws is ws:
+                    conn.starting = False
 
-    def _stop_stream_locked(self, join_thread: bool = True) -> None:
-        self._cancel_reconnect_timer()
-        if self._ws:
+    def _stop_connection_locked(
+        self, conn: _FeedConnection, join_thread: bool = True
+    ) -> None:
+        conn.cancel_reconnect()
+        ws, conn.ws = conn.ws, None
+        if ws:
             try:
-                self._ws.RESUBSCRIBE_FLAG = False
-                self._ws.close_connection()
+                ws.RESUBSCRIBE_FLAG = False
+                ws.close_connection()
             except Exception:
                 pass
-        self._ws = None
-        self._subscribed_tokens.clear()
-        if join_thread and self._thread and self._thread.is_alive():
-            self._thread.join(timeout=2.0)
-        self._thread = None
-        self._starting = False
-
-    def _on_open(self, _wsapp) -> None:
+        conn.subscribed.clear()
+        conn.opened = False
+        if join_thread and conn.thread and conn.thread.is_alive():
+            conn.thread.join(timeout=2.0)
+        conn.thread = None
+        conn.starting = False
+
+    def _stop_stream_locked(self, join_thread: bool = True) -> None:
+        for conn in self._connections:
+            self._stop_connection_locked(conn, join_thread=join_thread)
+        self._stop_publisher()
+        remove_snapshot()
+        if self._checkpoint_every > 0:
+            self.checkpoint()
+
+    def _on_open(self, conn: _FeedConnection, ws: _ChartWebSocket) -> None:
         with self._lock:
-            self._reconnect_attempts = 0
-            tokens = list(self._token_to_symbol.keys())
-            if not tokens or not self._ws:
+            if conn.ws is not ws:
+                return
+            conn.starting = False
+            conn.opened = True
+            conn.reconnect_attempts = 0
+            tokens = sorted(conn.tokens)
+            if not tokens:
+                if conn.standby:
+                    logger.info('Angel WS %s standing by', conn.index)
                 return
             try:
                 token_list = [{'exchangeType': NSE_CM, 'tokens': tokens}]
-                self._ws.subscribe(SUBSCRIBE_CORRELATION_ID, LTP_MODE, token_list)
-                self._subscribed_tokens.update(tokens)
+                ws.subscribe(SUBSCRIBE_CORRELATION_ID, self._mode, token_list)
+                conn.subscribed.update(tokens)
             except Exception as exc:
-                logger.exception('Angel WS subscribe failed: %s', exc)
-                self._broadcast({
-                    'type': 'status',
-                    'message': 'error',
-                    'detail': str(exc),
-                })
-                self._schedule_reconnect_locked(refresh_credentials=True)
+                logger.exception(
+                    'Angel WS %s subscribe failed: %s', conn.index, exc
+                )
+                self._broadcast(
+                    {
+                        'type': 'status',
+                        'message': 'error',
+                        'detail': str(exc),
+                    }
+                )
+                self._schedule_reconnect_locked(conn, refresh_credentials=True)
                 return
         self._notify_live()
 
     def _on_data(self, _wsapp, data: dict) -> None:
         if not isinstance(data, dict):
             return
-        raw_token = str(data.get('token', '')).strip()
-        symbol = self._token_to_symbol.get(raw_token)
-        if not symbol and raw_token.isdigit():
-            symbol = self._token_to_symbol.get(str(int(raw_token)))
-        if not symbol:
-            return
+        started = time.perf_counter()
+        slot = self._token_slots.get(data.get('token'))
+        if slot is None:
+            raw = str(data.get('token', '')).strip()
+            slot = self._token_slots.get(raw)
+            if slot is None and raw.isdigit():
+                slot = self._token_slots.get(str(int(raw)))
+            if slot is None:
+                self.metrics.counters['unknown_tokens'] += 1
+                return
         raw_ltp = data.get('last_traded_price')
         if raw_ltp is None:
             return
 
-        ltp = _ltp_to_rupees(int(raw_ltp))
-        now_ist = dt.datetime.now(IST)
-        bar_time = _bar_open_time_utc(now_ist)
-
-        bar = self._live_bars.get(symbol)
-        if not bar or bar.get('time') != bar_time:
-            bar = {
-                'time': bar_time,
-                'open': ltp,
-                'high': ltp,
-                'low': ltp,
-                'close': ltp,
-            }
+        mono = self._monotonic()
+        if mono >= self._bar_edge:
+            self._advance_bar_clock(mono)
+        bar = self._slots[slot]
+        symbol = bar.symbol
+        if self._recorder:
+            self._recorder.record_tick(
+                bar.token, symbol, mono + self._wall_offset, data
+            )
+
+        if self._rest_patches:
+            patch = self._rest_patches.pop(slot, None)
+            if patch is not None:
+                self._apply_rest_patch(slot, patch)
+        ltp = int(raw_ltp) / 100.0
+        resync = self._resync[slot]
+        if resync:
+            self._resync[slot] = False
+        raw_volume = data.get('volume_trade_for_the_day')
+        traded = 0
+        if raw_volume is not None:
+            day_volume = int(raw_volume)
+            previous = self._day_volume[slot]
+            # The first tick only sets the baseline; a drop means a new
+            # session.
+            if previous and day_volume >= previous:
+                traded = day_volume - previous
+            self._day_volume[slot] = day_volume
+        # One pass updates every timeframe's bar for this slot.
+        for frame, bar_time in enumerate(self._bar_times):
+            frame_bar = self._frame_bars[frame][slot]
+            if frame_bar.time != bar_time:
+                if frame_bar.time:
+                    self._on_bar_closed(
+                        frame, slot, frame_bar, mono + self._wall_offset
+                    )
+                frame_bar.start(bar_time, ltp, traded, resync)
+                if resync and frame == self._primary_frame:
+                    self._queue_rest_check(slot, bar_time)
+            else:
+                if ltp > frame_bar.high:
+                    frame_bar.high = ltp
+                elif ltp < frame_bar.low:
+                    frame_bar.low = ltp
+                frame_bar.close = ltp
+                frame_bar.volume += traded
+        if raw_volume is not None:
+            # The exchange's day total is exact for the daily bar.
+            self._frame_bars[self._daily_frame][slot].volume = day_volume
+
+        for listener in self._tick_listeners:
+            try:
+                listener(symbol, ltp, bar)
+            except Exception as exc:
+                logger.warning('Tick listener failed for %s: %s', symbol, exc)
+
+        exchange_ms = int(data.get('exchange_timestamp') or 0)
+        if self._flush_hz > 0:
+            with self._pending_lock:
+                self._pending.add(slot)
         else:
-            bar = {
-                **bar,
-                'high': max(bar['high'], ltp),
-                'low': min(bar['low'], ltp),
-                'close': ltp,
+            message = {
+                'type': 'tick',
+                'symbol': symbol,
+                'ltp': ltp,
+                'bar': bar.as_dict(),
+            }
+            binary = encode_wire_frame([bar.encode()])
+            self._broadcast(message, ALL_SYMBOLS_GROUP, binary, exchange_ms)
+            if symbol.upper() in self._symbol_groups:
+                self._broadcast(
+                    message, symbol_group(symbol), binary, exchange_ms
+                )
+        self.metrics.on_tick(
+            slot,
+            mono,
+            mono + self._wall_offset,
+            exchange_ms,
+            time.perf_counter() - started,
+        )
+
+    def _queue_rest_check(self, slot: int, bar_time: int) -> None:
+        if not self._rest_check or self._rest_interval is None:
+            return
+        with self._rest_lock:
+            # One fetch per symbol: a newer partial bar replaces a queued older
+            # one.
+            self._rest_pending[slot] = bar_time
+            if self._rest_worker is None:
+                self._rest_worker = threading.Thread(
+                    target=self._run_rest_checks,
+                    name='live-bar-rest-check',
+                    daemon=True,
+                )
+                self._rest_worker.start()
+
+    def _run_rest_checks(self) -> None:
+        """
+        Fetch the REST candle for each queued bar (paced by the candle client).
+        """
+        while True:
+            with self._rest_lock:
+                if not self._rest_pending:
+                    # Cleared under the lock, so the next queued check starts a
+                    # new worker.
+                    self._rest_worker = None
+                    return
+                slot = next(iter(self._rest_pending))
+                bar_time = self._rest_pending.pop(slot)
+            bar = self._slots[slot]
+            if bar.time != bar_time or not bar.partial:
+                continue
+            try:
+                patch = rest_bar(bar.symbol, bar_time, self._rest_interval)
+            except Exception as exc:
+                logger.warning(
+                    'REST cross-check failed for %s: %s',
+                    bar.symbol,
+                    format_broker_error(exc),
+                )
+                continue
+            if patch is not None:
+                self._rest_patches[slot] = patch
+
+    def _apply_rest_patch(self, slot: int, patch: dict) -> None:
+        """
+        Merge the REST candle (fetched at the primary frame's interval) into
+        the slot's primary bar: REST has the true open and the ticks this
+        process missed; the stream may be ahead of it since.
+
+        Only the primary (5m) bar, which strategies and trailing stops read,
+        is patched. Other frames opened partial stay partial until they
+        close; their closes carry partial=True, so closed_bars() and bar
+        listeners skip them.
+        """
+        bar = self._slots[slot]
+        if bar.time != patch['time']:
+            return
+        bar.open = patch['open']
+        bar.high = max(bar.high, patch['high'])
+        bar.low = min(bar.low, patch['low'])
+        bar.volume = max(bar.volume, patch['volume'])
+        bar.partial = False
+
+    def checkpoint(self) -> int:
+        """
+        Write every forming bar to the live bar store; returns the number of
+        symbols saved.
+        """
+        bars: Dict[str, dict] = {}
+        volumes: Dict[str, int] = {}
+        for slot, primary in enumerate(list(self._slots)):
+            frames = {}
+            for frame, interval in enumerate(self._intervals):
+                bar = self._frame_bars[frame][slot]
+                if bar.time:
+                    frames[interval] = bar.as_dict()
+            if not frames:
+                continue
+            bars[primary.token] = {'symbol': primary.symbol, 'frames': frames}
+            if self._day_volume[slot]:
+                volumes[primary.token] = self._day_volume[slot]
+        if bars:
+            write_checkpoint(bars, volumes, self._clock())
+        return len(bars)
+
+    def _ensure_publisher(self) -> None:
+        with self._publisher_lock:
+            if (
+                self._publisher
+                and self._publisher.is_alive()
+                and not self._publisher_stop.is_set()
+            ):
+                return
+            self._publisher_stop = threading.Event()
+            self._publisher = threading.Thread(
+                target=self._run_publisher,
+                args=(self._publisher_stop,),
+                name='chart-publisher',
+                daemon=True,
+            )
+            self._publisher.start()
+
+    def _stop_publisher(self) -> None:
+        with self._publisher_lock:
+            self._publisher_stop.set()
+        self._wake_bridge()
+
+    def _run_publisher(self, stop: threading.Event) -> None:
+        try:
+            asyncio.run(self._publish_loop(stop))
+        except Exception as exc:
+            logger.warning('Chart publisher stopped: %s', exc)
+
+    async def _publish_loop(self, stop: threading.Event) -> None:
+        """
+        Flush coalesced ticks at LIVE_FLUSH_HZ and drain the outbox to the
+        channel layer.
+        """
+        loop = asyncio.get_running_loop()
+        layer = get_channel_layer()
+        self._bridge_wake = asyncio.Event()
+        self._bridge_loop = loop
+        interval = 1.0 / self._flush_hz if self._flush_hz > 0 else None
+        next_flush = loop.time() + (interval or 0.0)
+        health_every = metrics_interval_seconds()
+        next_health = loop.time() + health_every
+        checkpoint_every = self._checkpoint_every
+        next_checkpoint = loop.time() + checkpoint_every
+        try:
+            while not stop.is_set():
+                self._bridge_idle = True
+                # Re-check after flagging idle so a concurrent append is not
+                # missed.
+                if not self._outbox:
+                    timeout = (
+                        max(0.0, next_flush - loop.time()) if interval else 0.5
+                    )
+                    timeout = min(timeout, max(0.0, next_health - loop.time()))
+                    if checkpoint_every:
+                        timeout = min(
+                            timeout, max(0.0, next_checkpoint - loop.time())
+                        )
+                    try:
+                        await asyncio.wait_for(
+                            self._bridge_wake.wait(), timeout=timeout
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                self._bridge_idle = False
+                self._bridge_wake.clear()
+                if interval and loop.time() >= next_flush:
+                    next_flush = max(next_flush + interval, loop.time())
+                    try:
+                        self.flush()
+                    except Exception as exc:
+                        logger.warning('Chart publisher flush failed: %s', exc)
+                if loop.time() >= next_health:
+                    next_health = loop.time() + health_every
+                    try:
+                        self._publish_health()
+                    except Exception as exc:
+                        logger.warning('Feed health publish failed: %s', exc)
+                if checkpoint_every and loop.time() >= next_checkpoint:
+                    next_checkpoint = loop.time() + checkpoint_every
+                    try:
+                        self.checkpoint()
+                    except Exception as exc:
+                        logger.warning('Live bar checkpoint failed: %s', exc)
+                await self._drain_outbox(layer)
+        finally:
+            self._bridge_loop = None
+            self._bridge_idle = False
+
+    async def _drain_outbox(self, layer) -> None:
+        outbox = self._outbox
+        while outbox:
+            try:
+                enqueued_at, group, event, exchange_ms = outbox.popleft()
+            except IndexError:
+                return
+            if layer is None:
+                continue
+            try:
+                await layer.group_send(group, event)
+                ok = True
+            except Exception as exc:
+                logger.warning('Channel broadcast failed: %s', exc)
+                ok = False
+            self.metrics.on_published(
+                time.perf_counter() - enqueued_at, exchange_ms, ok
+            )
+
+    def _wake_bridge(self) -> None:
+        loop, wake = self._bridge_loop, self._bridge_wake
+        if loop is None or wake is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass
+
+    def latency_stats(self) -> dict:
+        """Latency histograms of the tick path plus the publish queue state."""
+        health = self.feed_health()
+        return {
+            **health['latency_ms'],
+            'publish_queue': health['publish_queue'],
+        }
+
+    def feed_health(self) -> dict:
+        """
+        Full metrics snapshot: rates, counters, staleness, latency,
+        connections.
+        """
+        return self.metrics.snapshot(
+            symbols=[bar.symbol for bar in list(self._slots)],
+            wanted=self._wanted_symbols(),
+            connections=self.connection_stats(),
+            queue_depth=len(self._outbox),
+            queue_size=self._outbox.maxlen or 0,
+            dropped=self._outbox_dropped,
+        )
+
+    def _publish_health(self) -> None:
+        """
+        Persist the snapshot for other processes and put a summary on a status
+        frame.
+        """
+        snapshot = self.feed_health()
+        write_snapshot(snapshot)
+        if not self._stream_is_active():
+            # disconnected / reconnecting frames already describe the outage.
+            return
+        message = {
+            'type': 'status',
+            'message': 'degraded' if snapshot['degraded'] else 'live',
+            'symbols': sorted(self._wanted_symbols()),
+            'health': health_summary(snapshot),
+        }
+        if snapshot['degraded']:
+            message['detail'] = ', '.join(snapshot['reasons'])
+        self._broadcast(message)
+
+    def flush(self) -> int:
+        """
+        Send one 'ticks' frame with the latest bar of every changed symbol.
+        """
+        with self._pending_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, set()
+        items = []
+        encoded = []
+        symbol_groups = self._symbol_groups
+        exchange_ms = self.metrics.last_exchange_ms
+        oldest = min(
+            (exchange_ms[slot] for slot in pending if exchange_ms[slot]),
+            default=0,
+        )
+        for slot in pending:
+            bar = self._slots[slot]
+            item = {
+                'symbol': bar.symbol,
+                'ltp': bar.close,
+                'bar': bar.as_dict(),
             }
-        self._live_bars[symbol] = bar
+            wire = bar.encode()
+            items.append(item)
+            encoded.append(wire)
+            if bar.symbol.upper() in symbol_groups:
+                self._broadcast(
+                    {'type': 'ticks', 'items': [item]},
+                    symbol_group(bar.symbol),
+                    encode_wire_frame([wire]),
+                    exchange_ms[slot],
+                )
+        self._broadcast(
+            {'type': 'ticks', 'items': items},
+            ALL_SYMBOLS_GROUP,
+            encode_wire_frame(encoded),
+            oldest,
+        )
+        return len(items)
 
-        self._broadcast({
-            'type': 'tick',
-            'symbol': symbol,
-            'ltp': ltp,
-            'bar': bar,
-        })
+    def snapshot_event(
+        self,
+        symbols: Optional[List[str]] = None,
+        interval: int = BAR_INTERVAL_SECONDS,
+    ) -> Optional[dict]:
+        """
+        chart_message event with the current live bar of interval and LTP of
+        every symbol (or just symbols), for a client that has just connected.
+        """
+        if interval not in self._intervals:
+            return None
+        wanted = {s.upper() for s in symbols} if symbols is not None else None
+        items = []
+        encoded = []
+        for bar in list(self._frame_bars[self._intervals.index(interval)]):
+            if not bar.time or (
+                wanted is not None and bar.symbol.upper() not in wanted
+            ):
+                continue
+            items.append(
+                {'symbol': bar.symbol, 'ltp': bar.close, 'bar': bar.as_dict()}
+            )
+            encoded.append(bar.encode())
+        if not items:
+            return None
+        event = {
+            'type': 'chart_message',
+            'payload': {
+                'type': 'snapshot',
+                'interval': interval,
+                'items': items,
+            },
+        }
+        if interval == BAR_INTERVAL_SECONDS:
+            # Binary frames have no interval field, so other timeframes go as
+            # JSON.
+            event['binary'] = encode_wire_frame(encoded, WIRE_KIND_SNAPSHOT)
+        return event
+
+    def _on_bar_closed(
+        self, frame: int, slot: int, live: _LiveBar, received_at: float
+    ) -> None:
+        interval = self._intervals[frame]
+        symbol = live.symbol
+        bar = live.as_dict()
+        self.metrics.counters['bars_closed'] += 1
+        if not live.partial:
+            self._closed_bars[frame][slot].append(bar)
+        if self._recorder:
+            self._recorder.record_bar(
+                live.token, symbol, interval, bar, received_at
+            )
+        listeners = self._bar_listeners.get(interval)
+        if not listeners:
+            return
+        bar = {**bar, 'partial': live.partial}
+        for listener in listeners:
+            try:
+                listener(symbol, bar)
+            except Exception as exc:
+                logger.warning('Bar listener failed for %s: %s', symbol, exc)
 
-    def _on_angel_connection_lost(self, reason: str) -> None:
+    def _on_angel_connection_lost(
+        self, conn: _FeedConnection, reason: str, ws=None
+    ) -> None:
         with self._lock:
-            self._subscribed_tokens.clear()
-            self._broadcast({
-                'type': 'status',
-                'message': 'disconnected',
-                'detail': reason,
-            })
+            if conn.ws is not ws:
+                # A socket we already replaced or closed on purpose.
+                return
+            conn.subscribed.clear()
+            conn.opened = False
+            self.metrics.counters['disconnects'] += 1
+            if conn.standby:
+                logger.info('Angel WS %s standby lost: %s', conn.index, reason)
+                if self._client_count > 0:
+                    self._schedule_reconnect_locked(conn)
+                return
+            # Ticks missed while down: this shard's forming bars are incomplete
+            # and its next cumulative volume must not be booked to one bar.
+            self._mark_resync_locked(conn.tokens)
+            if self._failover_locked(conn):
+                return
+            if self._stream_is_active():
+                # The other shards keep streaming.
+                self._notify_live(
+                    f'Feed connection {conn.index + 1}/'
+                    f'{len(self._connections)} lost: {reason}',
+                )
+            else:
+                self._broadcast(
+                    {
+                        'type': 'status',
+                        'message': 'disconnected',
+                        'detail': reason,
+                    }
+                )
             if self._client_count > 0:
                 self._schedule_reconnect_locked(
-                    refresh_credentials=self._reconnect_attempts >= 1,
+                    conn,
+                    refresh_credentials=conn.reconnect_attempts >= 1,
                 )
 
-    def _cancel_reconnect_timer(self) -> None:
-        if self._reconnect_timer:
-            self._reconnect_timer.cancel()
-            self._reconnect_timer = None
+    def _mark_resync_locked(self, tokens) -> None:
+        for token in tokens:
+            slot = self._token_slots.get(token)
+            if slot is None:
+                continue
+            for bars in self._frame_bars:
+                bars[slot].partial = True
+            self._day_volume[slot] = 0
+            self._resync[slot] = True
 
-    def _schedule_reconnect(self) -> None:
-        with self._lock:
-            self._schedule_reconnect_locked(refresh_credentials=False)
+    def _failover_locked(self, lost: _FeedConnection) -> bool:
+        """
+        Move a dropped shard onto the open standby; the dropped one becomes the
+        standby.
+        """
+        standby = next(
+            (
+                c
+                for c in self._connections
+                if c.standby and c.opened and c.ws is not None
+            ),
+            None,
+        )
+        if standby is None or not lost.tokens or self._client_count <= 0:
+            return False
+        tokens = sorted(lost.tokens)
+        try:
+            standby.ws.subscribe(
+                SUBSCRIBE_CORRELATION_ID,
+                self._mode,
+                [{'exchangeType': NSE_CM, 'tokens': tokens}],
+            )
+        except Exception as exc:
+            logger.warning(
+                'Angel WS failover to %s failed: %s', standby.index, exc
+            )
+            return False
+        standby.standby = False
+        standby.tokens = set(tokens)
+        standby.subscribed = set(tokens)
+        lost.standby = True
+        lost.tokens = set()
+        self.metrics.counters['failovers'] += 1
+        logger.info(
+            'Angel WS %s failed over to %s (%s tokens)',
+            lost.index,
+            standby.index,
+            len(tokens),
+        )
+        self._notify_live(
+            f'Feed connection {lost.index + 1} failed over to standby'
+        )
+        # Re-open the dropped connection as the new standby, with the usual
+        # backoff.
+        self._schedule_reconnect_locked(lost)
+        return True
 
-    def _schedule_reconnect_locked(self, refresh_credentials: bool = False) -> None:
-        if self._client_count <= 0 or self._starting:
+    def _cancel_reconnect_timers(self) -> None:
+        for conn in self._connections:
+            conn.cancel_reconnect()
+
+    def _schedule_reconnect_locked(
+        self, conn: _FeedConnection, refresh_credentials: bool = False
+    ) -> None:
+        if (
+            self._client_count <= 0
+            or conn.starting
+            or not (conn.tokens or conn.standby)
+        ):
             return
-        if self._reconnect_timer:
+        if conn.reconnect_timer:
             return
 
-        self._reconnect_attempts += 1
+        conn.reconnect_attempts += 1
+        self.metrics.counters['reconnects'] += 1
         delay = min(
-            MIN_RECONNECT_SECONDS * self._reconnect_attempts,
+            MIN_RECONNECT_SECONDS * conn.reconnect_attempts,
             MAX_RECONNECT_BACKOFF_SECONDS,
         )
         logger.info(
-            'Scheduling Angel WS reconnect in %.0fs (attempt %s)',
+            'Scheduling Angel WS %s reconnect in %.0fs (attempt %s)',
+            conn.index,
             delay,
-            self._reconnect_attempts,
+            conn.reconnect_attempts,
         )
-        self._broadcast({
-            'type': 'status',
-            'message': 'reconnecting',
-            'detail': f'Retry in {int(delay)}s',
-        })
+        if not conn.standby and not self._stream_is_active():
+            self._broadcast(
+                {
+                    'type': 'status',
+                    'message': 'reconnecting',
+                    'detail': f'Retry in {int(delay)}s',
+                }
+            )
 
         def _reconnect():
             with self._lock:
-                self._reconnect_timer = None
-                if self._client_count <= 0:
+                conn.reconnect_timer = None
+                if self._client_count <= 0 or not (
+                    conn.tokens or conn.standby
+                ):
                     return
-                if self._stream_is_active():
+                if conn.is_active():
                     self._notify_live()
                     return
-                self._start_stream_locked(refresh_credentials=refresh_credentials)
+                self._start_connection_locked(
+                    conn, refresh_credentials=refresh_credentials
+                )
 
-        self._reconnect_timer = threading.Timer(delay, _reconnect)
-        self._reconnect_timer.daemon = True
-        self._reconnect_timer.start()
+        conn.reconnect_timer = threading.Timer(delay, _reconnect)
+        conn.reconnect_timer.daemon = True
+        conn.reconnect_timer.start()
+
+    def _broadcast(
+        self,
+        message: dict,
+        group: str = CHANNEL_GROUP,
+        binary: Optional[bytes] = None,
+        exchange_ms: int = 0,
+    ) -> None:
+        """
+        Queue a frame for the publisher task; never blocks the caller.
+        binary is the pre-encoded frame for sockets that negotiated it;
+        exchange_ms is the oldest exchange time in a tick frame (for lag
+        metrics).
+        """
+        event = {'type': 'chart_message', 'payload': message}
+        if binary is not None:
+            event['binary'] = binary
+        if len(self._outbox) == self._outbox.maxlen:
+            self._outbox_dropped += 1
+        self._outbox.append((time.perf_counter(), group, event, exchange_ms))
+        if self._bridge_loop is None:
+            self._ensure_publisher()
+        elif self._bridge_idle:
+            self._wake_bridge()
+
+
+def start_live_stream(
+    symbols: List[str], client_id: Optional[str] = None
+) -> str:
+    return MarketStreamManager.instance().register_client(symbols, client_id)
 
-    def _broadcast(self, message: dict) -> None:
-        layer = get_channel_layer()
-        if not layer:
-            return
-        try:
-            async_to_sync(layer.group_send)(
-                CHANNEL_GROUP,
-                {'type': 'chart_message', 'payload': message},
-            )
-        except Exception as exc:
-            logger.warning('Channel broadcast failed: %s', exc)
 
+def stop_live_stream(client_id: str) -> None:
+    MarketStreamManager.instance().unregister_client(client_id)
+
+
+def notify_watchlist_changed(symbols: Optional[List[str]] = None) -> None:
+    """
+    Push a watchlist change to chart consumers and the feed process so the
+    upstream subscription is updated in place (no reconnect / re-login).
+    """
+    if symbols is None:
+        from api.models import WatchlistTicker
+
+        symbols = list(
+            WatchlistTicker.objects.filter(is_active=True)
+            .order_by('symbol')
+            .values_list('symbol', flat=True)
+        )
+    layer = get_channel_layer()
+    if not layer:
+        return
+    try:
+        async_to_sync(layer.group_send)(
+            CHANNEL_GROUP,
+            {'type': 'watchlist.changed', 'symbols': symbols},
+        )
+        async_to_sync(layer.group_send)(
+            CONTROL_GROUP,
+            {'type': 'feed.watchlist', 'symbols': symbols},
+        )
+    except Exception as exc:
+        logger.warning('Watchlist change broadcast failed: %s', exc)
 
-def start_live_stream(symbols: List[str]) -> None:
-    MarketStreamManager.instance().register_client(symbols)
 
+def send_feed_interest(
+    client_id: str, symbols: Optional[List[str]], explicit: bool = False
+) -> None:
+    """
+    Ask the run_market_feed process to stream symbols for client_id; None drops
+    the client.
+    """
+    layer = get_channel_layer()
+    if not layer:
+        return
+    try:
+        async_to_sync(layer.group_send)(
+            CONTROL_GROUP,
+            {
+                'type': 'feed.interest',
+                'client': client_id,
+                'symbols': symbols,
+                'explicit': explicit,
+            },
+        )
+    except Exception as exc:
+        logger.warning('Feed interest request failed: %s', exc)
+
+
+def handle_feed_control(manager: MarketStreamManager, message: dict) -> None:
+    """
+    Apply an interest change or answer a snapshot request from another process.
+    """
+    if message.get('type') == 'feed.snapshot':
+        event = manager.snapshot_event(
+            message.get('symbols'),
+            int(message.get('interval') or BAR_INTERVAL_SECONDS),
+        )
+        if event and message.get('reply_to'):
+            async_to_sync(get_channel_layer().send)(message['reply_to'], event)
+        return
+    if message.get('type') == 'feed.watchlist':
+        manager.set_interest(
+            WATCHLIST_CLIENT_ID,
+            list(message.get('symbols') or []),
+            explicit=False,
+        )
+        return
+    if message.get('type') != 'feed.interest' or not message.get('client'):
+        return
+    symbols = message.get('symbols')
+    if symbols is None:
+        manager.unregister_client(message['client'])
+    else:
+        manager.set_interest(
+            message['client'], list(symbols), bool(message.get('explicit'))
+        )
+
+
+def serve_feed_control(
+    manager: MarketStreamManager, stop: threading.Event
+) -> None:
+    """
+    Blocking: relay CONTROL_GROUP messages to the manager until stop is set.
+    """
+
+    async def _serve():
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        joined_at = 0.0
+        try:
+            while not stop.is_set():
+                if time.monotonic() - joined_at > 600:
+                    # Re-join well inside the layer's group expiry.
+                    await layer.group_add(CONTROL_GROUP, channel)
+                    joined_at = time.monotonic()
+                try:
+                    message = await asyncio.wait_for(
+                        layer.receive(channel), timeout=5.0
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                try:
+                    await asyncio.to_thread(
+                        handle_feed_control, manager, message
+                    )
+                except Exception as exc:
+                    logger.warning('Feed control message failed: %s', exc)
+        finally:
+            await layer.group_discard(CONTROL_GROUP, channel)
 
-def stop_live_stream() -> None:
-    MarketStreamManager.instance().unregister_client()
+    asyncio.run(_serve())
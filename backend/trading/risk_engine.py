@@ -0,0 +1,214 @@
+"""
+In-memory portfolio risk for the bot process.
+
+Seeded once from rmsLimit + the position book, then kept current from the
+bot's own entries, the positions it already fetches each pass, managed SL
+levels and live ticks. Sizing reads deployable capital from here instead of
+calling rmsLimit on every pass, so entries placed in the same bar see each
+other's exposure immediately.
+
+Deployable capital is the budget less the notional blocked at entry prices
+(what the broker holds back), not the marked value, so price moves in open
+positions do not change how much is left for new entries.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+
+from trading.position_utils import (
+    _row_float,
+    equity_base_symbol,
+    net_position_qty,
+    position_tradingsymbol,
+)
+
+
+def capital_resync_seconds() -> float:
+    """
+    How often broker cash is re-read to correct drift
+    (RISK_CAPITAL_RESYNC_SECONDS).
+    """
+    try:
+        return max(
+            60.0, float(os.environ.get('RISK_CAPITAL_RESYNC_SECONDS', '1800'))
+        )
+    except ValueError:
+        return 1800.0
+
+
+class _Holding:
+    __slots__ = ('qty', 'avg_price', 'mark', 'stop')
+
+    def __init__(
+        self, qty: int, avg_price: float, mark: float, stop: Optional[float]
+    ) -> None:
+        self.qty = qty
+        self.avg_price = avg_price
+        self.mark = mark
+        self.stop = stop
+
+    def risk_to_stop(self) -> float:
+        if self.stop is None or self.qty == 0:
+            return 0.0
+        if self.qty > 0:
+            return max(0.0, self.mark - self.stop) * self.qty
+        return max(0.0, self.stop - self.mark) * -self.qty
+
+
+class PortfolioRiskEngine:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._holdings: Dict[str, _Holding] = {}
+        # Cash plus notional blocked at entry when capital was last read.
+        self._budget = 0.0
+        self._synced_at = 0.0
+
+    # ── Seeding / reconciliation ───────────────────────────────────────────
+
+    def sync_capital(
+        self, capital: float, positions: pd.DataFrame, age: float = 0.0
+    ) -> None:
+        """
+        Reset from broker cash; cash already excludes the open positions'
+        notional. age is how long ago the cash was read (a pre-market read
+        is seeded with positions=None and resyncs on the usual schedule).
+        """
+        self.reconcile(positions)
+        with self._lock:
+            self._budget = float(capital) + self._blocked_locked()
+            self._synced_at = time.monotonic() - max(0.0, age)
+
+    def needs_capital_sync(self) -> bool:
+        return (
+            not self._synced_at
+            or time.monotonic() - self._synced_at >= capital_resync_seconds()
+        )
+
+    def reconcile(self, positions: pd.DataFrame) -> None:
+        """
+        Rebuild holdings from the position book the bot already fetched this
+        pass.
+        """
+        from api.models import ManagedPosition
+
+        stops = {
+            mp.symbol.upper(): mp.current_sl
+            for mp in ManagedPosition.objects.filter(is_active=True).only(
+                'symbol', 'current_sl'
+            )
+        }
+        holdings: Dict[str, _Holding] = {}
+        if positions is not None and not positions.empty:
+            for _, row in positions.iterrows():
+                qty = net_position_qty(row)
+                if qty == 0:
+                    continue
+                base = equity_base_symbol(position_tradingsymbol(row))
+                if not base:
+                    continue
+                if qty > 0:
+                    avg = _row_float(
+                        row,
+                        'buyavgprice',
+                        'buyAvgPrice',
+                        'netprice',
+                        'avgnetprice',
+                    )
+                else:
+                    avg = _row_float(
+                        row,
+                        'sellavgprice',
+                        'sellAvgPrice',
+                        'netprice',
+                        'avgnetprice',
+                    )
+                mark = _row_float(row, 'ltp', 'LTP') or avg
+                holdings[base] = _Holding(qty, avg, mark, stops.get(base))
+        with self._lock:
+            for base, holding in holdings.items():
+                # Keep a fresher tick mark than the position book's LTP.
+                previous = self._holdings.get(base)
+                if (
+                    previous is not None
+                    and previous.qty == holding.qty
+                    and previous.mark
+                ):
+                    holding.mark = previous.mark
+            self._holdings = holdings
+
+    # ── Live updates ───────────────────────────────────────────────────────
+
+    def on_entry(
+        self, symbol: str, side: str, quantity: int, price: float, stop: float
+    ) -> None:
+        signed = quantity if side == 'BUY' else -quantity
+        base = equity_base_symbol(symbol)
+        with self._lock:
+            holding = self._holdings.get(base)
+            if holding is None:
+                self._holdings[base] = _Holding(signed, price, price, stop)
+                return
+            new_qty = holding.qty + signed
+            if new_qty and (holding.qty > 0) == (new_qty > 0) == (signed > 0):
+                holding.avg_price = (
+                    holding.avg_price * abs(holding.qty) + price * quantity
+                ) / abs(new_qty)
+            elif new_qty and (holding.qty > 0) != (new_qty > 0):
+                # Flipped through flat: the remainder was opened at this price.
+                holding.avg_price = price
+            holding.qty = new_qty
+            holding.mark = price
+            holding.stop = stop
+            if new_qty == 0:
+                del self._holdings[base]
+
+    def on_stop_moved(self, symbol: str, stop: float) -> None:
+        with self._lock:
+            holding = self._holdings.get(equity_base_symbol(symbol))
+            if holding is not None:
+                holding.stop = stop
+
+    def on_tick(self, symbol: str, ltp: float, _bar: dict = None) -> None:
+        holding = self._holdings.get(symbol.upper())
+        if holding is not None:
+            holding.mark = ltp
+
+    # ── Readouts ───────────────────────────────────────────────────────────
+
+    def _gross_locked(self) -> float:
+        return sum(abs(h.qty) * h.mark for h in self._holdings.values())
+
+    def _blocked_locked(self) -> float:
+        return sum(abs(h.qty) * h.avg_price for h in self._holdings.values())
+
+    def sizing_capital(self) -> float:
+        """
+        Free cash for new entries (same meaning as rmsLimit availablecash).
+        """
+        with self._lock:
+            return max(0.0, self._budget - self._blocked_locked())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            gross = self._gross_locked()
+            return {
+                'positions': len(self._holdings),
+                'gross_exposure': round(gross, 2),
+                'net_exposure': round(
+                    sum(h.qty * h.mark for h in self._holdings.values()), 2
+                ),
+                'open_risk': round(
+                    sum(h.risk_to_stop() for h in self._holdings.values()), 2
+                ),
+                'unprotected': sorted(
+                    s for s, h in self._holdings.items() if h.stop is None
+                ),
+                'deployable_capital': round(
+                    max(0.0, self._budget - self._blocked_locked()), 2
+                ),
+            }
@@ -12,6 +12,159 @@ from trading.utils import token_lookup, Colors, calculate_quantity
 
 
 class OpeningRangeBreakout(AngelOneClient):
+    # Shard workers leave orphan cleanup / trailing stops to the coordinator
+    # and size entries from the shared capital ledger instead of rmsLimit.
+    run_housekeeping: bool = True
+    capital_ledger_session_id: Optional[int] = None
+    # Set by the bot loop; tracks exposure so sizing skips rmsLimit each pass.
+    _risk_engine = None
+    # Live feed with volume; when set, 5m candles come from streamed bars.
+    _candle_stream = None
+    # Tick-driven TrailingStopEngine; the 5m pass skips the symbols it covers.
+    _trailing_engine = None
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Closed streamed-path 5m rows per ticker, seeded from the last REST
+        # fetch.
+        self._candle_base: Dict[str, list] = {}
+        # Prior days' 5m rows from the pre-market warm-up.
+        self._history_candles: Dict[str, list] = {}
+
+    def _sizing_capital(self) -> float:
+        if self.capital_ledger_session_id is not None:
+            from trading.bot_shards import ledger_available_capital
+
+            return ledger_available_capital(self.capital_ledger_session_id)
+        if self._risk_engine is not None:
+            return self._risk_engine.sizing_capital()
+        return self.get_trade_capital()
+
+    def _sync_risk_engine(self, positions: pd.DataFrame) -> None:
+        """
+        Reconcile from this pass's positions; re-read broker cash only when
+        stale.
+        """
+        risk = self._risk_engine
+        if risk is None:
+            return
+        try:
+            if (
+                self.capital_ledger_session_id is None
+                and risk.needs_capital_sync()
+            ):
+                risk.sync_capital(self.get_trade_capital(), positions)
+            else:
+                risk.reconcile(positions)
+        except Exception as exc:
+            print(f'Risk engine sync failed: {exc}')
+
+    def _reserve_entry_capital(self, ticker: str, amount: float) -> bool:
+        if self.capital_ledger_session_id is None:
+            return True
+        from trading.bot_shards import reserve_capital
+
+        if reserve_capital(self.capital_ledger_session_id, amount):
+            return True
+        print(
+            f'SKIP {ticker}: shared capital exhausted (needs {amount:.0f} Rs)'
+        )
+        return False
+
+    def _release_entry_capital(self, amount: float) -> None:
+        if self.capital_ledger_session_id is None:
+            return
+        from trading.bot_shards import release_capital
+
+        release_capital(self.capital_ledger_session_id, amount)
+
+    def _streamed_candles(
+        self, ticker: str, now_ist: dt.datetime
+    ) -> Optional[list]:
+        """
+        Candle rows from the last REST fetch extended with the feed's closed
+        5m bars and the forming one. None when the feed has a gap or is not on
+        the current bar yet, so the caller falls back to REST.
+        """
+        stream = self._candle_stream
+        base = self._candle_base.get(ticker)
+        if stream is None or not base:
+            return None
+        from trading.broker import IST
+        from trading.market_stream import BAR_INTERVAL_SECONDS, bucket_start
+
+        live = stream.live_bar(ticker)
+        if live is None or live['time'] != bucket_start(
+            now_ist.timestamp(), BAR_INTERVAL_SECONDS
+        ):
+            return None
+        expected = (
+            int(pd.Timestamp(base[-1][0]).timestamp()) + BAR_INTERVAL_SECONDS
+        )
+        rows = []
+        for bar in stream.closed_bars(ticker) + [live]:
+            if bar['time'] < expected:
+                continue
+            if bar['time'] != expected:
+                return None
+            rows.append(
+                [
+                    dt.datetime.fromtimestamp(bar['time'], IST).isoformat(),
+                    bar['open'],
+                    bar['high'],
+                    bar['low'],
+                    bar['close'],
+                    bar['volume'],
+                ]
+            )
+            expected += BAR_INTERVAL_SECONDS
+        return base + rows
+
+    def _recent_candles(
+        self, ticker: str, exchange: str, now_ist: dt.datetime
+    ) -> pd.DataFrame:
+        """
+        Last ~4 days of 5m candles. With a pre-market warm-up only today's bars
+        are fetched and appended to the prefetched history; with a candle
+        stream, REST is only hit when the streamed bars cannot continue it.
+        """
+        rows = self._streamed_candles(ticker, now_ist)
+        if rows is None:
+            rows = self._rest_candles(ticker, exchange, now_ist)
+        df_data = pd.DataFrame(
+            rows,
+            columns=['date', 'open', 'high', 'low', 'close', 'volume'],
+        )
+        df_data.set_index('date', inplace=True)
+        df_data.index = pd.to_datetime(df_data.index)
+        df_data.index = df_data.index.tz_localize(None)
+        return df_data
+
+    def _rest_candles(
+        self, ticker: str, exchange: str, now_ist: dt.datetime
+    ) -> list:
+        # Paces getCandleData across tickers.
+        time.sleep(0.4)
+        history = self._history_candles.get(ticker)
+        if history:
+            fromdate = now_ist.replace(
+                hour=9, minute=15, second=0, microsecond=0
+            )
+        else:
+            fromdate = now_ist - dt.timedelta(days=4)
+        params = {
+            'exchange': exchange,
+            'symboltoken': token_lookup(ticker, self.instrument_list),
+            'interval': 'FIVE_MINUTE',
+            'fromdate': fromdate.strftime('%Y-%m-%d %H:%M'),
+            'todate': now_ist.strftime('%Y-%m-%d %H:%M'),
+        }
+        hist_data = self.smart_api.getCandleData(params)
+        rows = list(history or []) + list(hist_data['data'] or [])
+        if self._candle_stream is not None and len(rows) > 1:
+            # Closed bars only; the last row is the one still forming.
+            self._candle_base[ticker] = rows[:-1]
+        return rows
 
     def _record_trailing_position(
         self,
@@ -52,16 +205,27 @@ class OpeningRangeBreakout(AngelOneClient):
         sl_strategy: str,
         exchange: str,
     ) -> None:
-        order_ids = self.place_bracket_order(
-            self.instrument_list, ticker, side, quantity, sl, tgt, exchange
-        )
+        if not self._reserve_entry_capital(ticker, quantity * ltp):
+            return
+        try:
+            order_ids = self.place_bracket_order(
+                self.instrument_list, ticker, side, quantity, sl, tgt, exchange
+            )
+        except Exception:
+            self._release_entry_capital(quantity * ltp)
+            raise
         if not order_ids:
+            # Rejected entry: other shards may use the capital until the next
+            # refresh.
+            self._release_entry_capital(quantity * ltp)
             return
 
         color = Colors.GREEN if side == 'BUY' else Colors.RED
         print(f"{color}{side} {quantity} x {ticker} SL={sl} TGT={tgt}{Colors.RESET}")
 
         self._record_trailing_position(ticker, side, quantity, ltp, sl, order_ids)
+        if self._risk_engine is not None:
+            self._risk_engine.on_entry(ticker, side, quantity, ltp, sl)
 
     def orb_strat(
         self,
@@ -75,10 +239,13 @@ class OpeningRangeBreakout(AngelOneClient):
         now_ist = dt.datetime.now(IST)
 
         # Run first — must not depend on capital fetch or broker errors later in the loop
-        self.cancel_orphan_exit_orders(positions)
+        if self.run_housekeeping:
+            self.cancel_orphan_exit_orders(positions)
 
-        capital = self.get_trade_capital()
-        print(f'Current capital: {capital} Rs')
+        self._sync_risk_engine(positions)
+        print(f'Current capital: {self._sizing_capital()} Rs')
+        if self._risk_engine is not None:
+            print(f'Portfolio risk: {self._risk_engine.snapshot()}')
 
         from api.models import BotSettings
         bot_settings = BotSettings.get_singleton()
@@ -89,7 +256,16 @@ class OpeningRangeBreakout(AngelOneClient):
         print(f'Risk per trade: {bot_settings.risk_percent}%')
         print(f'Max capital per trade: {usage_pct}%')
 
-        update_trailing_stops(self, positions, self.instrument_list, exchange)
+        if self.run_housekeeping:
+            engine = self._trailing_engine
+            update_trailing_stops(
+                self,
+                positions,
+                self.instrument_list,
+                exchange,
+                skip_symbols=engine.covered_symbols() if engine else None,
+                risk_engine=self._risk_engine,
+            )
 
         from trading.position_utils import (
             equity_base_symbol,
@@ -126,23 +302,8 @@ class OpeningRangeBreakout(AngelOneClient):
             ]
 
         for ticker in active_tickers:
-            time.sleep(0.4)
-            params = {
-                "exchange": exchange,
-                "symboltoken": token_lookup(ticker, self.instrument_list),
-                "interval": "FIVE_MINUTE",
-                "fromdate": (now_ist - dt.timedelta(days=4)).strftime("%Y-%m-%d %H:%M"),
-                "todate": now_ist.strftime("%Y-%m-%d %H:%M"),
-            }
             try:
-                hist_data = self.smart_api.getCandleData(params)
-                df_data = pd.DataFrame(
-                    hist_data["data"],
-                    columns=["date", "open", "high", "low", "close", "volume"],
-                )
-                df_data.set_index("date", inplace=True)
-                df_data.index = pd.to_datetime(df_data.index)
-                df_data.index = df_data.index.tz_localize(None)
+                df_data = self._recent_candles(ticker, exchange, now_ist)
                 df_data["avg_vol"] = df_data["volume"].rolling(10).mean().shift(1)
 
                 volume_breakout = df_data["volume"].iloc[-2] >= df_data["avg_vol"].iloc[-2]
@@ -170,8 +331,12 @@ class OpeningRangeBreakout(AngelOneClient):
                             print(f"Invalid SL/target for {ticker} (BUY), skipping")
                             continue
                         sl, tgt = levels
+                        # Re-read per entry so earlier fills this bar are
+                        # counted.
                         quantity = calculate_quantity(
-                            capital, ltp, sl,
+                            self._sizing_capital(),
+                            ltp,
+                            sl,
                             risk_pct=risk_pct,
                             max_capital_usage_percent=usage_pct,
                         )
@@ -189,8 +354,12 @@ class OpeningRangeBreakout(AngelOneClient):
                             print(f"Invalid SL/target for {ticker} (SELL), skipping")
                             continue
                         sl, tgt = levels
+                        # Re-read per entry so earlier fills this bar are
+                        # counted.
                         quantity = calculate_quantity(
-                            capital, ltp, sl,
+                            self._sizing_capital(),
+                            ltp,
+                            sl,
                             risk_pct=risk_pct,
                             max_capital_usage_percent=usage_pct,
                         )
@@ -0,0 +1,285 @@
+"""
+Latest-price bus for the bot process.
+
+The bot reads LTPs from here before calling ltpData. Prices arrive either
+in-process (tick listener on this process's MarketStreamManager) or over Redis
+pub/sub from the run_market_feed process when LIVE_FEED_PROCESS=external. A
+price older than TICK_BUS_MAX_AGE_SECONDS counts as stale and the caller falls
+back to REST.
+
+Over Redis the batches also carry closed 5m bars (low / high), and the bus
+calls its own tick and bar listeners, so the bot's trailing engine can run on
+the feed process's stream instead of opening Angel sockets itself.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TICK_BUS_CHANNEL = 'trademaster.ticks'
+PUBLISH_INTERVAL_SECONDS = 0.25
+
+
+def tick_bus_mode() -> str:
+    """
+    TICK_BUS: auto (redis with an external feed, else local), local, redis or
+    off.
+    """
+    mode = os.environ.get('TICK_BUS', 'auto').strip().lower()
+    if mode == 'auto':
+        from django.conf import settings
+
+        return 'redis' if settings.LIVE_FEED_PROCESS == 'external' else 'local'
+    return mode if mode in ('local', 'redis', 'off') else 'local'
+
+
+def tick_max_age_seconds() -> float:
+    """Prices older than this fall back to REST (TICK_BUS_MAX_AGE_SECONDS)."""
+    try:
+        return max(
+            0.5, float(os.environ.get('TICK_BUS_MAX_AGE_SECONDS', '15'))
+        )
+    except ValueError:
+        return 15.0
+
+
+def _redis_url() -> str:
+    from django.conf import settings
+
+    return settings.CHANNELS_REDIS_URL or settings.CELERY_BROKER_URL
+
+
+class TickBus:
+    """Latest price per symbol with its local receive time."""
+
+    mode = 'local'
+
+    def __init__(self) -> None:
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self.max_age = tick_max_age_seconds()
+        self.hits = 0
+        self.misses = 0
+        self._tick_listeners: List[
+            Callable[[str, float, Optional[dict]], None]
+        ] = []
+        self._bar_listeners: List[Callable[[str, dict], None]] = []
+
+    def add_tick_listener(
+        self, listener: Callable[[str, float, Optional[dict]], None]
+    ) -> None:
+        """
+        Call listener(symbol, ltp, None) for every price received over Redis.
+        """
+        self._tick_listeners.append(listener)
+
+    def add_bar_listener(self, listener: Callable[[str, dict], None]) -> None:
+        """
+        Call listener(symbol, bar) for every closed 5m bar received over Redis.
+        """
+        self._bar_listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        for listeners in (self._tick_listeners, self._bar_listeners):
+            if listener in listeners:
+                listeners.remove(listener)
+
+    def publish(self, symbol: str, ltp: float, _bar=None) -> None:
+        """
+        Tick listener signature, so it can hang off MarketStreamManager
+        directly.
+        """
+        self._prices[symbol.upper()] = (ltp, time.monotonic())
+
+    def latest(self, symbol: str) -> Optional[float]:
+        """Fresh LTP for symbol, or None (caller uses REST)."""
+        entry = self._prices.get(symbol.upper())
+        if entry is None or time.monotonic() - entry[1] > self.max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            'mode': self.mode,
+            'symbols': len(self._prices),
+            'fresh': sum(
+                1
+                for _, at in list(self._prices.values())
+                if now - at <= self.max_age
+            ),
+            'hits': self.hits,
+            'rest_fallbacks': self.misses,
+        }
+
+
+class RedisTickBus(TickBus):
+    """
+    Subscribes to the feed process's price batches on a background thread.
+    """
+
+    mode = 'redis'
+
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self._url = url
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name='tick-bus', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        import redis
+
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = redis.Redis.from_url(self._url).pubsub(
+                    ignore_subscribe_messages=True
+                )
+                pubsub.subscribe(TICK_BUS_CHANNEL)
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        self._apply(message['data'])
+            except Exception as exc:
+                logger.warning('Tick bus subscription failed: %s', exc)
+                self._stop.wait(5.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _apply(self, raw) -> None:
+        try:
+            message = json.loads(raw)
+            prices = message['prices']
+        except (ValueError, KeyError, TypeError):
+            return
+        now = time.monotonic()
+        for symbol, ltp in prices.items():
+            self._prices[symbol.upper()] = (float(ltp), now)
+        for symbol, bar in (message.get('bars') or {}).items():
+            self._notify(self._bar_listeners, symbol, bar)
+        for symbol, ltp in prices.items():
+            self._notify(self._tick_listeners, symbol, float(ltp), None)
+
+    @staticmethod
+    def _notify(listeners, symbol: str, *args) -> None:
+        for listener in list(listeners):
+            try:
+                listener(symbol, *args)
+            except Exception as exc:
+                logger.warning(
+                    'Tick bus listener failed for %s: %s', symbol, exc
+                )
+
+
+class RedisTickPublisher:
+    """
+    Feed-process side: collects the latest LTP per symbol and the closed 5m
+    bars from the manager's listeners and publishes one batch every
+    PUBLISH_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, url: str) -> None:
+        self._url = url
+        self._pending: Dict[str, float] = {}
+        self._bars: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def on_tick(self, symbol: str, ltp: float, _bar=None) -> None:
+        with self._lock:
+            self._pending[symbol] = ltp
+
+    def on_bar(self, symbol: str, bar: dict) -> None:
+        if bar.get('partial'):
+            return
+        with self._lock:
+            self._bars[symbol] = {
+                'time': bar['time'],
+                'low': bar['low'],
+                'high': bar['high'],
+            }
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name='tick-bus-publisher', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        import redis
+
+        client = redis.Redis.from_url(self._url)
+        while not self._stop.wait(PUBLISH_INTERVAL_SECONDS):
+            with self._lock:
+                if not self._pending and not self._bars:
+                    continue
+                prices, self._pending = self._pending, {}
+                bars, self._bars = self._bars, {}
+            message = {'at': time.time(), 'prices': prices}
+            if bars:
+                message['bars'] = bars
+            try:
+                client.publish(TICK_BUS_CHANNEL, json.dumps(message))
+            except Exception as exc:
+                logger.warning('Tick bus publish failed: %s', exc)
+
+
+def open_tick_bus() -> Optional[TickBus]:
+    """
+    The bus for this bot process per TICK_BUS, started; None when disabled.
+    """
+    mode = tick_bus_mode()
+    if mode == 'off':
+        return None
+    if mode == 'redis':
+        bus = RedisTickBus(_redis_url())
+        bus.start()
+        return bus
+    return TickBus()
+
+
+def start_tick_publisher() -> Optional[RedisTickPublisher]:
+    """
+    Publisher for run_market_feed; None unless the bot reads prices over Redis.
+    """
+    if tick_bus_mode() != 'redis':
+        return None
+    publisher = RedisTickPublisher(_redis_url())
+    publisher.start()
+    return publisher
@@ -1,10 +1,16 @@
 import datetime as dt
+import logging
+import os
 import time
 import pytz
 import pandas as pd
 
 from trading.broker import orb_high_low_from_df
 from trading.strategies.opening_range_breakout import OpeningRangeBreakout
+
+logger = logging.getLogger(__name__)
+
+
 def _should_stop_bot(session_id: int | None = None) -> bool:
     if session_id is not None:
         from api.models import BotSession
@@ -22,19 +28,124 @@ def _should_stop_bot(session_id: int | None = None) -> bool:
 
 class TradeMaster(OpeningRangeBreakout):
 
+    def _connect_feed(self, tickers):
+        """
+        Hook the risk engine, tick bus and streamed candles to the live feed
+        for tickers: this process's MarketStreamManager, or the Redis tick bus
+        when run_market_feed owns the Angel connection. Returns the source, or
+        None.
+        """
+        from django.conf import settings
+
+        from trading.market_stream import (
+            MarketStreamManager,
+            send_feed_interest,
+        )
+
+        self._feed_client_id = f'trading-bot-{os.getpid()}'
+        if settings.LIVE_FEED_PROCESS == 'external':
+            if self._tick_bus is None or self._tick_bus.mode != 'redis':
+                logger.warning(
+                    'External feed without TICK_BUS=redis; '
+                    'using REST prices and candles'
+                )
+                return None
+            # Same feed marks open positions for live exposure / open risk.
+            self._tick_bus.add_tick_listener(self._risk_engine.on_tick)
+            send_feed_interest(self._feed_client_id, list(tickers))
+            return self._tick_bus
+        if self.capital_ledger_session_id is not None:
+            # Shards never open Angel sockets of their own (plan_shards
+            # requires the external feed); fall back to REST if one gets here.
+            logger.warning(
+                'Shard without an external feed; using REST prices and candles'
+            )
+            return None
+
+        feed = MarketStreamManager.instance()
+        try:
+            feed.register_client(list(tickers), self._feed_client_id)
+        except Exception as exc:
+            logger.warning(
+                'Live feed unavailable, using REST prices and candles: %s', exc
+            )
+            return None
+        feed.add_tick_listener(self._risk_engine.on_tick)
+        if self._tick_bus is not None:
+            feed.add_tick_listener(self._tick_bus.publish)
+        if feed.streams_volume:
+            # Streamed OHLCV replaces most per-ticker candle REST calls.
+            self._candle_stream = feed
+        return feed
+
+    def _disconnect_feed(self, feed) -> None:
+        if feed is None:
+            return
+        feed.remove_listener(self._risk_engine.on_tick)
+        if feed is self._tick_bus:
+            from trading.market_stream import send_feed_interest
+
+            send_feed_interest(self._feed_client_id, None)
+            return
+        if self._tick_bus is not None:
+            feed.remove_listener(self._tick_bus.publish)
+        feed.unregister_client(self._feed_client_id)
+        self._candle_stream = None
+
+    def _seed_capital(self, warmup: dict) -> None:
+        """
+        Start the risk engine from the warm-up's cash instead of rmsLimit.
+        """
+        from trading.broker import IST
+        from trading.risk_engine import capital_resync_seconds
+
+        capital = warmup.get('capital')
+        try:
+            created = dt.datetime.fromisoformat(warmup['created_at'])
+        except (KeyError, TypeError, ValueError):
+            return
+        age = (dt.datetime.now(IST) - created).total_seconds()
+        if capital is None or not 0 <= age < capital_resync_seconds():
+            return
+        # Nothing is blocked pre-market; positions opened since then are
+        # subtracted when the first pass reconciles.
+        self._risk_engine.sync_capital(capital, None, age=age)
+
     def make_some_money(self, tickers=None, session_id=None):
         print('Starting TradeMaster bot...')
         IST = pytz.timezone('Asia/Calcutta')
 
+        from trading.bot_warmup import load_warmup
+
+        warmup = load_warmup()
         self._load_instrument_list()
-        self._initialize_smart_api()
+        if not (warmup and self.adopt_session(warmup.get('session'))):
+            self._initialize_smart_api()
 
         ORB_TICKERS = list(tickers) if tickers else []
         if not ORB_TICKERS:
             raise ValueError(
                 'Watchlist is empty. Add symbols on the Watchlist page before starting the bot.'
             )
-        data_0920 = self.hist_data_0920(ORB_TICKERS, 4, 'FIVE_MINUTE', self.instrument_list)
+        if warmup:
+            # History is already prefetched; only today's opening bar is
+            # needed.
+            logger.info(
+                'Using pre-market warm-up from %s', warmup.get('created_at')
+            )
+            self._history_candles = warmup.get('candles') or {}
+            data_0920 = self.hist_data_0920(
+                ORB_TICKERS,
+                0,
+                'FIVE_MINUTE',
+                self.instrument_list,
+                retries=3,
+                delay=1.0,
+            )
+        else:
+            data_0920 = self.hist_data_0920(
+                ORB_TICKERS, 4, 'FIVE_MINUTE', self.instrument_list
+            )
 
         hi_lo_prices = {}
         for ticker in ORB_TICKERS:
@@ -50,6 +161,28 @@ class TradeMaster(OpeningRangeBreakout):
         time.sleep(max(0, seconds_to_sleep))
         touch_bot_heartbeat(session_id)
 
+        from trading.market_stream import MarketStreamManager
+        from trading.risk_engine import PortfolioRiskEngine
+        from trading.tick_bus import open_tick_bus
+        from trading.trailing_engine import (
+            start_tick_trailing,
+            stop_tick_trailing,
+        )
+
+        self._risk_engine = PortfolioRiskEngine()
+        if warmup and self.capital_ledger_session_id is None:
+            self._seed_capital(warmup)
+        # Strategy, trailing stops and order placement read LTPs here first.
+        self._tick_bus = open_tick_bus()
+        # Every bot process streams its own tickers (shards over the Redis
+        # tick bus), with or without the tick trailing engine.
+        feed = self._connect_feed(ORB_TICKERS)
+        self._trailing_engine = (
+            start_tick_trailing(self, ORB_TICKERS, self._tick_bus)
+            if self.run_housekeeping
+            else None
+        )
+
         starttime = time.time()
         market_end_time = dt.datetime(
             now.year, now.month, now.day,
@@ -57,30 +190,62 @@ class TradeMaster(OpeningRangeBreakout):
             tzinfo=IST,
         )
 
-        while dt.datetime.now(IST) < market_end_time:
-            if _should_stop_bot(session_id):
-                print('Bot stop requested — exiting loop.')
-                break
-            print(f'Loop pass at {dt.datetime.now(IST).strftime("%H:%M:%S")}')
-            from trading.bot_heartbeat import touch_bot_heartbeat
-            touch_bot_heartbeat(session_id)
-            positions_data = self.get_positions()
-            positions = pd.DataFrame(positions_data) if positions_data else pd.DataFrame()
-            try:
-                self.cancel_orphan_exit_orders(positions)
-            except Exception as exc:
-                print(f'Orphan order cleanup failed: {exc}')
-            open_orders = self.get_open_orders()
-            self.orb_strat(list(hi_lo_prices.keys()), hi_lo_prices, positions, open_orders)
-            # SL/target may fill during orb_strat; cancel leftover legs immediately.
-            try:
+        try:
+            while dt.datetime.now(IST) < market_end_time:
+                if _should_stop_bot(session_id):
+                    print('Bot stop requested — exiting loop.')
+                    break
+                print(
+                    f'Loop pass at {dt.datetime.now(IST).strftime("%H:%M:%S")}'
+                )
+                from trading.bot_heartbeat import touch_bot_heartbeat
+
+                touch_bot_heartbeat(session_id)
                 positions_data = self.get_positions()
                 positions = pd.DataFrame(positions_data) if positions_data else pd.DataFrame()
-                self.cancel_orphan_exit_orders(positions)
-            except Exception as exc:
-                print(f'Post-strategy orphan cleanup failed: {exc}')
-            time.sleep(300 - ((time.time() - starttime) % 300.0))
+                if self._trailing_engine:
+                    self._trailing_engine.set_open_symbols(
+                        self._open_position_bases(positions)
+                    )
+                if self.run_housekeeping:
+                    try:
+                        self.cancel_orphan_exit_orders(positions)
+                    except Exception as exc:
+                        print(f'Orphan order cleanup failed: {exc}')
+                if isinstance(feed, MarketStreamManager):
+                    from trading.feed_metrics import health_summary
 
+                    logger.info(
+                        'Feed health: %s', health_summary(feed.feed_health())
+                    )
+                if self._tick_bus is not None:
+                    logger.info('Tick bus: %s', self._tick_bus.stats())
+                open_orders = self.get_open_orders()
+                self.orb_strat(
+                    list(hi_lo_prices.keys()),
+                    hi_lo_prices,
+                    positions,
+                    open_orders,
+                )
+                # SL/target may fill during orb_strat; cancel leftover legs
+                # immediately.
+                if self.run_housekeeping:
+                    try:
+                        positions_data = self.get_positions()
+                        positions = (
+                            pd.DataFrame(positions_data)
+                            if positions_data
+                            else pd.DataFrame()
+                        )
+                        self.cancel_orphan_exit_orders(positions)
+                    except Exception as exc:
+                        print(f'Post-strategy orphan cleanup failed: {exc}')
+                time.sleep(300 - ((time.time() - starttime) % 300.0))
+        finally:
+            stop_tick_trailing(self._trailing_engine)
+            self._disconnect_feed(feed)
+            if self._tick_bus is not None:
+                self._tick_bus.stop()
         trades = self.log_pnl()
         print('Bot exiting after market close.')
         return trades
@@ -0,0 +1,331 @@
+"""
+Tick-driven trailing stops for bot-managed positions.
+
+Ticks and 5m bar closes only update in-memory state on the feed thread. They
+come from this process's MarketStreamManager, or with
+LIVE_FEED_PROCESS=external from the run_market_feed process over the Redis
+tick bus, so the bot never opens a second Angel connection. A worker thread
+re-evaluates dirty symbols and sends at most one SL modify per symbol per
+TRAILING_MODIFY_INTERVAL_SECONDS, so bursts of ticks coalesce into a single
+order update with the latest price.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from trading.trailing_stop import _fetch_prev_candle, apply_trailing_update
+
+logger = logging.getLogger(__name__)
+
+# Managed positions / settings are re-read from the DB this often.
+MANAGED_REFRESH_SECONDS = 10.0
+# A symbol counts as covered by the engine while its last tick is this fresh.
+FEED_FRESH_SECONDS = 30.0
+
+
+def _env_bool(name: str, default: bool = True) -> bool:
+    raw = os.environ.get(name, str(default)).strip().lower()
+    return raw in ('1', 'true', 'yes', 'on')
+
+
+def tick_engine_enabled() -> bool:
+    return _env_bool('TRAILING_TICK_ENGINE', True)
+
+
+def modify_interval_seconds() -> float:
+    try:
+        return max(
+            1.0, float(os.environ.get('TRAILING_MODIFY_INTERVAL_SECONDS', '5'))
+        )
+    except ValueError:
+        return 5.0
+
+
+class TrailingStopEngine:
+    def __init__(
+        self,
+        client,
+        instrument_list,
+        exchange: str = 'NSE',
+        modify_interval: Optional[float] = None,
+        risk_engine=None,
+    ) -> None:
+        self.client = client
+        self.risk_engine = risk_engine
+        self.instrument_list = instrument_list
+        self.exchange = exchange
+        self.modify_interval = modify_interval or modify_interval_seconds()
+        # Stable, so a restarted bot replaces its interest in the feed process.
+        self.feed_client_id = 'trailing-engine'
+        self._source = None
+        self._external = False
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._ltp: Dict[str, float] = {}
+        self._tick_at: Dict[str, float] = {}
+        self._prev_bar: Dict[str, Tuple[float, float]] = {}
+        self._dirty: Set[str] = set()
+        self._last_modify_at: Dict[str, float] = {}
+
+        self._managed: Set[str] = set()
+        self._open_symbols: Optional[Set[str]] = None
+        self._trailing_enabled = False
+        self._refreshed_at = 0.0
+
+    # ── Feed thread (must stay cheap) ──────────────────────────────────────
+
+    def on_tick(self, symbol: str, ltp: float, _bar: dict) -> None:
+        key = symbol.upper()
+        if key not in self._managed:
+            return
+        with self._lock:
+            self._ltp[key] = ltp
+            self._tick_at[key] = time.monotonic()
+            self._dirty.add(key)
+        self._wake.set()
+
+    def on_bar_close(self, symbol: str, bar: dict) -> None:
+        key = symbol.upper()
+        if key not in self._managed or bar.get('partial'):
+            # A partial bar's low / high miss the part before the stream saw
+            # it.
+            return
+        with self._lock:
+            self._prev_bar[key] = (float(bar['low']), float(bar['high']))
+            self._dirty.add(key)
+        self._wake.set()
+
+    # ── Bot loop ───────────────────────────────────────────────────────────
+
+    def attach(self, source) -> None:
+        """
+        source is a MarketStreamManager or a RedisTickBus (same listener API).
+        """
+        source.add_tick_listener(self.on_tick)
+        source.add_bar_listener(self.on_bar_close)
+        self._source = source
+
+    def detach(self) -> None:
+        if self._source is not None:
+            self._source.remove_listener(self.on_tick)
+            self._source.remove_listener(self.on_bar_close)
+            self._source = None
+
+    def set_open_symbols(self, symbols: Set[str]) -> None:
+        """
+        Broker open positions from the latest bot pass (no extra API call).
+        """
+        self._open_symbols = {s.upper() for s in symbols}
+
+    def covered_symbols(self) -> Set[str]:
+        """
+        Managed symbols with a fresh feed; the 5m REST pass can skip these.
+        """
+        if not self._thread or not self._trailing_enabled:
+            return set()
+        now = time.monotonic()
+        with self._lock:
+            return {
+                s
+                for s, at in self._tick_at.items()
+                if now - at <= FEED_FRESH_SECONDS and s in self._managed
+            }
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._refresh_managed()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='trailing-stop-engine',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self._thread = None
+
+    # ── Worker thread ──────────────────────────────────────────────────────
+
+    def _refresh_managed(self) -> None:
+        from api.models import BotSettings, ManagedPosition
+        from trading.sl_target import STRATEGY_TRAILING
+
+        self._managed = {
+            s.upper()
+            for s in ManagedPosition.objects.filter(
+                is_active=True
+            ).values_list('symbol', flat=True)
+        }
+        settings = BotSettings.get_singleton()
+        self._trailing_enabled = (
+            settings.stop_loss_strategy == STRATEGY_TRAILING
+        )
+        self._refreshed_at = time.monotonic()
+
+    def _take_due(self) -> Dict[str, float]:
+        """
+        Pop dirty symbols whose debounce window has elapsed (latest LTP only).
+        """
+        now = time.monotonic()
+        due = {}
+        with self._lock:
+            for symbol in list(self._dirty):
+                if (
+                    now - self._last_modify_at.get(symbol, 0.0)
+                    < self.modify_interval
+                ):
+                    continue
+                ltp = self._ltp.get(symbol)
+                self._dirty.discard(symbol)
+                if ltp:
+                    due[symbol] = ltp
+        return due
+
+    def _run(self) -> None:
+        from django.db import close_old_connections
+
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(timeout=1.0)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                if (
+                    time.monotonic() - self._refreshed_at
+                    >= MANAGED_REFRESH_SECONDS
+                ):
+                    try:
+                        self._refresh_managed()
+                    except Exception as e:
+                        logger.warning('Trailing engine refresh failed: %s', e)
+                if not self._trailing_enabled:
+                    continue
+                for symbol, ltp in self._take_due().items():
+                    self._evaluate(symbol, ltp)
+                with self._lock:
+                    pending = bool(self._dirty)
+                if pending:
+                    # Debounced symbols still waiting; re-check shortly.
+                    time.sleep(min(0.5, self.modify_interval))
+                    self._wake.set()
+        finally:
+            close_old_connections()
+
+    def _evaluate(self, symbol: str, ltp: float) -> None:
+        from api.models import ManagedPosition
+
+        if self._open_symbols is not None and symbol not in self._open_symbols:
+            return
+        mp = (
+            ManagedPosition.objects.filter(
+                is_active=True, symbol__iexact=symbol
+            )
+            .order_by('-opened_at')
+            .first()
+        )
+        if not mp:
+            return
+
+        prev = self._prev_bar.get(symbol)
+        if prev is None:
+            # No bar closed on the feed yet — seed once from REST.
+            low, high = _fetch_prev_candle(
+                self.client, mp.symbol, self.instrument_list, self.exchange
+            )
+            if low is None or high is None:
+                return
+            prev = (low, high)
+            with self._lock:
+                self._prev_bar.setdefault(symbol, prev)
+
+        with self._lock:
+            self._last_modify_at[symbol] = time.monotonic()
+        try:
+            apply_trailing_update(
+                self.client,
+                mp,
+                ltp,
+                prev[0],
+                prev[1],
+                self.instrument_list,
+                self.exchange,
+                self.risk_engine,
+            )
+        except Exception:
+            logger.exception('Error in tick trailing stop for %s', symbol)
+
+
+def start_tick_trailing(
+    client, symbols, tick_bus=None
+) -> Optional[TrailingStopEngine]:
+    """
+    Attach a TrailingStopEngine to the live feed for the given symbols: this
+    process's MarketStreamManager, or the Redis tick bus when the feed runs in
+    run_market_feed (LIVE_FEED_PROCESS=external).
+    """
+    if not tick_engine_enabled() or not symbols:
+        return None
+    from django.conf import settings
+
+    if settings.LIVE_FEED_PROCESS == 'external':
+        if tick_bus is None or tick_bus.mode != 'redis':
+            logger.warning(
+                'Tick trailing needs TICK_BUS=redis with an external feed, '
+                'using 5m pass only'
+            )
+            return None
+        from trading.market_stream import send_feed_interest
+
+        engine = TrailingStopEngine(
+            client, client.instrument_list, risk_engine=client._risk_engine
+        )
+        engine._external = True
+        engine.attach(tick_bus)
+        engine.start()
+        send_feed_interest(engine.feed_client_id, list(symbols))
+        return engine
+
+    from trading.market_stream import MarketStreamManager
+
+    manager = MarketStreamManager.instance()
+    engine = TrailingStopEngine(
+        client, client.instrument_list, risk_engine=client._risk_engine
+    )
+    engine.attach(manager)
+    engine.start()
+    try:
+        manager.register_client(list(symbols), engine.feed_client_id)
+    except Exception as e:
+        logger.warning(
+            'Tick trailing feed unavailable, using 5m pass only: %s', e
+        )
+    return engine
+
+
+def stop_tick_trailing(engine: Optional[TrailingStopEngine]) -> None:
+    if engine is None:
+        return
+    engine.detach()
+    engine.stop()
+    if engine._external:
+        from trading.market_stream import send_feed_interest
+
+        send_feed_interest(engine.feed_client_id, None)
+        return
+    from trading.market_stream import MarketStreamManager
+
+    MarketStreamManager.instance().unregister_client(engine.feed_client_id)
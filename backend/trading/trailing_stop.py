@@ -1,6 +1,7 @@
 import datetime as dt
+import threading
 import time
-from typing import Set
+from typing import Dict, Optional, Set
 
 import pandas as pd
 import pytz
@@ -9,6 +10,19 @@ from api.models import ManagedPosition
 from trading.sl_target import compute_next_trailing_sl
 from trading.utils import token_lookup, Colors
 
+# One lock per symbol, shared by the 5m REST pass and the tick engine thread.
+_symbol_locks: Dict[str, threading.Lock] = {}
+_symbol_locks_guard = threading.Lock()
+
+
+def _symbol_lock(symbol: str) -> threading.Lock:
+    key = symbol.upper()
+    with _symbol_locks_guard:
+        lock = _symbol_locks.get(key)
+        if lock is None:
+            lock = _symbol_locks[key] = threading.Lock()
+        return lock
+
 
 def _open_position_symbols(positions: pd.DataFrame) -> Set[str]:
     from trading.position_utils import net_position_qty, position_tradingsymbol
@@ -47,8 +61,89 @@ def _fetch_prev_candle(client, ticker: str, instrument_list, exchange: str):
     return float(df['low'].iloc[-2]), float(df['high'].iloc[-2])
 
 
-def update_trailing_stops(client, positions: pd.DataFrame, instrument_list, exchange: str = 'NSE') -> None:
-    """Adjust SL orders for active trailing positions each bot loop."""
+def apply_trailing_update(
+    client,
+    mp: ManagedPosition,
+    ltp: float,
+    prev_low: float,
+    prev_high: float,
+    instrument_list,
+    exchange: str = 'NSE',
+    risk_engine=None,
+) -> bool:
+    """
+    Ratchet the SL order for one managed position. True if the order was
+    modified. mp is re-read under the symbol's lock, so a concurrent update
+    from the other path is seen before deciding. risk_engine
+    (PortfolioRiskEngine) gets the new stop for its open-risk readout.
+    """
+    with _symbol_lock(mp.symbol):
+        mp.refresh_from_db(
+            fields=[
+                'is_active',
+                'current_sl',
+                'trail_stage',
+                'sl_order_id',
+                'quantity',
+            ]
+        )
+        if not mp.is_active:
+            return False
+        result = compute_next_trailing_sl(
+            mp.side,
+            mp.entry_price,
+            ltp,
+            prev_low,
+            prev_high,
+            mp.current_sl,
+            mp.initial_sl,
+        )
+        if not result:
+            return False
+
+        new_sl, new_stage = result
+        if not mp.sl_order_id:
+            print(f'No SL order id for {mp.symbol}, skipping trailing update')
+            return False
+
+        updated_order_id = client.modify_stop_loss_order(
+            mp.sl_order_id,
+            instrument_list,
+            mp.symbol,
+            mp.side,
+            mp.quantity,
+            new_sl,
+            exchange,
+        )
+        if not updated_order_id:
+            print(f'Failed to update trailing SL for {mp.symbol}')
+            return False
+
+        mp.current_sl = new_sl
+        mp.trail_stage = new_stage
+        mp.sl_order_id = updated_order_id
+        mp.save(update_fields=['current_sl', 'trail_stage', 'sl_order_id'])
+    if risk_engine is not None:
+        risk_engine.on_stop_moved(mp.symbol, new_sl)
+    print(
+        f'{Colors.GREEN}Trailing SL {mp.symbol}: {new_sl} ({new_stage})'
+        f'{Colors.RESET}'
+    )
+    return True
+
+
+def update_trailing_stops(
+    client,
+    positions: pd.DataFrame,
+    instrument_list,
+    exchange: str = 'NSE',
+    skip_symbols: Optional[Set[str]] = None,
+    risk_engine=None,
+) -> None:
+    """
+    Adjust SL orders for active trailing positions each bot loop.
+    skip_symbols: handled by the tick-driven TrailingStopEngine (fresh feed).
+    """
     from api.models import BotSettings
     from trading.sl_target import STRATEGY_TRAILING
 
@@ -66,6 +161,9 @@ def update_trailing_stops(client, positions: pd.DataFrame, instrument_list, exch
         if not trail_sl:
             continue
 
+        if skip_symbols and mp.symbol.upper() in skip_symbols:
+            continue
+
         time.sleep(0.4)
         try:
             ltp = client.get_ltp(instrument_list, mp.symbol, exchange)
@@ -76,42 +174,15 @@ def update_trailing_stops(client, positions: pd.DataFrame, instrument_list, exch
             if prev_low is None or prev_high is None:
                 continue
 
-            result = compute_next_trailing_sl(
-                mp.side,
-                mp.entry_price,
+            apply_trailing_update(
+                client,
+                mp,
                 ltp,
                 prev_low,
                 prev_high,
-                mp.current_sl,
-                mp.initial_sl,
-            )
-            if not result:
-                continue
-
-            new_sl, new_stage = result
-            if not mp.sl_order_id:
-                print(f"No SL order id for {mp.symbol}, skipping trailing update")
-                continue
-
-            updated_order_id = client.modify_stop_loss_order(
-                mp.sl_order_id,
                 instrument_list,
-                mp.symbol,
-                mp.side,
-                mp.quantity,
-                new_sl,
                 exchange,
-            )
-            if not updated_order_id:
-                print(f"Failed to update trailing SL for {mp.symbol}")
-                continue
-
-            mp.current_sl = new_sl
-            mp.trail_stage = new_stage
-            mp.sl_order_id = updated_order_id
-            mp.save(update_fields=['current_sl', 'trail_stage', 'sl_order_id'])
-            print(
-                f"{Colors.GREEN}Trailing SL {mp.symbol}: {new_sl} ({new_stage}){Colors.RESET}"
+                risk_engine,
             )
         except Exception as e:
             print(f"Error updating trailing stop for {mp.symbol}: {e}")
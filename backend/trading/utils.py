@@ -6,19 +6,28 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+# (instrument_list, {(name, exchange): token}) for the most recently used scrip
+# master; it has ~100k rows, so a linear scan per lookup is expensive.
+_token_index: tuple = (None, {})
+
+
 def token_lookup(
     ticker: str,
     instrument_list: List[Dict[str, Union[str, int]]],
     exchange: str = 'NSE',
 ) -> Optional[int]:
-    for instrument in instrument_list:
-        if (
-            instrument['name'] == ticker
-            and instrument['exch_seg'] == exchange
-            and instrument['symbol'].split('-')[-1] == 'EQ'
-        ):
-            return instrument['token']
-    return None
+    global _token_index
+    source, tokens = _token_index
+    if source is not instrument_list:
+        tokens = {}
+        for instrument in instrument_list:
+            if instrument['symbol'].split('-')[-1] == 'EQ':
+                tokens.setdefault(
+                    (instrument['name'], instrument['exch_seg']),
+                    instrument['token'],
+                )
+        _token_index = (instrument_list, tokens)
+    return tokens.get((ticker, exchange))
 
 
 class Colors:
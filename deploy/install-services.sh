@@ -9,6 +9,8 @@ echo "==> Installing systemd services..."
 cp "${SCRIPT_DIR}/systemd/trademaster-web.service" /etc/systemd/system/
 cp "${SCRIPT_DIR}/systemd/trademaster-celery.service" /etc/systemd/system/
 cp "${SCRIPT_DIR}/systemd/trademaster-celery-beat.service" /etc/systemd/system/
+# Only needed with LIVE_FEED_PROCESS=external: systemctl enable --now trademaster-feed
+cp "${SCRIPT_DIR}/systemd/trademaster-feed.service" /etc/systemd/system/
 systemctl daemon-reload
 
 echo "==> Installing Nginx config..."
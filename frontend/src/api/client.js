@@ -47,11 +47,52 @@ export const addTicker = (symbol) => api.post('/watchlist/', { symbol });
 export const deleteTicker = (id) => api.delete(`/watchlist/${id}/`);
 export const getChartinkWebhookConfig = () => api.get('/webhooks/chartink/config/');
 
-// Charts (forceRefresh bypasses 60s server cache)
-export const getWatchlistCharts = (forceRefresh = false) =>
-  api.get('/charts/watchlist/', {
-    params: forceRefresh ? { refresh: 1 } : {},
+// Charts (forceRefresh bypasses 60s server cache; since = { SYMBOL: last candle time })
+// as NDJSON (?stream=1): onMessage gets {type: 'meta' | 'symbol' | 'done' | 'error'}
+// as each symbol arrives, so charts can render before the slowest symbol is fetched.
+// Rows carry `columns` (epoch seconds + OHLCV arrays) rather than candle objects; history
+// beyond CHART_MAX_POINTS bars comes back merged into coarser candles.
+const CHART_MAX_POINTS = 1000;
+export const streamWatchlistCharts = async (forceRefresh = false, since = {}, onMessage = () => {}) => {
+  const params = new URLSearchParams({
+    stream: '1',
+    columnar: '1',
+    max_points: String(CHART_MAX_POINTS),
   });
+  if (forceRefresh) params.set('refresh', '1');
+  const cursors = Object.entries(since).map(([symbol, time]) => `${symbol}:${time}`);
+  if (cursors.length) params.set('since', cursors.join(','));
+  const response = await fetch(`/api/charts/watchlist/?${params}`, { credentials: 'include' });
+  if (response.status === 401 && window.location.pathname !== '/login') {
+    window.location.assign('/login');
+  }
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data.error || `Failed to load charts (${response.status})`);
+  }
+  if (!(response.headers.get('content-type') || '').includes('ndjson')) {
+    // Empty watchlist: plain JSON.
+    const data = await response.json();
+    onMessage({ type: 'meta', symbols: (data.symbols || []).map((s) => s.symbol) });
+    for (const row of data.symbols || []) onMessage({ type: 'symbol', row });
+    onMessage({ type: 'done', updated_at: data.updated_at });
+    return;
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) onMessage(JSON.parse(line));
+    }
+  }
+};
 
 // Bot control
 export const getBotStatus = () => api.get('/bot/status/');
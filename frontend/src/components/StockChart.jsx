@@ -16,7 +16,8 @@ function toUtcTimestamp(iso) {
 function candlesToSeriesData(candles) {
   const byTime = new Map();
   for (const c of candles || []) {
-    const time = toUtcTimestamp(c.time);
+    // Columnar responses already give epoch seconds.
+    const time = typeof c.time === 'number' ? c.time : toUtcTimestamp(c.time);
     if (Number.isNaN(time)) continue;
     byTime.set(time, {
       time,
@@ -1,8 +1,50 @@
 import { useCallback, useEffect, useRef, useState } from 'react';
 
-function wsUrl() {
+function wsUrl(format) {
   const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
-  return `${proto}://${window.location.host}/ws/charts/`;
+  const query = format === 'binary' ? '?format=binary' : '';
+  return `${proto}://${window.location.host}/ws/charts/${query}`;
+}
+
+const WIRE_VERSION = 1;
+const WIRE_KIND_TICKS = 1;
+const WIRE_KIND_SNAPSHOT = 2;
+// Tick frames carry the feed's primary (5m) bar; snapshots of other timeframes are skipped.
+const LIVE_BAR_INTERVAL = 300;
+
+/**
+ * Decode a binary ticks/snapshot frame (see trading/market_stream.py):
+ * <BBH header, then per item a length-prefixed ASCII symbol and
+ * <IiiiiI bar time, OHLC in paise, volume.
+ */
+function decodeTicksFrame(buffer) {
+  const view = new DataView(buffer);
+  if (view.byteLength < 4 || view.getUint8(0) !== WIRE_VERSION) return { kind: 0, items: [] };
+  const kind = view.getUint8(1);
+  if (kind !== WIRE_KIND_TICKS && kind !== WIRE_KIND_SNAPSHOT) return { kind, items: [] };
+  const count = view.getUint16(2, true);
+  const items = [];
+  let offset = 4;
+  for (let i = 0; i < count; i += 1) {
+    const len = view.getUint8(offset);
+    offset += 1;
+    let symbol = '';
+    for (let j = 0; j < len; j += 1) symbol += String.fromCharCode(view.getUint8(offset + j));
+    offset += len;
+    const close = view.getInt32(offset + 16, true) / 100;
+    const bar = {
+      time: view.getUint32(offset, true),
+      open: view.getInt32(offset + 4, true) / 100,
+      high: view.getInt32(offset + 8, true) / 100,
+      low: view.getInt32(offset + 12, true) / 100,
+      close,
+    };
+    const volume = view.getUint32(offset + 20, true);
+    if (volume) bar.volume = volume;
+    offset += 24;
+    items.push({ symbol, ltp: close, bar });
+  }
+  return { kind, items };
 }
 
 const RECONNECT_BASE_MS = 5000;
@@ -11,8 +53,10 @@ const RECONNECT_MAX_MS = 60000;
 /**
  * Angel One SmartAPI WebSocket v2 ticks relayed from Django (/ws/charts/).
  * Reconnects with backoff when tab is visible again or stream drops.
+ * Pass `symbols` to receive only those symbols instead of the whole watchlist,
+ * and format='binary' for compact tick frames (JSON is the default).
  */
-export default function useChartLiveSocket(enabled) {
+export default function useChartLiveSocket(enabled, symbols = null, format = 'json') {
   const [ticks, setTicks] = useState({});
   const [status, setStatus] = useState('idle');
   const [statusDetail, setStatusDetail] = useState('');
@@ -21,6 +65,21 @@ export default function useChartLiveSocket(enabled) {
   const reconnectAttemptRef = useRef(0);
   const mountedRef = useRef(false);
   const connectRef = useRef(null);
+  const symbolsRef = useRef(symbols);
+  const subscribedRef = useRef(new Set());
+  symbolsRef.current = symbols;
+
+  const syncSubscriptions = useCallback(() => {
+    const ws = wsRef.current;
+    if (!ws || ws.readyState !== WebSocket.OPEN) return;
+    const wanted = new Set((symbolsRef.current || []).map((s) => s.toUpperCase()));
+    const current = subscribedRef.current;
+    const add = [...wanted].filter((s) => !current.has(s));
+    const remove = [...current].filter((s) => !wanted.has(s));
+    if (add.length) ws.send(JSON.stringify({ action: 'subscribe', symbols: add }));
+    if (remove.length) ws.send(JSON.stringify({ action: 'unsubscribe', symbols: remove }));
+    subscribedRef.current = wanted;
+  }, []);
 
   const clearReconnectTimer = () => {
     if (reconnectTimerRef.current) {
@@ -63,11 +122,29 @@ export default function useChartLiveSocket(enabled) {
 
     setStatus('connecting');
     setStatusDetail('');
-    const ws = new WebSocket(wsUrl());
+    const ws = new WebSocket(wsUrl(format));
+    ws.binaryType = 'arraybuffer';
     wsRef.current = ws;
 
+    // Snapshots carry the last known bars; only real ticks mean the feed is live.
+    const applyItems = (items, live = true) => {
+      if (live) {
+        setStatus('live');
+        setStatusDetail('');
+      }
+      setTicks((prev) => {
+        const next = { ...prev };
+        items.forEach((item) => {
+          if (item.symbol) next[item.symbol] = { ltp: item.ltp, bar: item.bar };
+        });
+        return next;
+      });
+    };
+
     ws.onopen = () => {
       reconnectAttemptRef.current = 0;
+      subscribedRef.current = new Set();
+      syncSubscriptions();
       setStatus((prev) => (prev === 'live' ? 'live' : 'connected'));
     };
     ws.onclose = () => {
@@ -81,6 +158,11 @@ export default function useChartLiveSocket(enabled) {
     };
 
     ws.onmessage = (event) => {
+      if (event.data instanceof ArrayBuffer) {
+        const { kind, items } = decodeTicksFrame(event.data);
+        if (items.length) applyItems(items, kind === WIRE_KIND_TICKS);
+        return;
+      }
       try {
         const msg = JSON.parse(event.data);
         if (msg.type === 'status') {
@@ -94,6 +176,14 @@ export default function useChartLiveSocket(enabled) {
           }
           return;
         }
+        if (msg.type === 'snapshot' && (msg.interval ?? LIVE_BAR_INTERVAL) !== LIVE_BAR_INTERVAL) {
+          return;
+        }
+        if ((msg.type === 'ticks' || msg.type === 'snapshot') && Array.isArray(msg.items)) {
+          // Coalesced frame (latest bar per changed symbol) or the on-connect snapshot.
+          applyItems(msg.items, msg.type === 'ticks');
+          return;
+        }
         if (msg.type === 'tick' && msg.symbol) {
           setStatus('live');
           setStatusDetail('');
@@ -109,10 +199,15 @@ export default function useChartLiveSocket(enabled) {
         /* ignore malformed */
       }
     };
-  }, [enabled, scheduleReconnect]);
+  }, [enabled, format, scheduleReconnect, syncSubscriptions]);
 
   connectRef.current = connect;
 
+  const symbolsKey = (symbols || []).join(',');
+  useEffect(() => {
+    syncSubscriptions();
+  }, [symbolsKey, syncSubscriptions]);
+
   useEffect(() => {
     if (!enabled) return undefined;
 
@@ -1,12 +1,43 @@
-import { useState, useCallback, useEffect } from 'react';
+import { useState, useCallback, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
 import StockChart from '../components/StockChart';
 import useChartLiveSocket from '../hooks/useChartLiveSocket';
-import { getWatchlistCharts } from '../api/client';
+import { streamWatchlistCharts } from '../api/client';
 import './Charts.css';
 
+// Cursor per symbol for delta refreshes: the time of the last loaded candle.
+function lastCandleTimes(rows) {
+  const since = {};
+  for (const s of rows) {
+    const candles = s.candles || [];
+    if (candles.length) since[s.symbol] = candles[candles.length - 1].time;
+  }
+  return since;
+}
+
+// Columnar rows -> candle objects with epoch-second times (same clock as live bars).
+function columnsToCandles(columns) {
+  if (!columns) return [];
+  const { time, open, high, low, close, volume } = columns;
+  return time.map((t, i) => ({
+    time: t, open: open[i], high: high[i], low: low[i], close: close[i], volume: volume[i],
+  }));
+}
+
+// A row with `since` carries only bars from that candle on; splice it onto what we have.
+function mergeRow(prev, columnarRow) {
+  const { columns, ...rest } = columnarRow;
+  const row = { ...rest, candles: columnsToCandles(columns) };
+  if (!row.since) return row;
+  const prevCandles = prev?.candles || [];
+  if (!row.candles?.length) return { ...row, candles: prevCandles };
+  const kept = prevCandles.filter((c) => c.time < row.since);
+  return { ...row, candles: kept.concat(row.candles) };
+}
+
 export default function Charts() {
   const [symbols, setSymbols] = useState([]);
+  const symbolsRef = useRef([]);
   const [updatedAt, setUpdatedAt] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
@@ -18,12 +49,36 @@ export default function Charts() {
     setLoading(true);
     setError('');
     try {
-      const { data } = await getWatchlistCharts(forceRefresh);
-      setSymbols(data.symbols || []);
-      setUpdatedAt(data.updated_at || null);
+      const since = forceRefresh ? lastCandleTimes(symbolsRef.current) : {};
+      const prevBySymbol = new Map(symbolsRef.current.map((s) => [s.symbol, s]));
+      const rows = new Map();
+      let order = [];
+      // Rows render as they stream in; symbols not back yet keep their old chart.
+      const publish = () => {
+        const next = order
+          .map((symbol) => rows.get(symbol) || prevBySymbol.get(symbol))
+          .filter(Boolean);
+        symbolsRef.current = next;
+        setSymbols(next);
+      };
+      await streamWatchlistCharts(forceRefresh, since, (message) => {
+        if (message.type === 'meta') {
+          order = message.symbols || [];
+          publish();
+        } else if (message.type === 'symbol') {
+          const { row } = message;
+          rows.set(row.symbol, mergeRow(prevBySymbol.get(row.symbol), row));
+          publish();
+        } else if (message.type === 'done') {
+          setUpdatedAt(message.updated_at || null);
+        } else if (message.type === 'error') {
+          throw new Error(message.error);
+        }
+      });
     } catch (err) {
-      const msg = err.response?.data?.error || err.message || 'Failed to load charts';
+      const msg = err.message || 'Failed to load charts';
       setError(msg);
+      if (!forceRefresh) symbolsRef.current = [];
       setSymbols((prev) => (forceRefresh ? prev : []));
     } finally {
       setLoading(false);
@@ -40,6 +95,7 @@ export default function Charts() {
 
   const liveLabel =
     liveStatus === 'live' ? 'Live' :
+    liveStatus === 'degraded' ? 'Live (degraded)' :
     liveStatus === 'connecting' ? 'Connecting…' :
     liveStatus === 'connected' ? 'Connected' :
     liveStatus === 'reconnecting' ? 'Reconnecting…' :
@@ -55,7 +111,7 @@ export default function Charts() {
           <h1 className="page-title">Charts</h1>
           <p className="page-sub">
             Historical 5-minute candles load once; live price updates stream via Angel One WebSocket.
-            Use Refresh to reload history (sparingly). Live prices need market hours and a green Live badge.
+            Refresh fetches only bars newer than the ones already loaded. Live prices need market hours and a green Live badge.
           </p>
         </div>
         <div className="charts-header-actions">
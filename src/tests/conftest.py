@@ -0,0 +1,49 @@
+"""
+Shared setup for tests of the Django backend (backend/ is not an installed
+package): put it on sys.path, point runtime data at a temp dir and start
+Django before any test module imports trading.* or api.*.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / 'backend'
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trademaster_project.settings')
+# DEBUG startup hooks query the database; tests create their own.
+os.environ['DEBUG'] = 'False'
+os.environ['MARKET_DATA_DIR'] = tempfile.mkdtemp(prefix='trademaster-tests-')
+
+import django  # noqa: E402
+
+django.setup()
+
+
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Migrated throwaway database for the whole session."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    yield
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture
+def db(django_db_setup):
+    """Each test runs in a transaction that is rolled back afterwards."""
+    from django.db import transaction
+
+    atomic = transaction.atomic()
+    atomic.__enter__()
+    yield
+    transaction.set_rollback(True)
+    atomic.__exit__(None, None, None)
@@ -0,0 +1,116 @@
+import pytest
+
+from trading.bot_shards import (
+    ledger_available_capital,
+    open_capital_ledger,
+    partition_watchlist,
+    release_capital,
+    reserve_capital,
+)
+
+
+def _session():
+    from api.models import BotSession
+
+    return BotSession.objects.create(status='running')
+
+
+def test_partition_keeps_small_watchlists_whole():
+    assert partition_watchlist(['A', 'B'], 20) == [['A', 'B']]
+    assert partition_watchlist(['A', 'B', 'C'], 0) == [['A', 'B', 'C']]
+    assert partition_watchlist([], 20) == []
+
+
+def test_partition_round_robins_into_near_equal_shards():
+    symbols = [f'S{i}' for i in range(7)]
+
+    shards = partition_watchlist(symbols, 3)
+
+    assert shards == [['S0', 'S3', 'S6'], ['S1', 'S4'], ['S2', 'S5']]
+    assert sorted(s for shard in shards for s in shard) == sorted(symbols)
+
+
+def test_reserve_capital_refuses_overdraw(db):
+    session = _session()
+    open_capital_ledger(session.id, 1000.0)
+
+    assert reserve_capital(session.id, 600.0)
+    assert not reserve_capital(session.id, 500.0)
+    assert reserve_capital(session.id, 400.0)
+    assert ledger_available_capital(session.id) == 0.0
+
+
+def test_release_capital_returns_reservation_and_floors_at_zero(db):
+    session = _session()
+    open_capital_ledger(session.id, 1000.0)
+    reserve_capital(session.id, 700.0)
+
+    release_capital(session.id, 700.0)
+    assert ledger_available_capital(session.id) == 1000.0
+
+    release_capital(session.id, 50.0)
+    from api.models import BotCapitalLedger
+
+    assert BotCapitalLedger.objects.get(session_id=session.id).reserved == 0.0
+
+
+def test_failed_entry_releases_reserved_capital(db):
+    from trading.strategies.opening_range_breakout import OpeningRangeBreakout
+
+    session = _session()
+    open_capital_ledger(session.id, 1000.0)
+    bot = OpeningRangeBreakout.__new__(OpeningRangeBreakout)
+    bot.capital_ledger_session_id = session.id
+    bot.instrument_list = []
+    bot.place_bracket_order = lambda *args, **kwargs: None
+
+    bot._place_trade('INFY', 'BUY', 2, 400.0, 390.0, 420.0, 'orb', 'NSE')
+
+    assert ledger_available_capital(session.id) == 1000.0
+
+
+def test_inline_feed_never_shards(monkeypatch):
+    from django.test import override_settings
+
+    from trading import bot_shards
+
+    monkeypatch.setenv('BOT_SHARD_SIZE', '2')
+    monkeypatch.setenv('TICK_BUS', 'auto')
+    monkeypatch.setattr(bot_shards, '_worker_slots', lambda: 8)
+    symbols = ['A', 'B', 'C', 'D', 'E']
+
+    with override_settings(LIVE_FEED_PROCESS='inline'):
+        assert bot_shards.plan_shards(symbols) == [symbols]
+    with override_settings(LIVE_FEED_PROCESS='external'):
+        assert len(bot_shards.plan_shards(symbols)) == 3
+
+
+def test_coordinator_releases_feed_when_startup_fails(monkeypatch):
+    from trading import bot_shards, tick_bus, trailing_engine
+
+    class Bus:
+        stopped = False
+
+        def stop(self):
+            self.stopped = True
+
+    bus, engine, stopped = Bus(), object(), []
+    monkeypatch.setattr(tick_bus, 'open_tick_bus', lambda: bus)
+    monkeypatch.setattr(trailing_engine, 'start_tick_trailing', lambda *_a: engine)
+    monkeypatch.setattr(trailing_engine, 'stop_tick_trailing', stopped.append)
+
+    class Bot:
+        def _load_instrument_list(self):
+            pass
+
+        def _initialize_smart_api(self):
+            pass
+
+        def get_trade_capital(self):
+            raise RuntimeError('rms down')
+
+    with pytest.raises(RuntimeError):
+        bot_shards.run_shard_coordinator(Bot(), 1, [['A'], ['B']])
+
+    assert stopped == [engine]
+    assert bus.stopped
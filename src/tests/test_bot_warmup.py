@@ -0,0 +1,97 @@
+import datetime as dt
+import json
+
+import fakeredis
+import pandas as pd
+import pytest
+
+from trading import bot_warmup
+from trading.broker import IST
+
+
+@pytest.fixture
+def session_redis(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(bot_warmup, '_session_client', lambda: client)
+    return client
+
+
+def test_session_round_trip_expires_at_close(session_redis):
+    today = dt.datetime.now(IST).date()
+    tomorrow = today + dt.timedelta(days=1)
+    creds = {'api_key': 'k', 'access_token': 'a', 'feed_token': 'f'}
+
+    assert bot_warmup.store_session(creds, tomorrow)
+    assert bot_warmup.load_session(tomorrow) == creds
+    ttl = session_redis.ttl(bot_warmup.SESSION_KEY + tomorrow.isoformat())
+    assert 0 < ttl <= 2 * 86400
+
+
+def test_past_session_close_is_not_stored(session_redis):
+    yesterday = dt.datetime.now(IST).date() - dt.timedelta(days=1)
+
+    assert not bot_warmup.store_session({'access_token': 'a'}, yesterday)
+    assert bot_warmup.load_session(yesterday) is None
+
+
+def test_load_warmup_ignores_tokens_in_file(session_redis):
+    day = dt.datetime.now(IST).date()
+    path = bot_warmup.warmup_path(day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        'date': day.isoformat(),
+        'capital': 50000,
+        'session': {'access_token': 'from-disk'},
+    }))
+
+    payload = bot_warmup.load_warmup(day)
+
+    assert payload['capital'] == 50000
+    assert payload['session'] is None
+
+
+def test_bot_loads_the_warmed_registry_without_downloading(monkeypatch):
+    import urllib.request
+
+    from trading.broker import AngelOneClient
+
+    def urlopen(*_args, **_kwargs):
+        raise AssertionError('scrip master downloaded')
+
+    monkeypatch.setattr(urllib.request, 'urlopen', urlopen)
+    registry = [{'token': '3045', 'symbol': 'SBIN-EQ', 'name': 'SBIN', 'exch_seg': 'NSE'}]
+    bot_warmup.write_instrument_cache(json.dumps(registry).encode('utf-8'))
+    client = AngelOneClient.__new__(AngelOneClient)
+    client.instrument_list = None
+
+    client._load_instrument_list()
+
+    assert client.instrument_list == registry
+
+
+def _warm_bot(created_at: dt.datetime):
+    from trading.risk_engine import PortfolioRiskEngine
+    from trading.trading_bot import TradeMaster
+
+    bot = TradeMaster.__new__(TradeMaster)
+    bot._risk_engine = PortfolioRiskEngine()
+    calls = []
+    bot.get_trade_capital = lambda: calls.append('rmsLimit') or 20000
+    bot._seed_capital({'capital': 50000, 'created_at': created_at.isoformat()})
+    bot._sync_risk_engine(pd.DataFrame())
+    return bot, calls
+
+
+def test_bot_sizes_from_warmup_capital_without_rms_call(db):
+    bot, calls = _warm_bot(dt.datetime.now(IST) - dt.timedelta(minutes=8))
+
+    assert calls == []
+    assert bot._risk_engine.sizing_capital() == 50000.0
+    assert not bot._risk_engine.needs_capital_sync()
+
+
+def test_stale_warmup_capital_is_reread(db):
+    bot, calls = _warm_bot(dt.datetime.now(IST) - dt.timedelta(hours=3))
+
+    assert calls == ['rmsLimit']
+    assert bot._risk_engine.sizing_capital() == 20000.0
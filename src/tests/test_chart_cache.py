@@ -0,0 +1,111 @@
+import time
+
+import fakeredis
+import redis
+
+from api import chart_views
+from trading import chart_cache
+from trading.chart_cache import (
+    REDIS_SIZE_KEY,
+    REDIS_TOTAL_FIELD,
+    ChartCache,
+    FileChartCache,
+    RedisChartCache,
+    entry_key,
+)
+
+
+def _redis_cache(monkeypatch, max_bytes: int) -> RedisChartCache:
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda *_a, **_k: fakeredis.FakeRedis(server=server))
+    return RedisChartCache('redis://fake', max_bytes)
+
+
+def _value(n: int) -> dict:
+    return {'stored_at': 0.0, 'row': {'pad': 'x' * n}}
+
+
+def test_redis_cache_keeps_a_running_total_and_evicts_only_over_the_cap(monkeypatch):
+    cache = _redis_cache(monkeypatch, max_bytes=200)
+    client = cache._client
+    cache.set_many({'a': _value(50)})
+    first = int(client.hget(REDIS_SIZE_KEY, REDIS_TOTAL_FIELD))
+
+    # Rewriting a key replaces its size instead of adding to it.
+    cache.set_many({'a': _value(50)})
+    assert int(client.hget(REDIS_SIZE_KEY, REDIS_TOTAL_FIELD)) == first
+
+    monkeypatch.setattr(client, 'hgetall', lambda *_a: (_ for _ in ()).throw(AssertionError))
+    cache.get_many(['a'])
+    cache.set_many({'b': _value(50)})
+    cache.set_many({'c': _value(50)})
+    assert cache.evictions == 1
+    assert cache.get_many(['a', 'b', 'c']).keys() == {'b', 'c'}
+    total = int(client.hget(REDIS_SIZE_KEY, REDIS_TOTAL_FIELD))
+    assert total == sum(int(client.hget(REDIS_SIZE_KEY, chart_cache.REDIS_PREFIX + k)) for k in 'bc')
+    assert total <= 200
+
+
+def test_file_cache_scans_only_over_the_cap(tmp_path, monkeypatch):
+    cache = FileChartCache(tmp_path, max_bytes=200)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, '_evict', lambda: (scans.append(1), evict()))
+
+    cache.set_many({'a': _value(50)})
+    assert len(scans) == 1  # the first write learns the directory size
+    cache.set_many({'b': _value(50)})
+    assert len(scans) == 1
+    cache.set_many({'c': _value(50)})
+    assert len(scans) == 2
+    assert cache.evictions == 1
+    assert cache._total == sum(p.stat().st_size for p in tmp_path.glob('*.json'))
+
+
+def test_bars_are_cached_once_per_day_and_sliced_on_read(monkeypatch):
+    start_30 = chart_views._lookback_start(30)
+    start_0 = chart_views._lookback_start(0)
+    old_bar, new_bar = start_30 + 300, start_0 + 300
+
+    def row(symbol, times):
+        columns = {name: list(times) for name in chart_views._COLUMNS}
+        return {'symbol': symbol, 'orb_high': 1.0, 'orb_low': 0.5, 'last_close': 1.0,
+                'error': None, 'columns': columns}
+
+    fetches = []
+
+    def fetch(symbols, include_candles=False, days_back=0):
+        if not symbols:
+            return
+        fetches.append(days_back)
+        for s in symbols:
+            yield row(s, [old_bar, new_bar] if days_back else [new_bar, new_bar + 300])
+
+    store = {}
+
+    class DictCache(ChartCache):
+        def get_many(self, keys):
+            return {k: store[k] for k in keys if k in store}
+
+        def set_many(self, entries):
+            store.update(entries)
+
+    monkeypatch.setattr(chart_views, 'get_chart_cache', lambda: DictCache(0))
+    monkeypatch.setattr(chart_views, '_iter_symbol_market_rows', fetch)
+
+    (wide, _), = chart_views._iter_cached_rows(['SBIN'], True, days_back=30)
+    assert wide['columns']['time'] == [old_bar, new_bar]
+    (today, _), = chart_views._iter_cached_rows(['SBIN'], True, days_back=0)
+    assert today['columns']['time'] == [new_bar]
+    assert fetches == [30]
+    assert [k.split(':')[0] for k in store] == ['bars', 'orb']
+
+    # A stale entry is refetched for the shorter lookback; the older days survive.
+    key = entry_key('bars', next(iter(store)).split(':')[1], 'SBIN')
+    store[key]['stored_at'] = time.time() - 3600
+    (today, _), = chart_views._iter_cached_rows(['SBIN'], True, days_back=0)
+    assert today['columns']['time'] == [new_bar, new_bar + 300]
+    assert store[key]['days_back'] == 30
+    assert store[key]['row']['columns']['time'] == [old_bar, new_bar, new_bar + 300]
+    (wide, _), = chart_views._iter_cached_rows(['SBIN'], True, days_back=30)
+    assert fetches == [30, 0]
@@ -0,0 +1,61 @@
+import asyncio
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import override_settings
+
+from api import consumers
+from trading.market_stream import CONTROL_GROUP
+
+
+def _communicator(user):
+    communicator = WebsocketCommunicator(consumers.ChartLiveConsumer.as_asgi(), '/ws/charts/')
+    communicator.scope['user'] = user
+    return communicator
+
+
+def test_anonymous_sockets_are_rejected():
+    async def scenario():
+        connected, _ = await _communicator(AnonymousUser()).connect()
+        assert not connected
+
+    asyncio.run(scenario())
+
+
+def test_subscribe_is_limited_to_the_watchlist(monkeypatch):
+    monkeypatch.setattr(consumers, 'active_watchlist_symbols', lambda: ['SBIN', 'INFY'])
+
+    async def scenario():
+        layer = get_channel_layer()
+        await layer.flush()
+        control = await layer.new_channel()
+        await layer.group_add(CONTROL_GROUP, control)
+        communicator = _communicator(User(username='trader'))
+        connected, _ = await communicator.connect()
+        assert connected
+        await communicator.receive_json_from()
+
+        await communicator.send_json_to({'action': 'subscribe', 'symbols': ['sbin', 'RELIANCE']})
+        reply = await communicator.receive_json_from()
+        assert reply == {'type': 'subscribed', 'symbols': ['SBIN']}
+
+        # Dropping a symbol from the watchlist also drops its subscription.
+        await layer.group_send('charts_live', {'type': 'watchlist.changed', 'symbols': ['INFY']})
+        assert await communicator.receive_json_from() == {'type': 'subscribed', 'symbols': []}
+        assert (await communicator.receive_json_from())['type'] == 'watchlist'
+
+        interests = []
+        while True:
+            try:
+                message = await asyncio.wait_for(layer.receive(control), timeout=0.2)
+            except asyncio.TimeoutError:
+                break
+            if message['type'] == 'feed.interest':
+                interests.append(message['symbols'])
+        assert interests == [['SBIN'], None]
+        await communicator.disconnect()
+        await layer.group_discard(CONTROL_GROUP, control)
+
+    with override_settings(LIVE_FEED_PROCESS='external'):
+        asyncio.run(scenario())
@@ -0,0 +1,98 @@
+import datetime as dt
+
+from api.chart_views import _delta_days_back, _downsample, _parse_since
+from trading.broker import IST
+
+
+def test_parse_since_reads_both_cursor_formats():
+    # 2026-01-05T10:15:00 IST is 04:45:00 UTC.
+    cursors = _parse_since('infy:2026-01-05T10:15:00, TCS:1767587700')
+    assert cursors == {'INFY': 1767588300, 'TCS': 1767587700}
+    # Offset-aware isoformat is read as IST wall time, like the candle times.
+    assert _parse_since('INFY:2026-01-05T10:15:00+05:30') == {'INFY': 1767588300}
+
+
+def test_parse_since_ignores_bad_pairs():
+    assert _parse_since(None) == {}
+    assert _parse_since('') == {}
+    assert _parse_since('INFY,:123,TCS:,SBIN:yesterday,HDFC:-5') == {}
+    assert _parse_since('INFY:10,INFY:20') == {'INFY': 20}
+
+
+def _cursor(days_ago: int) -> int:
+    day = dt.datetime.now(IST).date() - dt.timedelta(days=days_ago)
+    return int(IST.localize(dt.datetime.combine(day, dt.time(10, 0))).timestamp())
+
+
+def test_delta_days_back_covers_the_cursor_bar():
+    assert _delta_days_back(_cursor(0), 30) == 0
+    assert _delta_days_back(_cursor(3), 30) == 3
+    # Never further back than the full request, nor into the future.
+    assert _delta_days_back(_cursor(45), 30) == 30
+    assert _delta_days_back(_cursor(-1), 30) == 0
+    assert _delta_days_back(_cursor(3), 0) == 0
+
+
+def _bars(starts_ist: list) -> dict:
+    """5m columns for naive IST datetimes; bar i has open i and volume 1."""
+    times = [int(IST.localize(t).timestamp()) for t in starts_ist]
+    n = range(len(times))
+    return {
+        'time': times,
+        'open': [float(i) for i in n],
+        'high': [i + 0.5 for i in n],
+        'low': [i - 0.5 for i in n],
+        'close': [i + 0.25 for i in n],
+        'volume': [1] * len(times),
+    }
+
+
+def _session(day: dt.date, count: int) -> list:
+    opened = dt.datetime.combine(day, dt.time(9, 15))
+    return [opened + dt.timedelta(minutes=5 * i) for i in range(count)]
+
+
+def _ist_clock(epoch: int) -> dt.time:
+    return dt.datetime.fromtimestamp(epoch, IST).time()
+
+
+def test_downsample_leaves_short_rows_alone():
+    columns = _bars(_session(dt.date(2026, 1, 5), 10))
+    assert _downsample(columns, 10) == (columns, None)
+
+
+def test_downsample_buckets_start_at_the_session_open():
+    columns = _bars(_session(dt.date(2026, 1, 5), 20))
+    merged, full_from = _downsample(columns, 12)
+
+    # 14 older bars do not fit 6 slots as 10m buckets (7) but do as 15m (5).
+    assert full_from == columns['time'][14]
+    head = {name: values[:5] for name, values in merged.items()}
+    assert [_ist_clock(t) for t in head['time']] == [
+        dt.time(9, 15), dt.time(9, 30), dt.time(9, 45), dt.time(10, 0), dt.time(10, 15),
+    ]
+    assert head['open'] == [0.0, 3.0, 6.0, 9.0, 12.0]
+    assert head['high'] == [2.5, 5.5, 8.5, 11.5, 13.5]
+    assert head['low'] == [-0.5, 2.5, 5.5, 8.5, 11.5]
+    assert head['close'] == [2.25, 5.25, 8.25, 11.25, 13.25]
+    assert head['volume'] == [3, 3, 3, 3, 2]
+    # The newest half of the budget stays at full resolution.
+    assert {name: values[5:] for name, values in merged.items()} == {
+        name: values[14:] for name, values in columns.items()
+    }
+
+
+def test_downsample_splits_days_at_the_open_and_drops_the_oldest():
+    days = [dt.date(2026, 1, 5) + dt.timedelta(days=d) for d in range(4)]
+    today = _session(days[-1] + dt.timedelta(days=1), 2)
+    columns = _bars([t for day in days for t in _session(day, 75)] + today)
+    merged, full_from = _downsample(columns, 4)
+
+    # Two slots for 300 older bars: daily buckets, only the newest two days kept.
+    assert full_from == columns['time'][-2]
+    assert [dt.datetime.fromtimestamp(t, IST).replace(tzinfo=None) for t in merged['time'][:2]] == [
+        dt.datetime.combine(days[2], dt.time(9, 15)), dt.datetime.combine(days[3], dt.time(9, 15)),
+    ]
+    assert merged['open'][:2] == [150.0, 225.0]
+    assert merged['close'][:2] == [224.25, 299.25]
+    assert merged['volume'][:2] == [75, 75]
@@ -0,0 +1,54 @@
+from trading.feed_metrics import FeedMetrics, LatencyHistogram, WindowedHistogram
+
+
+def test_window_only_counts_recent_minutes():
+    histogram = WindowedHistogram(span=10)
+    histogram.observe(4.0, now=0.0)
+    histogram.observe(0.01, now=5 * 60.0)
+    histogram.observe(0.02, now=6 * 60.0 + 59)
+
+    recent = histogram.window(now=6 * 60.0 + 59, minutes=2)
+
+    assert recent.count == 2
+    assert recent.max == 0.02
+    assert histogram.lifetime.count == 3
+    assert histogram.lifetime.max == 4.0
+
+
+def test_ring_slots_are_reused_for_new_minutes():
+    histogram = WindowedHistogram(span=3)
+    histogram.observe(1.0, now=0.0)
+    # Minute 3 lands in minute 0's slot and replaces it.
+    histogram.observe(0.5, now=3 * 60.0)
+
+    assert histogram.window(now=3 * 60.0, minutes=3).count == 1
+
+
+def test_merge_adds_buckets():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.observe(0.001)
+    b.observe(0.5)
+    b.observe(0.5)
+
+    a.merge(b)
+
+    assert (a.count, a.max) == (3, 0.5)
+    assert a.quantile(0.9) == 0.5
+
+
+def test_old_lag_spike_does_not_degrade_health(monkeypatch):
+    metrics = FeedMetrics()
+    now = [1000.0]
+    monkeypatch.setattr('trading.feed_metrics.time.monotonic', lambda: now[0])
+    monkeypatch.setattr('trading.feed_metrics.time.time', lambda: now[0])
+    for _ in range(10):
+        metrics.on_published(0.001, exchange_ms=int((now[0] - 5.0) * 1000), ok=True)
+    snapshot = dict(symbols=[], wanted=[], connections=[], queue_depth=0, queue_size=10, dropped=0)
+
+    assert 'exchange_lag' in metrics.snapshot(**snapshot)['reasons']
+
+    now[0] += 20 * 60
+    health = metrics.snapshot(**snapshot)
+    assert 'exchange_lag' not in health['reasons']
+    assert health['latency_ms']['exchange_to_broadcast']['count'] == 10
+    assert health['recent_latency_ms']['exchange_to_broadcast']['count'] == 0
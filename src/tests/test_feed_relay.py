@@ -0,0 +1,205 @@
+import asyncio
+import time
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import redis
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import channel_layers, get_channel_layer
+from channels_redis.core import RedisChannelLayer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from api import consumers
+from trading.market_stream import (
+    CONTROL_GROUP,
+    WATCHLIST_CLIENT_ID,
+    MarketStreamManager,
+    handle_feed_control,
+)
+from trading.tick_bus import TICK_BUS_CHANNEL, RedisTickBus, RedisTickPublisher
+
+
+@pytest.fixture
+def feed():
+    """A feed-process manager with no upstream sockets, fed by _on_data."""
+    manager = MarketStreamManager()
+    manager._recorder = None
+    manager._checkpoint_every = 0
+    manager._rest_check = False
+    manager._flush_hz = 4.0
+    manager._connections = []
+    manager.bind_token('3045', 'SBIN')
+    yield manager
+    if manager._stop_timer:
+        manager._stop_timer.cancel()
+
+
+def _tick(manager, paise: int) -> None:
+    manager._on_data(None, {'token': '3045', 'last_traded_price': paise})
+
+
+def test_feed_ticks_reach_consumer_through_groups(feed, monkeypatch):
+    monkeypatch.setattr(consumers, 'active_watchlist_symbols', lambda: ['SBIN'])
+
+    async def scenario():
+        layer = get_channel_layer()
+        await layer.flush()
+        control = await layer.new_channel()
+        await layer.group_add(CONTROL_GROUP, control)
+        feed._bridge_loop = asyncio.get_running_loop()
+
+        communicator = WebsocketCommunicator(consumers.ChartLiveConsumer.as_asgi(), '/ws/charts/')
+        communicator.scope['user'] = User(username='trader')
+        connected, _ = await communicator.connect()
+        assert connected
+        assert (await communicator.receive_json_from())['message'] == 'connecting'
+
+        # The consumer asks the feed process for a snapshot over the control group.
+        request = await layer.receive(control)
+        assert request['type'] == 'feed.snapshot'
+        _tick(feed, 50125)
+        await sync_to_async(handle_feed_control)(feed, request)
+        snapshot = await communicator.receive_json_from()
+        assert snapshot['type'] == 'snapshot'
+        assert snapshot['items'][0]['symbol'] == 'SBIN'
+
+        _tick(feed, 50200)
+        feed.flush()
+        await feed._drain_outbox(layer)
+        frame = await communicator.receive_json_from()
+        assert frame['type'] == 'ticks'
+        assert [(i['symbol'], i['ltp']) for i in frame['items']] == [('SBIN', 502.0)]
+
+        await communicator.disconnect()
+        await layer.group_discard(CONTROL_GROUP, control)
+
+    with override_settings(LIVE_FEED_PROCESS='external'):
+        asyncio.run(scenario())
+
+
+class FakeRedisChannelLayer(RedisChannelLayer):
+    """channels_redis over one in-process fakeredis server."""
+
+    def __init__(self, server: fakeredis.FakeServer) -> None:
+        super().__init__(hosts=['redis://fake'])
+        self._server = server
+
+    def create_pool(self, index):
+        return fakeredis.aioredis.FakeRedis(server=self._server).connection_pool
+
+
+def test_feed_process_relays_through_channels_redis(feed, monkeypatch):
+    """Feed process and web worker each have their own layer on one Redis."""
+    server = fakeredis.FakeServer()
+    web_layer = FakeRedisChannelLayer(server)
+    feed_layer = FakeRedisChannelLayer(server)
+    monkeypatch.setitem(channel_layers.backends, 'default', web_layer)
+    monkeypatch.setattr(consumers, 'active_watchlist_symbols', lambda: ['SBIN'])
+
+    async def scenario():
+        control = await feed_layer.new_channel()
+        await feed_layer.group_add(CONTROL_GROUP, control)
+        feed._bridge_loop = asyncio.get_running_loop()
+
+        communicator = WebsocketCommunicator(consumers.ChartLiveConsumer.as_asgi(), '/ws/charts/')
+        communicator.scope['user'] = User(username='trader')
+        connected, _ = await communicator.connect()
+        assert connected
+        assert (await communicator.receive_json_from())['message'] == 'connecting'
+
+        # The snapshot request crosses Redis to the feed, the reply crosses back.
+        request = await feed_layer.receive(control)
+        assert request['type'] == 'feed.snapshot'
+        _tick(feed, 50125)
+        await sync_to_async(handle_feed_control)(feed, request)
+        snapshot = await communicator.receive_json_from(timeout=5)
+        assert snapshot['type'] == 'snapshot'
+        assert snapshot['items'][0]['symbol'] == 'SBIN'
+
+        _tick(feed, 50200)
+        feed.flush()
+        await feed._drain_outbox(feed_layer)
+        frame = await communicator.receive_json_from(timeout=5)
+        assert frame['type'] == 'ticks'
+        assert [(i['symbol'], i['ltp']) for i in frame['items']] == [('SBIN', 502.0)]
+
+        await communicator.disconnect()
+        await feed_layer.group_discard(CONTROL_GROUP, control)
+        await web_layer.flush()
+
+    with override_settings(LIVE_FEED_PROCESS='external'):
+        asyncio.run(scenario())
+
+
+def test_control_relay_applies_interest_and_watchlist(feed):
+    handle_feed_control(feed, {
+        'type': 'feed.interest', 'client': 'socket-1', 'symbols': ['sbin'], 'explicit': True,
+    })
+    assert feed._interests['socket-1'] == (frozenset({'SBIN'}), True)
+    assert feed._symbol_groups == frozenset({'SBIN'})
+
+    handle_feed_control(feed, {'type': 'feed.watchlist', 'symbols': ['SBIN']})
+    assert feed._interests[WATCHLIST_CLIENT_ID] == (frozenset({'SBIN'}), False)
+
+    handle_feed_control(feed, {'type': 'feed.interest', 'client': 'socket-1', 'symbols': None})
+    assert 'socket-1' not in feed._interests
+    assert feed._symbol_groups == frozenset()
+
+    # Malformed messages are ignored.
+    handle_feed_control(feed, {'type': 'feed.interest', 'symbols': ['SBIN']})
+    assert set(feed._interests) == {WATCHLIST_CLIENT_ID}
+
+
+def test_control_relay_answers_snapshot_requests(feed):
+    layer = get_channel_layer()
+    reply_to = async_to_sync(layer.new_channel)()
+    _tick(feed, 50125)
+
+    handle_feed_control(feed, {
+        'type': 'feed.snapshot', 'symbols': ['SBIN'], 'interval': 60, 'reply_to': reply_to,
+    })
+
+    event = async_to_sync(layer.receive)(reply_to)
+    assert event['payload']['interval'] == 60
+    assert event['payload']['items'][0]['bar']['close'] == 501.25
+    # Binary frames carry no interval, so only the 5m snapshot is sent binary.
+    assert 'binary' not in event
+    assert 'binary' in feed.snapshot_event(['SBIN'])
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_tick_bus_round_trip_over_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda *_a, **_k: fakeredis.FakeRedis(server=server))
+    probe = fakeredis.FakeRedis(server=server)
+
+    bus = RedisTickBus('redis://fake')
+    bars = []
+    bus.add_bar_listener(lambda symbol, bar: bars.append((symbol, bar)))
+    bus.start()
+    publisher = RedisTickPublisher('redis://fake')
+    publisher.start()
+    try:
+        assert _wait_for(lambda: probe.pubsub_numsub(TICK_BUS_CHANNEL)[0][1] == 1)
+        publisher.on_tick('SBIN', 501.25)
+        publisher.on_bar('SBIN', {'time': 300, 'low': 499.0, 'high': 502.0, 'partial': False})
+        publisher.on_bar('INFY', {'time': 300, 'low': 1.0, 'high': 2.0, 'partial': True})
+
+        assert _wait_for(lambda: bus.latest('SBIN') is not None)
+        assert bus.latest('SBIN') == 501.25
+        assert _wait_for(lambda: bars)
+        assert bars == [('SBIN', {'time': 300, 'low': 499.0, 'high': 502.0})]
+    finally:
+        publisher.stop()
+        bus.stop()
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+import trading.market_stream as market_stream
+from trading.market_stream import MarketStreamManager
+
+
+def _manager():
+    manager = MarketStreamManager()
+    manager._recorder = None
+    manager._checkpoint_every = 0
+    manager._connections = []
+    manager._rest_check = True
+    manager.bind_token('3045', 'SBIN')
+    manager.bind_token('1594', 'INFY')
+    return manager
+
+
+def _partial(manager, slot: int, bar_time: int) -> None:
+    bar = manager._slots[slot]
+    bar.start(bar_time, 500.0, 0, partial=True)
+
+
+def test_rest_checks_fetch_once_per_symbol_and_bar(monkeypatch):
+    manager = _manager()
+    fetched = []
+
+    def fake_rest_bar(symbol, bar_time, interval):
+        assert interval == 'FIVE_MINUTE'
+        fetched.append((symbol, bar_time))
+        return {'time': bar_time, 'open': 499.0, 'high': 501.0, 'low': 498.0, 'volume': 10}
+
+    monkeypatch.setattr(market_stream, 'rest_bar', fake_rest_bar)
+    # A worker is busy, so these all queue up behind it.
+    manager._rest_worker = threading.current_thread()
+    for bar_time in (300, 600):
+        _partial(manager, 0, bar_time)
+        manager._queue_rest_check(0, bar_time)
+    _partial(manager, 1, 600)
+    manager._queue_rest_check(1, 600)
+    manager._run_rest_checks()
+
+    # SBIN's 300 bar was superseded before the worker reached it.
+    assert fetched == [('SBIN', 600), ('INFY', 600)]
+    assert manager._rest_worker is None
+    assert set(manager._rest_patches) == {0, 1}
+
+
+def test_worker_restarts_after_draining(monkeypatch):
+    manager = _manager()
+    fetched = []
+    monkeypatch.setattr(market_stream, 'rest_bar', lambda symbol, t, interval: fetched.append(symbol))
+
+    _partial(manager, 0, 300)
+    manager._queue_rest_check(0, 300)
+    manager._rest_worker.join(5.0)
+    assert manager._rest_worker is None
+
+    _partial(manager, 1, 300)
+    manager._queue_rest_check(1, 300)
+    manager._rest_worker.join(5.0)
+
+    assert fetched == ['SBIN', 'INFY']
+
+
+def test_no_rest_check_without_an_angel_interval(monkeypatch):
+    manager = _manager()
+    monkeypatch.setattr(market_stream, 'rest_bar', lambda *_a: pytest.fail('fetched'))
+    # A primary frame Angel has no candles for (e.g. 2m) is never patched.
+    manager._rest_interval = None
+
+    _partial(manager, 0, 300)
+    manager._queue_rest_check(0, 300)
+
+    assert manager._rest_worker is None
+    assert not manager._rest_pending
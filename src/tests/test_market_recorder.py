@@ -0,0 +1,125 @@
+import datetime as dt
+
+import pytest
+
+from trading.market_recorder import (
+    BarRecord,
+    MarketRecorder,
+    MarketReplay,
+    SymbolRecord,
+    TickRecord,
+    iter_recording,
+    recording_path,
+)
+from trading.market_stream import MarketStreamManager
+
+# 2024-01-15 10:00:00 IST
+RECEIVED_AT = 1705293000.0
+DAY = dt.date(2024, 1, 15)
+
+
+def _record_session(base_dir):
+    recorder = MarketRecorder(base_dir)
+    recorder.record_tick('2885', 'RELIANCE', RECEIVED_AT, {
+        'exchange_timestamp': 1705292999500,
+        'last_traded_price': 251050,
+        'volume_trade_for_the_day': 120000,
+    })
+    recorder.record_tick('2885', 'RELIANCE', RECEIVED_AT + 1, {'last_traded_price': 251100})
+    recorder.record_bar('2885', 'RELIANCE', 300, {
+        'time': 1705292700, 'open': 2505.0, 'high': 2512.5, 'low': 2501.0,
+        'close': 2511.0, 'volume': 4200,
+    }, RECEIVED_AT + 2)
+    recorder.close()
+    return recording_path(DAY, base_dir)
+
+
+def test_round_trip_preserves_records_in_order(tmp_path):
+    path = _record_session(tmp_path)
+
+    records = list(iter_recording(path))
+
+    assert records == [
+        SymbolRecord('2885', 'RELIANCE'),
+        TickRecord(RECEIVED_AT, '2885', 1705292999500, 251050, 120000),
+        TickRecord(RECEIVED_AT + 1, '2885', 0, 251100, None),
+        BarRecord('2885', 300, 1705292700, 2505.0, 2512.5, 2501.0, 2511.0, 4200),
+    ]
+
+
+def test_symbol_record_written_once_per_token_per_file(tmp_path):
+    path = _record_session(tmp_path)
+
+    symbols = [r for r in iter_recording(path) if isinstance(r, SymbolRecord)]
+
+    assert symbols == [SymbolRecord('2885', 'RELIANCE')]
+
+
+def test_truncated_tail_is_ignored(tmp_path):
+    path = _record_session(tmp_path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+
+    records = list(iter_recording(path))
+
+    assert len(records) == 3
+    assert isinstance(records[-1], TickRecord)
+
+
+def test_rejects_file_without_magic(tmp_path):
+    path = tmp_path / 'bad.bin'
+    path.write_bytes(b'not a recording')
+
+    with pytest.raises(ValueError):
+        list(iter_recording(path))
+
+
+def _manager() -> MarketStreamManager:
+    manager = MarketStreamManager()
+    manager._recorder = None
+    manager._checkpoint_every = 0
+    manager._rest_check = False
+    manager._connections = []
+    return manager
+
+
+def _collect(manager, bars):
+    manager.add_bar_listener(lambda symbol, bar: bars.append((symbol, dict(bar))))
+
+
+def test_replay_closes_the_same_bars_as_the_live_session(tmp_path):
+    live = _manager()
+    live._recorder = MarketRecorder(tmp_path)
+    now = [RECEIVED_AT]
+    live._clock = live._monotonic = lambda: now[0]
+    live.bind_token('2885', 'RELIANCE')
+    live_bars = []
+    _collect(live, live_bars)
+
+    # (seconds after 10:00, LTP paise, day volume or None for an LTP-only tick)
+    ticks = [
+        (1, 250000, 1000), (60, 250500, 1500), (120, 251000, None),
+        (200, 250800, 1800), (310, 251200, None), (400, 251500, 2600),
+        (610, 251000, 2700),
+    ]
+    for offset, ltp, volume in ticks:
+        now[0] = RECEIVED_AT + offset
+        data = {'token': '2885', 'last_traded_price': ltp}
+        if volume is not None:
+            data['volume_trade_for_the_day'] = volume
+        live._on_data(None, data)
+    live._recorder.close()
+
+    replayed = _manager()
+    replay_bars = []
+    replay = MarketReplay(replayed, speed=0, on_bar=lambda *_a: None)
+    _collect(replayed, replay_bars)
+    summary = replay.run(recording_path(DAY, tmp_path))
+
+    assert summary['ticks'] == len(ticks)
+    assert [b['time'] for _, b in live_bars] == [1705292700 + 300 * i for i in (1, 2)]
+    assert live_bars[0][1]['volume'] == 800
+    assert replay_bars == live_bars
+    for manager in (live, replayed):
+        if manager._stop_timer:
+            manager._stop_timer.cancel()
@@ -0,0 +1,62 @@
+import threading
+
+from trading.market_stream import MarketStreamManager, bucket_start
+
+
+def _manager():
+    manager = MarketStreamManager()
+    manager._recorder = None
+    manager._checkpoint_every = 0
+    manager._rest_check = False
+    manager._connections = []
+    return manager
+
+
+def test_concurrent_broadcasts_start_one_publisher(monkeypatch):
+    manager = _manager()
+    started = []
+    monkeypatch.setattr(
+        manager, '_run_publisher', lambda stop: (started.append(stop), stop.wait(5.0)),
+    )
+    barrier = threading.Barrier(8)
+
+    def feed_thread():
+        barrier.wait()
+        manager._ensure_publisher()
+
+    threads = [threading.Thread(target=feed_thread) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager._stop_publisher()
+
+    assert len(started) == 1
+
+
+def test_bar_clock_advances_once_per_edge():
+    manager = _manager()
+    calls = []
+    wall = 1_700_000_130.0  # 30s into a minute bucket
+
+    def clock():
+        calls.append(wall)
+        return wall
+
+    manager._clock = clock
+    barrier = threading.Barrier(8)
+
+    def feed_thread():
+        barrier.wait()
+        manager._advance_bar_clock(100.0)
+
+    threads = [threading.Thread(target=feed_thread) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Only the first thread past the edge reads the wall clock.
+    assert len(calls) == 1
+    assert manager._bar_times == [bucket_start(wall, i) for i in manager._intervals]
+    assert manager._bar_edge == 100.0 + 30.0
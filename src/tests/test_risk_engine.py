@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from trading.risk_engine import PortfolioRiskEngine
+
+
+def _positions(*rows):
+    return pd.DataFrame([
+        {'tradingsymbol': f'{symbol}-EQ', 'netqty': qty, 'buyavgprice': avg, 'sellavgprice': avg, 'ltp': ltp}
+        for symbol, qty, avg, ltp in rows
+    ])
+
+
+def test_sync_adds_blocked_notional_back_to_cash(db):
+    risk = PortfolioRiskEngine()
+
+    risk.sync_capital(50_000, _positions(('SBIN', 100, 500.0, 520.0)))
+
+    # 50k free + 100 x 500 blocked at entry.
+    assert risk.sizing_capital() == pytest.approx(50_000)
+    assert risk.snapshot()['gross_exposure'] == pytest.approx(52_000)
+
+
+def test_marks_do_not_change_deployable_capital(db):
+    risk = PortfolioRiskEngine()
+    risk.sync_capital(100_000, pd.DataFrame())
+    risk.on_entry('SBIN', 'BUY', 100, 500.0, 490.0)
+
+    risk.on_tick('SBIN', 560.0)
+
+    assert risk.sizing_capital() == pytest.approx(50_000)
+    snap = risk.snapshot()
+    assert snap['gross_exposure'] == pytest.approx(56_000)
+    assert snap['open_risk'] == pytest.approx((560.0 - 490.0) * 100)
+
+
+def test_entries_average_and_flip(db):
+    risk = PortfolioRiskEngine()
+    risk.sync_capital(100_000, pd.DataFrame())
+
+    risk.on_entry('INFY', 'BUY', 10, 100.0, 95.0)
+    risk.on_entry('INFY', 'BUY', 10, 110.0, 95.0)
+    assert risk.sizing_capital() == pytest.approx(100_000 - 20 * 105.0)
+
+    risk.on_entry('INFY', 'SELL', 30, 120.0, 125.0)
+    assert risk.sizing_capital() == pytest.approx(100_000 - 10 * 120.0)
+    assert risk.snapshot()['net_exposure'] == pytest.approx(-1200.0)
+
+
+def test_stop_moves_shrink_open_risk(db):
+    risk = PortfolioRiskEngine()
+    risk.sync_capital(100_000, pd.DataFrame())
+    risk.on_entry('SBIN', 'SELL', 50, 500.0, 510.0)
+    assert risk.snapshot()['open_risk'] == pytest.approx(500.0)
+
+    risk.on_stop_moved('SBIN-EQ', 502.0)
+
+    assert risk.snapshot()['open_risk'] == pytest.approx(100.0)
+    assert risk.snapshot()['unprotected'] == []
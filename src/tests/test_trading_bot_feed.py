@@ -0,0 +1,66 @@
+from django.test import override_settings
+
+from trading.market_stream import MarketStreamManager
+from trading.risk_engine import PortfolioRiskEngine
+from trading.tick_bus import RedisTickBus, TickBus
+from trading.trading_bot import TradeMaster
+
+
+def _bot(bus):
+    bot = TradeMaster.__new__(TradeMaster)
+    bot._risk_engine = PortfolioRiskEngine()
+    bot._tick_bus = bus
+    return bot
+
+
+def test_in_process_feed_is_connected_without_trailing_engine(monkeypatch):
+    manager = MarketStreamManager()
+    manager._recorder = None
+    manager._checkpoint_every = 0
+    manager._rest_check = False
+    manager._connections = []
+    manager.bind_token('3045', 'SBIN')
+    monkeypatch.setattr(MarketStreamManager, '_instance', manager)
+    bot = _bot(TickBus())
+    bot._risk_engine.on_entry('SBIN', 'BUY', 10, 500.0, 490.0)
+
+    feed = bot._connect_feed(['SBIN'])
+
+    assert feed is manager
+    assert manager._interests[bot._feed_client_id][0] == frozenset({'SBIN'})
+    manager._on_data(None, {'token': '3045', 'last_traded_price': 51000})
+    assert bot._tick_bus.latest('SBIN') == 510.0
+    assert bot._risk_engine.snapshot()['gross_exposure'] == 5100.0
+
+    bot._disconnect_feed(feed)
+    assert not manager._tick_listeners
+    assert bot._feed_client_id not in manager._interests
+    if manager._stop_timer:
+        manager._stop_timer.cancel()
+
+
+def test_external_feed_marks_risk_from_the_tick_bus():
+    bus = RedisTickBus('redis://unused')
+    bot = _bot(bus)
+    bot._risk_engine.on_entry('SBIN', 'BUY', 10, 500.0, 490.0)
+
+    with override_settings(LIVE_FEED_PROCESS='external'):
+        feed = bot._connect_feed(['SBIN'])
+        bus._apply('{"at": 0, "prices": {"SBIN": 505.0}}')
+        bot._disconnect_feed(feed)
+
+    assert feed is bus
+    assert bot._risk_engine.snapshot()['gross_exposure'] == 5050.0
+    assert not bus._tick_listeners
+
+
+def test_shard_never_opens_its_own_angel_sockets(monkeypatch):
+    def instance():
+        raise AssertionError('shard opened the in-process feed')
+
+    monkeypatch.setattr(MarketStreamManager, 'instance', staticmethod(instance))
+    bot = _bot(TickBus())
+    bot.capital_ledger_session_id = 1
+
+    with override_settings(LIVE_FEED_PROCESS='inline'):
+        assert bot._connect_feed(['SBIN']) is None
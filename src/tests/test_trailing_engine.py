@@ -0,0 +1,71 @@
+import json
+
+from trading.tick_bus import RedisTickBus
+from trading.trailing_engine import TrailingStopEngine
+from trading.trailing_stop import apply_trailing_update
+
+
+class _Client:
+    def __init__(self):
+        self.modified = []
+
+    def modify_stop_loss_order(self, order_id, _instruments, symbol, _side, _qty, sl, _exchange):
+        self.modified.append((symbol, sl))
+        return f'{order_id}-m'
+
+
+def _engine():
+    engine = TrailingStopEngine(_Client(), [], modify_interval=1.0)
+    engine._managed = {'SBIN'}
+    return engine
+
+
+def test_partial_bars_do_not_seed_trailing_levels():
+    engine = _engine()
+
+    engine.on_bar_close('SBIN', {'time': 0, 'low': 90.0, 'high': 110.0, 'partial': True})
+    assert 'SBIN' not in engine._prev_bar
+
+    engine.on_bar_close('SBIN', {'time': 300, 'low': 95.0, 'high': 105.0, 'partial': False})
+    assert engine._prev_bar['SBIN'] == (95.0, 105.0)
+
+
+def test_tick_bus_feeds_engine_bars_and_ticks():
+    engine = _engine()
+    bus = RedisTickBus('redis://unused')
+    engine.attach(bus)
+
+    bus._apply(json.dumps({
+        'at': 0,
+        'prices': {'SBIN': 101.5, 'INFY': 1500.0},
+        'bars': {'SBIN': {'time': 300, 'low': 99.0, 'high': 102.0}},
+    }))
+
+    assert engine._prev_bar['SBIN'] == (99.0, 102.0)
+    assert engine._ltp == {'SBIN': 101.5}
+    assert bus.latest('INFY') == 1500.0
+
+    engine.detach()
+    assert not bus._tick_listeners and not bus._bar_listeners
+
+
+def test_trailing_update_rereads_position(db):
+    from api.models import ManagedPosition
+    from trading.risk_engine import PortfolioRiskEngine
+
+    mp = ManagedPosition.objects.create(
+        symbol='SBIN', side='BUY', quantity=10, entry_price=100.0,
+        initial_sl=95.0, current_sl=95.0, sl_order_id='sl1',
+    )
+    stale = ManagedPosition.objects.get(pk=mp.pk)
+    client = _Client()
+    risk = PortfolioRiskEngine()
+    risk.on_entry('SBIN', 'BUY', 10, 100.0, 95.0)
+    risk.on_tick('SBIN', 103.0)
+
+    assert apply_trailing_update(client, mp, 103.0, 101.0, 104.0, [], risk_engine=risk)
+    assert risk.snapshot()['open_risk'] == 20.0
+    # The other path still holds the pre-update row; it must not move the SL back.
+    assert not apply_trailing_update(client, stale, 103.0, 101.0, 104.0, [])
+    assert client.modified == [('SBIN', 101)]
+    assert stale.sl_order_id == 'sl1-m'
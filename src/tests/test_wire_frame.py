@@ -0,0 +1,60 @@
+import struct
+
+from trading.market_stream import (
+    WIRE_KIND_SNAPSHOT,
+    WIRE_KIND_TICKS,
+    WIRE_VERSION,
+    _LiveBar,
+    encode_wire_frame,
+)
+
+
+def _decode(frame: bytes):
+    """Reference decoder, same layout as frontend/src/hooks/useChartLiveSocket.js."""
+    version, kind, count = struct.unpack_from('<BBH', frame, 0)
+    offset = 4
+    items = []
+    for _ in range(count):
+        length = frame[offset]
+        symbol = frame[offset + 1:offset + 1 + length].decode('ascii')
+        offset += 1 + length
+        items.append((symbol, *struct.unpack_from('<IiiiiI', frame, offset)))
+        offset += 24
+    assert offset == len(frame)
+    return version, kind, items
+
+
+def _bar(symbol: str, close: float, volume: int = 0) -> _LiveBar:
+    bar = _LiveBar('3045', symbol)
+    bar.start(1_700_000_100, 500.0, volume, partial=False)
+    bar.high, bar.low, bar.close = 505.55, 499.1, close
+    return bar
+
+
+def test_ticks_frame_round_trip():
+    frame = encode_wire_frame([_bar('SBIN', 501.25, 1200).encode(), _bar('M&M', 2999.99).encode()])
+
+    version, kind, items = _decode(frame)
+
+    assert (version, kind) == (WIRE_VERSION, WIRE_KIND_TICKS)
+    assert items == [
+        ('SBIN', 1_700_000_100, 50000, 50555, 49910, 50125, 1200),
+        ('M&M', 1_700_000_100, 50000, 50555, 49910, 299999, 0),
+    ]
+
+
+def test_empty_snapshot_frame_is_header_only():
+    frame = encode_wire_frame([], WIRE_KIND_SNAPSHOT)
+
+    assert frame == struct.pack('<BBH', WIRE_VERSION, WIRE_KIND_SNAPSHOT, 0)
+    assert _decode(frame) == (WIRE_VERSION, WIRE_KIND_SNAPSHOT, [])
+
+
+def test_names_and_volume_are_clamped_to_the_layout():
+    bar = _bar('X' * 300, 501.0, 2**40)
+    bar.rename('É' + 'Y' * 300)
+
+    _, _, [item] = _decode(encode_wire_frame([bar.encode()]))
+
+    assert item[0] == '?' + 'Y' * 254
+    assert item[-1] == 0xFFFFFFFF